@@ -13,4 +13,10 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# El flujo de eventos de asistencias (SSE) se envía desde el event loop; se importa
+# después de configurar Django
+from example.eventos import con_flujo_de_eventos  # noqa: E402
+
+application = con_flujo_de_eventos(django_application)
@@ -0,0 +1,169 @@
+"""
+Backend de PostgreSQL con un pool de conexiones en el proceso.
+
+Django 4.1 no trae pool: con CONN_MAX_AGE cada hilo conserva su propia conexión,
+que se pierde cuando el servidor crea un hilo por petición. Con este backend
+(ENGINE 'api.postgresql_pool', activado con DB_POOL=True en settings) cerrar la
+conexión al terminar la petición la devuelve al pool y la siguiente petición, en
+cualquier hilo, la reutiliza sin volver a negociar TCP/TLS ni autenticarse.
+
+Opciones en DATABASES['default']['POOL']:
+- MAXIMO: conexiones abiertas como máximo por proceso
+- ESPERA_SEGUNDOS: cuánto espera una petición por una conexión libre antes de fallar
+- VERIFICAR_TRAS_SEGUNDOS: una conexión que estuvo libre más que esto se verifica
+  con SELECT 1 antes de entregarla (las recién usadas se entregan sin verificar)
+
+Las conexiones vuelven al pool en autocommit y fuera de toda transacción; las que
+tuvieron errores o quedaron cerradas se descartan.
+"""
+import os
+import threading
+import time
+
+from django.db import OperationalError
+from django.db.backends.postgresql import base
+
+_lock = threading.Lock()
+_pools = {}  # (pid, alias) -> _Pool
+
+
+class _Entrada:
+    __slots__ = ('conexion', 'isolation_level', 'liberada_en')
+
+    def __init__(self, conexion, isolation_level):
+        self.conexion = conexion
+        self.isolation_level = isolation_level
+        self.liberada_en = time.monotonic()
+
+
+class _Pool:
+    """Conexiones libres (LIFO: la más reciente está caliente) y un límite de abiertas."""
+
+    def __init__(self, maximo, espera_segundos, verificar_tras_segundos):
+        self.maximo = maximo
+        self.espera_segundos = espera_segundos
+        self.verificar_tras_segundos = verificar_tras_segundos
+        self.libres = []
+        self.abiertas = 0
+        self.creadas = 0
+        self._condicion = threading.Condition()
+
+    def tomar(self, crear):
+        """Entrada libre, o una nueva creada con crear() si no se alcanzó el máximo."""
+        limite = time.monotonic() + self.espera_segundos
+        while True:
+            with self._condicion:
+                while not self.libres and self.abiertas >= self.maximo:
+                    restante = limite - time.monotonic()
+                    if restante <= 0:
+                        raise OperationalError(
+                            f'Pool de conexiones agotado ({self.maximo} abiertas, '
+                            f'{self.espera_segundos} s de espera)'
+                        )
+                    self._condicion.wait(restante)
+                if self.libres:
+                    entrada = self.libres.pop()
+                else:
+                    self.abiertas += 1
+                    entrada = None
+
+            if entrada is None:
+                try:
+                    entrada = crear()
+                except Exception:
+                    self._descontar()
+                    raise
+                self.creadas += 1
+                return entrada
+            if self._utilizable(entrada):
+                return entrada
+            self.descartar(entrada)
+
+    def _utilizable(self, entrada):
+        if entrada.conexion.closed:
+            return False
+        if time.monotonic() - entrada.liberada_en < self.verificar_tras_segundos:
+            return True
+        try:
+            with entrada.conexion.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            return True
+        except Exception:
+            return False
+
+    def devolver(self, entrada):
+        entrada.liberada_en = time.monotonic()
+        with self._condicion:
+            self.libres.append(entrada)
+            self._condicion.notify()
+
+    def descartar(self, entrada):
+        try:
+            entrada.conexion.close()
+        except Exception:
+            pass
+        self._descontar()
+
+    def _descontar(self):
+        with self._condicion:
+            self.abiertas -= 1
+            self._condicion.notify()
+
+
+def _pool_de(alias, settings_dict):
+    clave = (os.getpid(), alias)  # tras un fork el proceso hijo arma su propio pool
+    pool = _pools.get(clave)
+    if pool is None:
+        with _lock:
+            pool = _pools.get(clave)
+            if pool is None:
+                opciones = settings_dict.get('POOL', {})
+                pool = _pools[clave] = _Pool(
+                    maximo=opciones.get('MAXIMO', 10),
+                    espera_segundos=opciones.get('ESPERA_SEGUNDOS', 10),
+                    verificar_tras_segundos=opciones.get('VERIFICAR_TRAS_SEGUNDOS', 30),
+                )
+    return pool
+
+
+def estadisticas():
+    """Por alias: conexiones abiertas, libres y creadas desde el inicio del proceso."""
+    pid = os.getpid()
+    return {
+        alias: {'abiertas': pool.abiertas, 'libres': len(pool.libres), 'creadas': pool.creadas}
+        for (pid_pool, alias), pool in list(_pools.items()) if pid_pool == pid
+    }
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    _entrada = None
+
+    def get_new_connection(self, conn_params):
+        def crear():
+            conexion = super(DatabaseWrapper, self).get_new_connection(conn_params)
+            return _Entrada(conexion, self.isolation_level)
+
+        entrada = _pool_de(self.alias, self.settings_dict).tomar(crear)
+        # get_new_connection lo fija al crear la conexión; en las reutilizadas se restaura
+        self.isolation_level = entrada.isolation_level
+        self._entrada = entrada
+        return entrada.conexion
+
+    def _close(self):
+        entrada, self._entrada = self._entrada, None
+        if entrada is None or entrada.conexion is not self.connection:
+            return super()._close()
+
+        pool = _pool_de(self.alias, self.settings_dict)
+        conexion = entrada.conexion
+        if conexion.closed or self.errors_occurred:
+            pool.descartar(entrada)
+            return
+        try:
+            if not conexion.autocommit:
+                conexion.rollback()
+                conexion.autocommit = True
+        except Exception:
+            pool.descartar(entrada)
+            return
+        pool.devolver(entrada)
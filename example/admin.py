@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import UsuarioPersonalizado, HorarioFijo, Asistencia
+from django.db import transaction
+from .models import UsuarioPersonalizado, HorarioFijo, Asistencia, ResumenHorasDiario, ConfiguracionSistema
+from .resumenes import actualizar_resumen_diario, pares_de_horarios
+from .configuracion import invalidar_configuraciones
 
 @admin.register(UsuarioPersonalizado)
 class UsuarioPersonalizadoAdmin(admin.ModelAdmin):
@@ -15,6 +18,25 @@ class HorarioFijoAdmin(admin.ModelAdmin):
     search_fields = ['usuario__username', 'usuario__nombre']
     ordering = ['usuario', 'dia_semana', 'jornada']
 
+    # Cambiar o borrar un horario afecta sus asistencias en el resumen diario
+    def save_model(self, request, obj, form, change):
+        with transaction.atomic():
+            pares = pares_de_horarios([obj.pk]) if change else set()
+            super().save_model(request, obj, form, change)
+            actualizar_resumen_diario(pares)
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            pares = pares_de_horarios([obj.pk])
+            super().delete_model(request, obj)
+            actualizar_resumen_diario(pares)
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            pares = pares_de_horarios(queryset)
+            super().delete_queryset(request, queryset)
+            actualizar_resumen_diario(pares)
+
 @admin.register(Asistencia)
 class AsistenciaAdmin(admin.ModelAdmin):
     list_display = ['usuario', 'fecha', 'horario', 'presente']
@@ -22,3 +44,62 @@ class AsistenciaAdmin(admin.ModelAdmin):
     search_fields = ['usuario__username', 'usuario__nombre']
     ordering = ['-fecha', 'usuario']
     date_hierarchy = 'fecha'
+
+    def save_model(self, request, obj, form, change):
+        pares = [(obj.usuario_id, obj.fecha)]
+        if change:
+            pares.append((form.initial.get('usuario'), form.initial.get('fecha')))
+        with transaction.atomic():
+            super().save_model(request, obj, form, change)
+            actualizar_resumen_diario(pares)
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            super().delete_model(request, obj)
+            actualizar_resumen_diario([(obj.usuario_id, obj.fecha)])
+
+    def delete_queryset(self, request, queryset):
+        pares = list(queryset.values_list('usuario_id', 'fecha'))
+        with transaction.atomic():
+            super().delete_queryset(request, queryset)
+            actualizar_resumen_diario(pares)
+
+@admin.register(ResumenHorasDiario)
+class ResumenHorasDiarioAdmin(admin.ModelAdmin):
+    list_display = ['usuario', 'fecha', 'sede', 'jornada', 'horas_asistencias', 'horas_ajustes']
+    list_filter = ['fecha', 'sede', 'jornada']
+    search_fields = ['usuario__username', 'usuario__nombre']
+    ordering = ['-fecha', 'usuario']
+    date_hierarchy = 'fecha'
+
+    # Tabla derivada: se recalcula desde asistencias y ajustes, no se edita a mano
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        # Solo se borra en cascada (p. ej. al borrar un usuario), no desde sus propias páginas
+        vista = getattr(request.resolver_match, 'url_name', None) or ''
+        return not vista.startswith(f'{self.opts.app_label}_{self.opts.model_name}_')
+
+@admin.register(ConfiguracionSistema)
+class ConfiguracionSistemaAdmin(admin.ModelAdmin):
+    list_display = ['clave', 'valor', 'tipo_dato', 'updated_at']
+    list_filter = ['tipo_dato']
+    search_fields = ['clave', 'descripcion']
+    ordering = ['clave']
+
+    # Las configuraciones se cachean por proceso: invalidar tras cada cambio
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        invalidar_configuraciones()
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        invalidar_configuraciones()
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        invalidar_configuraciones()
@@ -7,3 +7,9 @@ class ExampleConfig(AppConfig):
     
     def ready(self):
         import example.models
+        # Señales que invalidan la caché de reportes
+        import example.cache_reportes
+        # Señales que publican el flujo de eventos de asistencias
+        import example.eventos
+        # Tareas periódicas y arranque del programador con la primera petición
+        import example.tareas_periodicas
@@ -1,6 +1,15 @@
+import hmac
+
+from django.conf import settings
 from django.contrib.auth.backends import BaseBackend
 from django.contrib.auth.hashers import check_password
+from django.contrib.auth.models import AnonymousUser
+from rest_framework.authentication import BaseAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
 from .models import UsuarioPersonalizado
+from .usuarios_cacheados import obtener_usuario_cacheado
 
 class UsuarioPersonalizadoBackend(BaseBackend):
     """
@@ -21,3 +30,74 @@ class UsuarioPersonalizadoBackend(BaseBackend):
             return UsuarioPersonalizado.objects.get(pk=user_id)
         except UsuarioPersonalizado.DoesNotExist:
             return None
+
+
+def emitir_token(usuario):
+    """
+    Token de acceso JWT del usuario, con los claims user_id y tipo_usuario
+    (el rol permite rechazar tokens emitidos antes de un cambio de rol).
+    """
+    access_token = RefreshToken.for_user(usuario).access_token
+    # Configurar el token para que no expire
+    access_token.set_exp(lifetime=None)
+    access_token['tipo_usuario'] = usuario.tipo_usuario
+    return str(access_token)
+
+
+class UsuarioPersonalizadoJWTAuthentication(BaseAuthentication):
+    """
+    Autenticación DRF por JWT (Authorization: Bearer <token>) para UsuarioPersonalizado.
+
+    Verifica la firma del token y resuelve el usuario del claim user_id desde la
+    caché de usuarios del proceso, por lo que normalmente no hace consultas.
+    Si el token trae el claim tipo_usuario y ya no coincide con el rol actual del
+    usuario, el token se rechaza.
+    """
+    www_authenticate_realm = 'api'
+
+    def authenticate(self, request):
+        auth_header = request.META.get('HTTP_AUTHORIZATION', '')
+        if not auth_header.startswith('Bearer '):
+            return None
+
+        try:
+            payload = AccessToken(auth_header.split(' ')[1])
+        except (TokenError, IndexError) as e:
+            raise AuthenticationFailed({'detail': f'Token inválido: {str(e)}', 'code': 'invalid_token'})
+
+        usuario = obtener_usuario_cacheado(payload.get('user_id'))
+        if usuario is None:
+            raise AuthenticationFailed({'detail': 'Usuario no encontrado', 'code': 'user_not_found'})
+        if not usuario.is_active:
+            raise AuthenticationFailed({'detail': 'Usuario inactivo', 'code': 'user_inactive'})
+
+        rol = payload.get('tipo_usuario')
+        if rol is not None and rol != usuario.tipo_usuario:
+            raise AuthenticationFailed({'detail': 'El rol del usuario cambió; inicie sesión de nuevo', 'code': 'role_changed'})
+
+        return (usuario, payload)
+
+    def authenticate_header(self, request):
+        return f'Bearer realm="{self.www_authenticate_realm}"'
+
+
+RECOLECTOR_METRICAS = 'recolector_metricas'
+
+
+class TokenMetricasAuthentication(BaseAuthentication):
+    """
+    Autentica al recolector de métricas (Prometheus) con el token estático
+    settings.METRICAS_TOKEN. El usuario es anónimo y request.auth es RECOLECTOR_METRICAS.
+    """
+
+    def authenticate(self, request):
+        token = getattr(settings, 'METRICAS_TOKEN', '')
+        if not token:
+            return None
+        auth_header = request.META.get('HTTP_AUTHORIZATION', '')
+        if not hmac.compare_digest(auth_header.encode(), f'Bearer {token}'.encode()):
+            return None
+        return (AnonymousUser(), RECOLECTOR_METRICAS)
+
+    def authenticate_header(self, request):
+        return 'Bearer realm="api"'
@@ -0,0 +1,325 @@
+"""
+Medición de todos los endpoints de example/urls.py con el cliente de pruebas de Django.
+
+Cada ruta tiene uno o más escenarios (método, parámetros, cuerpo y rol del token)
+construidos sobre los datos sintéticos de datos_sinteticos. Por escenario se
+registra la mediana del tiempo de respuesta, las consultas SQL y el tamaño de la
+respuesta. Los escenarios que escriben se ejecutan dentro de una transacción que
+se revierte, de modo que todas las repeticiones ven los mismos datos; los
+SAVEPOINT que agrega esa transacción no se cuentan como consultas. Por defecto la
+caché de reportes se vacía antes de cada petición, para medir el cálculo.
+"""
+import contextlib
+import io
+import json
+import logging
+import statistics
+import threading
+import time
+from collections import namedtuple
+from datetime import timedelta
+
+from django.core.cache import caches
+from django.db import connections, transaction
+from django.test import Client
+from django.urls import get_resolver, reverse
+
+from . import urls as example_urls
+from .authentication import emitir_token
+from .busqueda import invalidar_indice_monitores
+from .cache_reportes import ALIAS_CACHE
+from .configuracion import invalidar_configuraciones
+from .datos_sinteticos import PREFIJO_USERNAME, PASSWORD_SINTETICA
+from .models import UsuarioPersonalizado, Asistencia, AjusteHoras, ConfiguracionSistema, Trabajo
+from .usuarios_cacheados import invalidar_usuario_cacheado
+
+METODOS_LECTURA = ('GET', 'HEAD')
+PREFIJOS_SAVEPOINT = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+# El flujo de eventos queda abierto hasta EVENTOS_DURACION_SEGUNDOS: no tiene tiempo de respuesta
+RUTAS_SIN_MEDICION = {'directivo_asistencias_eventos'}
+
+# ruta: nombre de la URL; ruta_kwargs: argumentos de reverse(); rol: 'directivo', 'monitor' o None
+Escenario = namedtuple('Escenario', 'ruta metodo etiqueta ruta_kwargs query cuerpo rol',
+                       defaults=('', None, None, None, 'directivo'))
+
+
+class ContextoBenchmark:
+    """Usuarios, tokens e ids de los datos sintéticos que usan los escenarios."""
+
+    def __init__(self, semanas_consulta=4):
+        self.directivo = UsuarioPersonalizado.objects.filter(
+            username=f'{PREFIJO_USERNAME}directivo'
+        ).first() or UsuarioPersonalizado.objects.filter(tipo_usuario='DIRECTIVO').first()
+        asistencia = Asistencia.objects.filter(
+            usuario__username__startswith=PREFIJO_USERNAME
+        ).select_related('horario').order_by('-fecha', 'id').first()
+        if self.directivo is None or asistencia is None:
+            raise ValueError('No hay datos sintéticos. Ejecute manage.py seed_benchmark')
+
+        self.monitor = asistencia.usuario
+        self.asistencia = asistencia
+        self.horario = asistencia.horario
+        self.pendiente = Asistencia.objects.filter(
+            estado_autorizacion='pendiente', usuario__username__startswith=PREFIJO_USERNAME
+        ).select_related('horario').order_by('-fecha', 'id').first() or asistencia
+        self.ajuste = AjusteHoras.objects.filter(usuario__username__startswith=PREFIJO_USERNAME).order_by('id').first()
+        self.configuracion = ConfiguracionSistema.objects.order_by('id').first()
+        self.trabajo = Trabajo.objects.filter(estado=Trabajo.COMPLETADO).order_by('-id').first()
+
+        self.fecha_fin = asistencia.fecha
+        self.fecha_inicio = self.fecha_fin - timedelta(weeks=semanas_consulta, days=-1)
+        self.tokens = {
+            'directivo': emitir_token(self.directivo),
+            'monitor': emitir_token(self.monitor),
+        }
+
+    def rango(self, **extra):
+        return {'fecha_inicio': self.fecha_inicio.isoformat(), 'fecha_fin': self.fecha_fin.isoformat(), **extra}
+
+
+def construir_escenarios(ctx):
+    """Escenarios de todas las rutas; los que requieren datos ausentes se omiten."""
+    fecha = ctx.fecha_fin.isoformat()
+    # Misma jornada de la asistencia de referencia, una semana después (sin asistencia creada)
+    fecha_libre = (ctx.asistencia.fecha + timedelta(weeks=1)).isoformat()
+    lunes = ctx.fecha_fin - timedelta(days=ctx.fecha_fin.weekday())
+    horario = {'dia_semana': ctx.horario.dia_semana, 'jornada': ctx.horario.jornada, 'sede': ctx.horario.sede}
+    nuevo_horario = {'dia_semana': 6, 'jornada': 'T', 'sede': 'SA'}
+    escenarios = [
+        Escenario('login_usuario', 'POST', rol=None,
+                  cuerpo={'nombre_de_usuario': ctx.directivo.username, 'password': PASSWORD_SINTETICA}),
+        Escenario('registro_usuario', 'POST', rol=None, cuerpo={
+            'username': f'{PREFIJO_USERNAME}registro', 'nombre': 'Registro Benchmark',
+            'password': PASSWORD_SINTETICA, 'confirm_password': PASSWORD_SINTETICA
+        }),
+        Escenario('obtener_usuario_actual', 'GET'),
+
+        Escenario('horarios_fijos', 'GET', rol='monitor'),
+        Escenario('horarios_fijos', 'POST', rol='monitor', cuerpo=nuevo_horario),
+        Escenario('horarios_fijos_multiple', 'POST', rol='monitor', cuerpo={'horarios': [nuevo_horario]}),
+        Escenario('horarios_fijos_edit_multiple', 'PUT', rol='monitor', cuerpo={'horarios': [horario, nuevo_horario]}),
+        Escenario('horario_fijo_detalle', 'GET', rol='monitor', ruta_kwargs={'pk': ctx.horario.id}),
+        Escenario('horario_fijo_detalle', 'PUT', rol='monitor', ruta_kwargs={'pk': ctx.horario.id}, cuerpo=horario),
+        Escenario('horario_fijo_detalle', 'DELETE', rol='monitor', ruta_kwargs={'pk': ctx.horario.id}),
+
+        Escenario('asistencias', 'GET', rol='monitor'),
+        Escenario('asistencias', 'POST', rol='monitor',
+                  cuerpo={'fecha': fecha_libre, 'horario': ctx.horario.id, 'presente': True}),
+        Escenario('asistencia_detalle', 'GET', rol='monitor', ruta_kwargs={'pk': ctx.asistencia.id}),
+        Escenario('asistencia_detalle', 'PUT', rol='monitor', ruta_kwargs={'pk': ctx.asistencia.id},
+                  cuerpo={'fecha': fecha, 'horario': ctx.horario.id, 'presente': True}),
+        Escenario('asistencia_detalle', 'DELETE', rol='monitor', ruta_kwargs={'pk': ctx.asistencia.id}),
+
+        Escenario('directivo_horarios_monitores', 'GET'),
+        Escenario('directivo_asistencias', 'GET', 'rango', query=ctx.rango()),
+        Escenario('directivo_asistencias', 'GET', 'dia', query={'fecha': fecha}),
+        Escenario('directivo_asistencias', 'GET', 'paginado', query=ctx.rango(page_size=100)),
+        Escenario('directivo_exportar_asistencias', 'GET', query=ctx.rango()),
+        Escenario('directivo_generar_asistencias', 'POST', cuerpo={
+            'fecha_inicio': lunes.isoformat(), 'fecha_fin': (lunes + timedelta(days=6)).isoformat()
+        }),
+        Escenario('directivo_decidir_asistencias', 'POST', 'ids', cuerpo={'accion': 'autorizar', 'ids': [ctx.pendiente.id]}),
+        Escenario('directivo_decidir_asistencias', 'POST', 'dia', cuerpo={'accion': 'autorizar', 'fecha': fecha}),
+        Escenario('directivo_autorizar_asistencia', 'POST', ruta_kwargs={'pk': ctx.pendiente.id}),
+        Escenario('directivo_rechazar_asistencia', 'POST', ruta_kwargs={'pk': ctx.pendiente.id}),
+        Escenario('directivo_autorizar_asistencia_virtual', 'POST', cuerpo={
+            'monitor_id': ctx.pendiente.usuario_id, 'fecha': ctx.pendiente.fecha.isoformat(),
+            'jornada': ctx.pendiente.horario.jornada
+        }),
+        Escenario('directivo_rechazar_asistencia_virtual', 'POST', cuerpo={
+            'monitor_id': ctx.pendiente.usuario_id, 'fecha': ctx.pendiente.fecha.isoformat(),
+            'jornada': ctx.pendiente.horario.jornada
+        }),
+
+        Escenario('directivo_reporte_horas_monitor', 'GET', ruta_kwargs={'monitor_id': ctx.monitor.id}, query=ctx.rango()),
+        Escenario('directivo_reporte_horas_todos', 'GET', query=ctx.rango()),
+        Escenario('directivo_reporte_horas_todos', 'GET', 'sede', query=ctx.rango(sede='SA')),
+
+        Escenario('monitor_mis_asistencias', 'GET', rol='monitor', query={'fecha': fecha}),
+        Escenario('monitor_marcar', 'POST', rol='monitor', cuerpo={'fecha': fecha, 'jornada': ctx.horario.jornada}),
+
+        Escenario('directivo_ajustes_horas', 'GET', query=ctx.rango()),
+        Escenario('directivo_ajustes_horas', 'POST', cuerpo={
+            'monitor_id': ctx.monitor.id, 'fecha': fecha, 'cantidad_horas': 2, 'motivo': 'Ajuste benchmark'
+        }),
+        Escenario('directivo_exportar_ajustes', 'GET', query=ctx.rango()),
+        Escenario('directivo_buscar_monitores', 'GET', query={'q': 'mar'}),
+
+        Escenario('directivo_finanzas_monitor_individual', 'GET', ruta_kwargs={'monitor_id': ctx.monitor.id}),
+        Escenario('directivo_finanzas_todos_monitores', 'GET'),
+        Escenario('directivo_finanzas_resumen_ejecutivo', 'GET'),
+        Escenario('directivo_finanzas_comparativa_semanas', 'GET'),
+        Escenario('directivo_total_horas_horarios', 'GET'),
+
+        Escenario('directivo_configuraciones', 'GET'),
+        Escenario('directivo_configuraciones_crear', 'POST', cuerpo={
+            'clave': f'{PREFIJO_USERNAME}clave', 'valor': '1', 'descripcion': 'Configuración benchmark', 'tipo_dato': 'entero'
+        }),
+        Escenario('directivo_configuraciones_inicializar', 'POST'),
+        Escenario('directivo_trabajos', 'GET'),
+        Escenario('directivo_trabajos', 'POST', cuerpo={'tipo': 'reporte_horas_todos', 'parametros': ctx.rango()}),
+        Escenario('metricas', 'GET'),
+    ]
+    if ctx.ajuste is not None:
+        escenarios += [
+            Escenario('directivo_ajuste_horas_detalle', 'GET', ruta_kwargs={'pk': ctx.ajuste.id}),
+            Escenario('directivo_ajuste_horas_detalle', 'DELETE', ruta_kwargs={'pk': ctx.ajuste.id}),
+        ]
+    if ctx.trabajo is not None:
+        escenarios += [
+            Escenario('directivo_trabajo_detalle', 'GET', ruta_kwargs={'pk': ctx.trabajo.id}),
+            Escenario('directivo_trabajo_resultado', 'GET', ruta_kwargs={'pk': ctx.trabajo.id}),
+        ]
+    if ctx.configuracion is not None:
+        datos = {
+            'clave': ctx.configuracion.clave, 'valor': ctx.configuracion.valor,
+            'descripcion': ctx.configuracion.descripcion, 'tipo_dato': ctx.configuracion.tipo_dato
+        }
+        escenarios += [
+            Escenario('directivo_configuraciones_detalle', 'GET', ruta_kwargs={'clave': ctx.configuracion.clave}),
+            Escenario('directivo_configuraciones_detalle', 'PUT', ruta_kwargs={'clave': ctx.configuracion.clave},
+                      cuerpo=datos),
+            Escenario('directivo_configuraciones_detalle', 'DELETE', ruta_kwargs={'clave': ctx.configuracion.clave}),
+            Escenario('directivo_configuraciones_detalle_por_id', 'GET', ruta_kwargs={'id': ctx.configuracion.id}),
+        ]
+    return escenarios
+
+
+def rutas_sin_escenario(escenarios):
+    """Nombres de example/urls.py que ningún escenario cubre (sin contar RUTAS_SIN_MEDICION)."""
+    cubiertas = {escenario.ruta for escenario in escenarios} | RUTAS_SIN_MEDICION
+    return sorted(patron.name for patron in example_urls.urlpatterns if patron.name not in cubiertas)
+
+
+def _invalidar_caches():
+    """Tras revertir una escritura, las cachés del proceso podrían tener datos revertidos."""
+    invalidar_configuraciones()
+    invalidar_usuario_cacheado()
+    invalidar_indice_monitores()
+
+
+@contextlib.contextmanager
+def _sin_salida_de_vistas():
+    """Descarta los print de las vistas y los avisos 4xx/5xx de django.request."""
+    registro = logging.getLogger('django.request')
+    nivel = registro.level
+    registro.setLevel(logging.CRITICAL)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield
+    finally:
+        registro.setLevel(nivel)
+
+
+class _ContadorConsultas:
+    """
+    execute_wrapper que cuenta las consultas de todas las bases de datos, sin los
+    SAVEPOINT; en_paralelo lo propaga a los hilos que ejecutan consultas de reportes.
+    """
+
+    def __init__(self):
+        self.consultas = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        if not sql.startswith(PREFIJOS_SAVEPOINT):
+            with self._lock:
+                self.consultas += 1
+        return execute(sql, params, many, context)
+
+
+class _Ejecucion:
+    def __init__(self, cliente, escenario, ctx, cache_reportes=False):
+        self.cliente = cliente
+        self.escenario = escenario
+        self.cache_reportes = cache_reportes
+        self.url = reverse(escenario.ruta, kwargs=escenario.ruta_kwargs)
+        self.headers = {}
+        if escenario.rol:
+            self.headers['HTTP_AUTHORIZATION'] = f'Bearer {ctx.tokens[escenario.rol]}'
+
+    def _peticion(self):
+        metodo = self.escenario.metodo.lower()
+        if self.escenario.metodo in METODOS_LECTURA:
+            return getattr(self.cliente, metodo)(self.url, data=self.escenario.query, **self.headers)
+        url = self.url
+        if self.escenario.query:
+            url += '?' + '&'.join(f'{clave}={valor}' for clave, valor in self.escenario.query.items())
+        return getattr(self.cliente, metodo)(
+            url, data=json.dumps(self.escenario.cuerpo or {}), content_type='application/json', **self.headers
+        )
+
+    def _medir(self):
+        if not self.cache_reportes:
+            caches[ALIAS_CACHE].clear()
+        contador = _ContadorConsultas()
+        with contextlib.ExitStack() as pila:
+            for conexion in connections.all():
+                pila.enter_context(conexion.execute_wrapper(contador))
+            inicio = time.perf_counter()
+            respuesta = self._peticion()
+            if respuesta.streaming:
+                tamano = sum(len(bloque) for bloque in respuesta.streaming_content)
+            else:
+                tamano = len(respuesta.content)
+            segundos = time.perf_counter() - inicio
+        return respuesta.status_code, segundos, contador.consultas, tamano
+
+    def ejecutar(self):
+        if self.escenario.metodo in METODOS_LECTURA:
+            return self._medir()
+        with transaction.atomic():
+            resultado = self._medir()
+            transaction.set_rollback(True)
+        _invalidar_caches()
+        return resultado
+
+
+def medir_escenarios(escenarios, ctx, repeticiones=5, cache_reportes=False):
+    """
+    Diccionario 'ruta MÉTODO[ etiqueta]' -> mediciones del escenario. La primera
+    ejecución es de calentamiento (en una lectura, puede crear asistencias faltantes).
+    Con cache_reportes=True los reportes se sirven de la caché llena por esa ejecución.
+    """
+    # 127.0.0.1 está en ALLOWED_HOSTS; 'testserver' no. Los errores 500 se registran como estado
+    cliente = Client(HTTP_HOST='127.0.0.1', raise_request_exception=False)
+    resultados = {}
+    for escenario in escenarios:
+        ejecucion = _Ejecucion(cliente, escenario, ctx, cache_reportes)
+        with _sin_salida_de_vistas():
+            ejecucion.ejecutar()
+            mediciones = [ejecucion.ejecutar() for _ in range(repeticiones)]
+        tiempos = [segundos * 1000 for _, segundos, _, _ in mediciones]
+        estado, _, consultas, tamano = mediciones[-1]
+        clave = f'{escenario.ruta} {escenario.metodo}' + (f' {escenario.etiqueta}' if escenario.etiqueta else '')
+        resultados[clave] = {
+            'url': ejecucion.url,
+            'vista': get_resolver().resolve(ejecucion.url).url_name,
+            'estado': estado,
+            'ms_mediana': round(statistics.median(tiempos), 3),
+            'ms_min': round(min(tiempos), 3),
+            'ms_max': round(max(tiempos), 3),
+            'consultas': consultas,
+            'bytes': tamano,
+        }
+    return resultados
+
+
+def comparar_reportes(anterior, actual):
+    """
+    Filas (escala, endpoint, ms antes, ms después, consultas antes, consultas después)
+    de los endpoints presentes en ambos reportes.
+    """
+    filas = []
+    escalas_anteriores = {escala['escala']: escala for escala in anterior.get('escalas', [])}
+    for escala in actual.get('escalas', []):
+        previa = escalas_anteriores.get(escala['escala'])
+        if previa is None:
+            continue
+        for nombre, medicion in escala['endpoints'].items():
+            antes = previa['endpoints'].get(nombre)
+            if antes is None:
+                continue
+            filas.append((escala['escala'], nombre, antes['ms_mediana'], medicion['ms_mediana'],
+                          antes['consultas'], medicion['consultas']))
+    return filas
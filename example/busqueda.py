@@ -0,0 +1,175 @@
+"""
+Búsqueda de monitores por nombre o username para el autocompletado.
+
+Cada usuario guarda en `busqueda` su nombre y username normalizados (minúsculas,
+sin acentos ni espacios repetidos). En PostgreSQL esa columna tiene un índice GIN
+de trigramas (pg_trgm), de modo que tanto la búsqueda por subcadena (LIKE) como la
+aproximada (operador <%, similitud por palabra) usan el índice.
+En otros motores se usa un índice en memoria del proceso, que se reconstruye
+cuando cambian los usuarios en este proceso o cada BUSQUEDA_MONITORES_SEGUNDOS.
+
+Orden de los resultados: primero las coincidencias al inicio de una palabra,
+luego las subcadenas y al final las coincidencias aproximadas; dentro de cada
+grupo, por word_similarity, similarity y luego por nombre.
+"""
+import threading
+import time
+import unicodedata
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import connection
+
+UMBRAL_SIMILITUD = 0.6  # Igual al pg_trgm.word_similarity_threshold por defecto
+LIMITE_RESULTADOS = 20
+
+
+def normalizar_texto(texto):
+    """Minúsculas, sin acentos y con los espacios colapsados."""
+    descompuesto = unicodedata.normalize('NFKD', texto or '')
+    sin_acentos = ''.join(caracter for caracter in descompuesto if not unicodedata.combining(caracter))
+    return ' '.join(sin_acentos.lower().split())
+
+
+def texto_busqueda(nombre, username):
+    """Valor de la columna `busqueda` de un usuario."""
+    return normalizar_texto(f'{nombre} {username}')
+
+
+def trigramas(texto):
+    """Trigramas de cada palabra, con el mismo relleno de espacios que pg_trgm."""
+    resultado = set()
+    for palabra in texto.split():
+        rellena = f'  {palabra} '
+        resultado.update(rellena[i:i + 3] for i in range(len(rellena) - 2))
+    return resultado
+
+
+def _nivel(texto, consulta):
+    """0: inicio de palabra, 1: subcadena, 2: solo aproximada."""
+    if texto.startswith(consulta) or f' {consulta}' in texto:
+        return 0
+    if consulta in texto:
+        return 1
+    return 2
+
+
+class IndiceMonitores:
+    """
+    Índice en memoria de los monitores: texto normalizado y un índice invertido
+    trigrama -> posiciones, para contar los trigramas compartidos sin recorrer
+    los trigramas de cada monitor.
+    """
+
+    def __init__(self, filas):
+        # filas: (id, username, nombre)
+        self.monitores = []
+        self.cantidad_trigramas = []
+        self.posiciones = defaultdict(list)
+        for posicion, (monitor_id, username, nombre) in enumerate(filas):
+            texto = texto_busqueda(nombre, username)
+            trigramas_monitor = trigramas(texto)
+            self.monitores.append((monitor_id, username, nombre, texto))
+            self.cantidad_trigramas.append(len(trigramas_monitor))
+            for trigrama in trigramas_monitor:
+                self.posiciones[trigrama].append(posicion)
+
+    def buscar(self, consulta, limite=LIMITE_RESULTADOS):
+        consulta = normalizar_texto(consulta)
+        trigramas_consulta = trigramas(consulta)
+        if not consulta or not trigramas_consulta:
+            return []
+
+        comunes = Counter()
+        for trigrama in trigramas_consulta:
+            comunes.update(self.posiciones.get(trigrama, ()))
+        minimo = UMBRAL_SIMILITUD * len(trigramas_consulta)
+        candidatos = {posicion for posicion, cantidad in comunes.items() if cantidad >= minimo}
+        candidatos.update(
+            posicion for posicion, monitor in enumerate(self.monitores) if consulta in monitor[3]
+        )
+
+        encontrados = []
+        for posicion in candidatos:
+            monitor_id, username, nombre, texto = self.monitores[posicion]
+            cantidad = comunes.get(posicion, 0)
+            # Fracción de la consulta presente en el texto (word_similarity) y similitud del texto completo
+            parcial = cantidad / len(trigramas_consulta)
+            total = cantidad / (len(trigramas_consulta) + self.cantidad_trigramas[posicion] - cantidad)
+            encontrados.append((_nivel(texto, consulta), -parcial, -total, nombre, monitor_id, username))
+        encontrados.sort()
+        return [
+            {'id': monitor_id, 'username': username, 'nombre': nombre}
+            for _, _, _, nombre, monitor_id, username in encontrados[:limite]
+        ]
+
+
+_lock = threading.Lock()
+_estado = {
+    'indice': None,
+    'construido_en': 0.0
+}
+
+
+def _intervalo_reconstruccion():
+    return getattr(settings, 'BUSQUEDA_MONITORES_SEGUNDOS', 30)
+
+
+def obtener_indice_monitores():
+    """Índice en memoria, reconstruido si se invalidó o si venció el intervalo."""
+    ahora = time.monotonic()
+    indice = _estado['indice']
+    if indice is not None and ahora - _estado['construido_en'] < _intervalo_reconstruccion():
+        return indice
+
+    from .models import UsuarioPersonalizado
+
+    with _lock:
+        if _estado['indice'] is None or ahora - _estado['construido_en'] >= _intervalo_reconstruccion():
+            _estado['indice'] = IndiceMonitores(
+                UsuarioPersonalizado.objects.filter(tipo_usuario='MONITOR').values_list('id', 'username', 'nombre')
+            )
+            _estado['construido_en'] = time.monotonic()
+        return _estado['indice']
+
+
+def invalidar_indice_monitores():
+    """Descarta el índice en memoria; se llama al guardar o borrar usuarios."""
+    with _lock:
+        _estado['indice'] = None
+        _estado['construido_en'] = 0.0
+
+
+def _escapar_like(texto):
+    return texto.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _buscar_postgresql(consulta, limite):
+    from .models import UsuarioPersonalizado
+
+    tabla = connection.ops.quote_name(UsuarioPersonalizado._meta.db_table)
+    patron = _escapar_like(consulta)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT id, username, nombre FROM {tabla} "
+            "WHERE tipo_usuario = 'MONITOR' AND (busqueda LIKE %s OR %s <%% busqueda) "
+            "ORDER BY CASE WHEN busqueda LIKE %s OR busqueda LIKE %s THEN 0 "
+            "WHEN busqueda LIKE %s THEN 1 ELSE 2 END, "
+            "word_similarity(%s, busqueda) DESC, similarity(%s, busqueda) DESC, nombre "
+            "LIMIT %s",
+            [f'%{patron}%', consulta, f'{patron}%', f'% {patron}%', f'%{patron}%', consulta, consulta, limite]
+        )
+        return [
+            {'id': monitor_id, 'username': username, 'nombre': nombre}
+            for monitor_id, username, nombre in cursor.fetchall()
+        ]
+
+
+def buscar_monitores(consulta, limite=LIMITE_RESULTADOS):
+    """Monitores que coinciden con la consulta, ordenados por relevancia."""
+    consulta = normalizar_texto(consulta)
+    if not consulta:
+        return []
+    if connection.vendor == 'postgresql':
+        return _buscar_postgresql(consulta, limite)
+    return obtener_indice_monitores().buscar(consulta, limite)
@@ -0,0 +1,142 @@
+"""
+Caché de las respuestas de los reportes de directivos y de finanzas, con
+invalidación por generaciones.
+
+Cada modelo de origen tiene un contador de versión (GeneracionModelo) que se
+incrementa al confirmar cualquier transacción que lo modifique:
+
+- post_save / post_delete de UsuarioPersonalizado, HorarioFijo, Asistencia,
+  AjusteHoras y ConfiguracionSistema
+- invalidar_reportes() en las escrituras masivas que no emiten señales
+  (bulk_create, COPY, el recálculo de ResumenHorasDiario)
+
+La clave de una respuesta incluye la vista, sus argumentos, los parámetros de la
+petición, la fecha de hoy y las generaciones de los modelos de los que depende:
+tras una escritura la clave cambia y el reporte se vuelve a calcular; las
+entradas viejas simplemente vencen. Las generaciones se leen de la base de datos
+(una consulta por petición), así que el resultado es correcto con cualquier
+backend de caché y con varios procesos; el backend (alias 'reportes' en CACHES)
+solo decide dónde se guardan las respuestas.
+"""
+import functools
+import hashlib
+from datetime import date
+
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from rest_framework.response import Response
+
+from .configuracion import invalidar_configuraciones
+from .models import (
+    UsuarioPersonalizado, HorarioFijo, Asistencia, AjusteHoras, ConfiguracionSistema, GeneracionModelo
+)
+
+ALIAS_CACHE = 'reportes'
+MODELOS_CON_SENALES = (UsuarioPersonalizado, HorarioFijo, Asistencia, AjusteHoras, ConfiguracionSistema)
+
+
+def _etiqueta(modelo):
+    return modelo._meta.label_lower
+
+
+def generaciones(modelos):
+    """Generación actual de cada modelo (0 si nunca se modificó), en una sola consulta."""
+    etiquetas = [_etiqueta(modelo) for modelo in modelos]
+    actuales = dict(GeneracionModelo.objects.filter(modelo__in=etiquetas).values_list('modelo', 'generacion'))
+    return tuple(actuales.get(etiqueta, 0) for etiqueta in etiquetas)
+
+
+def _incrementar(etiquetas):
+    filas = GeneracionModelo.objects.filter(modelo__in=etiquetas)
+    if filas.update(generacion=F('generacion') + 1) < len(etiquetas):
+        # Primera escritura de algún modelo: crear su contador (otro proceso puede
+        # crearlo a la vez) e incrementarlo
+        existentes = set(filas.values_list('modelo', flat=True))
+        faltantes = [etiqueta for etiqueta in etiquetas if etiqueta not in existentes]
+        GeneracionModelo.objects.bulk_create(
+            [GeneracionModelo(modelo=etiqueta) for etiqueta in faltantes], ignore_conflicts=True
+        )
+        GeneracionModelo.objects.filter(modelo__in=faltantes).update(generacion=F('generacion') + 1)
+
+
+class _Incremento:
+    """Callback de on_commit que incrementa, una sola vez, las generaciones acumuladas."""
+
+    def __init__(self, etiquetas):
+        self.etiquetas = set(etiquetas)
+
+    def __call__(self):
+        _incrementar(sorted(self.etiquetas))
+
+
+def invalidar_reportes(*modelos):
+    """
+    Incrementa la generación de los modelos al confirmar la transacción actual (de
+    inmediato fuera de una transacción). Incrementar antes de confirmar permitiría
+    que otro proceso guardara datos viejos con la generación nueva.
+    """
+    etiquetas = {_etiqueta(modelo) for modelo in modelos}
+    conexion = transaction.get_connection()
+    if not conexion.in_atomic_block:
+        _incrementar(sorted(etiquetas))
+        return
+    # Un solo incremento por transacción aunque se guarden o borren miles de filas
+    # (p. ej. un borrado en cascada emite post_delete por cada fila)
+    for entrada in conexion.run_on_commit:
+        if isinstance(entrada[1], _Incremento):
+            entrada[1].etiquetas |= etiquetas
+            return
+    transaction.on_commit(_Incremento(etiquetas))
+
+
+def _al_escribir(sender, **kwargs):
+    invalidar_reportes(sender)
+
+
+for _modelo in MODELOS_CON_SENALES:
+    post_save.connect(_al_escribir, sender=_modelo, dispatch_uid=f'cache_reportes_save_{_etiqueta(_modelo)}')
+    post_delete.connect(_al_escribir, sender=_modelo, dispatch_uid=f'cache_reportes_delete_{_etiqueta(_modelo)}')
+
+
+def clave_reporte(nombre_vista, argumentos, parametros, modelos):
+    """Clave de caché de la respuesta: vista, argumentos, parámetros, hoy y generaciones."""
+    partes = (
+        sorted(argumentos.items()),
+        sorted((clave, tuple(valores)) for clave, valores in parametros.lists()),
+        date.today().isoformat(),
+        generaciones(modelos),
+    )
+    return f'reporte:{nombre_vista}:' + hashlib.sha1(repr(partes).encode('utf-8')).hexdigest()
+
+
+def reporte_cacheado(*modelos):
+    """
+    Decorador para vistas GET de reportes cuya respuesta depende solo de los
+    modelos indicados, la URL y los parámetros (no del directivo que consulta).
+    Va debajo de @permission_classes. Solo se guardan las respuestas 200.
+    """
+    def decorador(vista):
+        @functools.wraps(vista)
+        def envoltura(request, *args, **kwargs):
+            if request.method != 'GET':
+                return vista(request, *args, **kwargs)
+
+            cache = caches[ALIAS_CACHE]
+            clave = clave_reporte(vista.__name__, kwargs, request.query_params, modelos)
+            datos = cache.get(clave)
+            if datos is not None:
+                return Response(datos)
+
+            if ConfiguracionSistema in modelos:
+                # La caché de configuraciones del proceso puede tardar unos segundos en ver
+                # un cambio hecho en otro proceso; el resultado guardado no debe quedarse
+                # con los valores anteriores
+                invalidar_configuraciones()
+            respuesta = vista(request, *args, **kwargs)
+            if respuesta.status_code == 200 and isinstance(respuesta, Response):
+                cache.set(clave, respuesta.data)
+            return respuesta
+        return envoltura
+    return decorador
@@ -0,0 +1,90 @@
+"""
+Consultas independientes de los reportes ejecutadas en paralelo.
+
+Los reportes de directivos y de finanzas hacen varias consultas que no dependen
+entre sí (agregados de asistencias, agregados de ajustes, detalle, monitores,
+horarios). en_paralelo() las ejecuta a la vez, cada una en un hilo de un pool del
+proceso con su propia conexión a la base de datos, de modo que la vista tarda
+aproximadamente lo que la consulta más lenta y no la suma de todas.
+
+Funciona igual con el servidor WSGI (api/wsgi.py) y con el ASGI (api/asgi.py):
+en Django 4.1 las vistas de DRF son síncronas y el ORM asíncrono ejecuta todas las
+consultas de una petición en un mismo hilo, una tras otra, así que lo que permite
+solaparlas son las conexiones separadas.
+
+Cada tarea corre con una copia del contexto de la petición (los ContextVar, p. ej.
+la lectura en réplica) y con los execute_wrapper de sus conexiones (las métricas de
+consultas por vista), y al terminar libera la conexión del hilo si está vencida o
+tuvo errores, como hace Django al final de cada petición. Se ejecuta en serie:
+
+- si CONSULTAS_CONCURRENTES es 0
+- dentro de una transacción: los otros hilos no verían sus cambios sin confirmar
+- dentro de otra tarea de en_paralelo, para no esperar al mismo pool
+"""
+import contextlib
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, connections
+
+_lock = threading.Lock()
+_estado = {'pid': None, 'ejecutor': None}
+_hilo = threading.local()
+
+
+def _ejecutor():
+    pid = os.getpid()  # tras un fork los hilos del pool no existen en el proceso hijo
+    if _estado['pid'] != pid:
+        with _lock:
+            if _estado['pid'] != pid:
+                _estado['ejecutor'] = ThreadPoolExecutor(
+                    max_workers=settings.CONSULTAS_CONCURRENTES, thread_name_prefix='consultas'
+                )
+                _estado['pid'] = pid
+    return _estado['ejecutor']
+
+
+def _en_serie():
+    if settings.CONSULTAS_CONCURRENTES < 1 or getattr(_hilo, 'en_tarea', False):
+        return True
+    return any(conexion.in_atomic_block for conexion in connections.all())
+
+
+def _envolturas():
+    """execute_wrapper activos en las conexiones del hilo actual, por alias."""
+    return {
+        conexion.alias: list(conexion.execute_wrappers)
+        for conexion in connections.all() if conexion.execute_wrappers
+    }
+
+
+def _tarea(funcion, envolturas):
+    _hilo.en_tarea = True
+    try:
+        with contextlib.ExitStack() as pila:
+            for alias, lista in envolturas.items():
+                for envoltura in lista:
+                    pila.enter_context(connections[alias].execute_wrapper(envoltura))
+            return funcion()
+    finally:
+        _hilo.en_tarea = False
+        close_old_connections()
+
+
+def en_paralelo(*funciones):
+    """
+    Ejecuta las funciones (sin argumentos) a la vez y retorna sus resultados en el
+    mismo orden. Si alguna falla, se propaga su excepción.
+    """
+    if len(funciones) < 2 or _en_serie():
+        return [funcion() for funcion in funciones]
+    ejecutor = _ejecutor()
+    envolturas = _envolturas()
+    futuros = [
+        ejecutor.submit(contextvars.copy_context().run, _tarea, funcion, envolturas)
+        for funcion in funciones
+    ]
+    return [futuro.result() for futuro in futuros]
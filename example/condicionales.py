@@ -0,0 +1,120 @@
+"""
+GET condicional (ETag / If-None-Match) para reportes y listados que se consultan
+periódicamente.
+
+El ETag de una respuesta se calcula antes de ejecutar la vista a partir de:
+
+- la marca de versión de cada tabla de origen: (última modificación, número de
+  filas), igual que la caché de configuraciones; contar las filas detecta los
+  borrados, que no cambian la última modificación
+- la vista, sus argumentos de URL y los parámetros de la petición
+- el usuario autenticado y la fecha de hoy (varios reportes usan la fecha actual
+  como valor por defecto)
+
+Las marcas de todas las tablas se leen en una sola consulta. Si el If-None-Match
+del cliente coincide, se responde 304 sin ejecutar la vista. Como la marca se lee
+antes que los datos, una escritura concurrente solo puede hacer que el ETag sea
+más viejo que la respuesta (el cliente volverá a descargarla), nunca al revés.
+
+Los usuarios no tienen fecha de modificación: en su lugar se usa el contador de
+generación de la caché de reportes (GeneracionModelo), que se incrementa con
+cualquier alta, cambio (nombre, tipo_usuario, is_active) o baja. Se lee en la
+misma consulta, de la misma base de datos que los datos.
+"""
+import functools
+import hashlib
+from datetime import date
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags, quote_etag
+
+from .models import UsuarioPersonalizado, GeneracionModelo
+from .replicas import alias_lectura
+
+# Modelos sin updated_at: su marca es la generación de GeneracionModelo (ver cache_reportes.py)
+MODELOS_POR_GENERACION = (UsuarioPersonalizado,)
+
+
+def marcas_de_version(modelos):
+    """
+    (última modificación o generación, número de filas) de cada modelo, en una sola
+    consulta a la base de datos de la que lee la petición (la réplica en los
+    reportes), para que el ETag corresponda a los datos de la respuesta.
+    """
+    connection = connections[alias_lectura()]
+    qn = connection.ops.quote_name
+    columnas = []
+    parametros = []
+    for modelo in modelos:
+        tabla = qn(modelo._meta.db_table)
+        if modelo in MODELOS_POR_GENERACION:
+            columnas.append(
+                f'(SELECT {qn("generacion")} FROM {qn(GeneracionModelo._meta.db_table)} '
+                f'WHERE {qn("modelo")} = %s)'
+            )
+            parametros.append(modelo._meta.label_lower)
+        else:
+            columnas.append(f'(SELECT MAX({qn("updated_at")}) FROM {tabla})')
+        columnas.append(f'(SELECT COUNT(*) FROM {tabla})')
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT ' + ', '.join(columnas), parametros)
+        return cursor.fetchone()
+
+
+def calcular_etag(request, nombre_vista, modelos, argumentos):
+    """ETag (entre comillas) de la respuesta de la vista para esta petición."""
+    parametros = sorted((clave, tuple(valores)) for clave, valores in request.query_params.lists())
+    partes = (
+        nombre_vista,
+        sorted(argumentos.items()),
+        parametros,
+        getattr(request.user, 'id', None),
+        date.today().isoformat(),
+        marcas_de_version(modelos),
+    )
+    return quote_etag(hashlib.sha1(repr(partes).encode('utf-8')).hexdigest())
+
+
+def _etag_coincide(if_none_match, etag):
+    """Comparación débil de If-None-Match (ignora el prefijo W/ que agregan algunos proxies)."""
+    if not if_none_match:
+        return False
+    etiquetas = parse_etags(if_none_match)
+    if '*' in etiquetas:
+        return True
+    return any(etiqueta.removeprefix('W/') == etag for etiqueta in etiquetas)
+
+
+def _marcar_revalidacion(respuesta, etag):
+    respuesta['ETag'] = etag
+    # Respuestas por usuario: solo la caché del cliente, y siempre revalidando
+    patch_cache_control(respuesta, private=True, no_cache=True)
+
+
+def respuesta_condicional(*modelos):
+    """
+    Decorador para vistas GET cuya respuesta depende solo de los modelos indicados
+    (además de la URL, los parámetros y el usuario). Va debajo de @permission_classes,
+    de modo que la autenticación y los permisos se verifican antes del 304.
+    """
+    def decorador(vista):
+        @functools.wraps(vista)
+        def envoltura(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD') or not settings.RESPUESTAS_CONDICIONALES:
+                return vista(request, *args, **kwargs)
+
+            etag = calcular_etag(request, vista.__name__, modelos, kwargs)
+            if _etag_coincide(request.META.get('HTTP_IF_NONE_MATCH'), etag):
+                respuesta = HttpResponseNotModified()
+                _marcar_revalidacion(respuesta, etag)
+                return respuesta
+
+            respuesta = vista(request, *args, **kwargs)
+            if respuesta.status_code == 200:
+                _marcar_revalidacion(respuesta, etag)
+            return respuesta
+        return envoltura
+    return decorador
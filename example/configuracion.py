@@ -0,0 +1,68 @@
+"""
+Caché local del proceso para ConfiguracionSistema.
+
+Todas las configuraciones se cargan de una vez, ya convertidas con
+get_valor_tipado, de modo que leer una configuración cuesta un acceso a un
+diccionario. La caché se invalida al escribir desde este proceso; los demás
+procesos detectan el cambio comparando una marca de versión (última
+modificación y número de filas), verificada como máximo cada
+CONFIGURACION_CACHE_SEGUNDOS.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.db.models import Count, Max
+
+from .models import ConfiguracionSistema
+
+_lock = threading.Lock()
+_estado = {
+    'valores': None,
+    'version': None,
+    'verificado_en': 0.0
+}
+
+
+def _version_actual():
+    """Marca de versión de la tabla: (última modificación, número de filas)."""
+    marca = ConfiguracionSistema.objects.aggregate(ultima=Max('updated_at'), total=Count('id'))
+    return (marca['ultima'], marca['total'])
+
+
+def _intervalo_verificacion():
+    return getattr(settings, 'CONFIGURACION_CACHE_SEGUNDOS', 5)
+
+
+def obtener_configuraciones():
+    """Diccionario clave -> valor tipado de todas las configuraciones."""
+    ahora = time.monotonic()
+    if _estado['valores'] is not None and ahora - _estado['verificado_en'] < _intervalo_verificacion():
+        return _estado['valores']
+
+    with _lock:
+        if _estado['valores'] is not None and ahora - _estado['verificado_en'] < _intervalo_verificacion():
+            return _estado['valores']
+
+        version = _version_actual()
+        if _estado['valores'] is None or version != _estado['version']:
+            _estado['valores'] = {
+                config.clave: config.get_valor_tipado()
+                for config in ConfiguracionSistema.objects.all()
+            }
+            _estado['version'] = version
+        _estado['verificado_en'] = time.monotonic()
+        return _estado['valores']
+
+
+def obtener_configuracion_cacheada(clave, valor_por_defecto=None):
+    """Valor tipado de una configuración, o el valor por defecto si no existe."""
+    return obtener_configuraciones().get(clave, valor_por_defecto)
+
+
+def invalidar_configuraciones():
+    """Descarta la caché; la siguiente lectura recarga desde la base de datos."""
+    with _lock:
+        _estado['valores'] = None
+        _estado['version'] = None
+        _estado['verificado_en'] = 0.0
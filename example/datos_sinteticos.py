@@ -0,0 +1,121 @@
+"""
+Datos sintéticos reproducibles para medir consultas y endpoints.
+
+Crea monitores con horarios fijos variados, un período de asistencias en estados
+mezclados y ajustes de horas, todo con bulk_create. Los usuarios creados usan el
+prefijo PREFIJO_USERNAME para poder borrarlos sin tocar datos reales.
+"""
+import random
+from datetime import date, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from .models import UsuarioPersonalizado, HorarioFijo, Asistencia, AjusteHoras
+from .busqueda import texto_busqueda, invalidar_indice_monitores
+from .resumenes import reconstruir_resumen_diario
+from .cache_reportes import invalidar_reportes
+
+PREFIJO_USERNAME = 'bench_'
+PASSWORD_SINTETICA = 'bench1234'
+MONITORES_POR_ESCALA = 100
+TAMANO_LOTE = 5000
+
+NOMBRES = ['Ana', 'Andrés', 'Camila', 'Carlos', 'Daniela', 'David', 'Sofía', 'Santiago',
+           'Valentina', 'Juan', 'María', 'José', 'Laura', 'Julián', 'Natalia', 'Óscar']
+APELLIDOS = ['Gómez', 'Rodríguez', 'Martínez', 'López', 'García', 'Pérez', 'Muñoz',
+             'Sánchez', 'Ramírez', 'Torres', 'Díaz', 'Vargas', 'Castro', 'Peña']
+
+
+def borrar_datos():
+    """Elimina los usuarios sintéticos y, en cascada, sus horarios, asistencias y ajustes."""
+    borrados = UsuarioPersonalizado.objects.filter(username__startswith=PREFIJO_USERNAME).delete()[0]
+    invalidar_indice_monitores()
+    return borrados
+
+
+def sembrar_datos(monitores=100, semanas=16, fecha_inicio=None, semilla=0):
+    """
+    Crea `monitores` monitores (2 a 6 jornadas semanales cada uno), sus asistencias
+    de `semanas` semanas desde fecha_inicio (por defecto, el lunes de hace `semanas`
+    semanas) y algunos ajustes. Retorna un diccionario con los conteos creados.
+    """
+    aleatorio = random.Random(semilla)
+    if fecha_inicio is None:
+        hoy = date.today()
+        fecha_inicio = hoy - timedelta(days=hoy.weekday(), weeks=semanas)
+    password = make_password(PASSWORD_SINTETICA)
+
+    with transaction.atomic():
+        directivo, _ = UsuarioPersonalizado.objects.get_or_create(
+            username=f'{PREFIJO_USERNAME}directivo',
+            defaults={'nombre': 'Directivo Benchmark', 'password': password, 'tipo_usuario': 'DIRECTIVO'}
+        )
+
+        inicio_indice = UsuarioPersonalizado.objects.filter(
+            username__startswith=f'{PREFIJO_USERNAME}monitor'
+        ).count()
+        nuevos = []
+        for indice in range(inicio_indice, inicio_indice + monitores):
+            username = f'{PREFIJO_USERNAME}monitor{indice}'
+            nombre = f'{aleatorio.choice(NOMBRES)} {aleatorio.choice(APELLIDOS)} {indice}'
+            nuevos.append(UsuarioPersonalizado(
+                username=username, nombre=nombre, password=password, tipo_usuario='MONITOR',
+                busqueda=texto_busqueda(nombre, username)
+            ))
+        # bulk_create no llama a save(): busqueda se calcula arriba y el índice se invalida aquí
+        UsuarioPersonalizado.objects.bulk_create(nuevos, batch_size=TAMANO_LOTE)
+        invalidar_indice_monitores()
+        # bulk_create no retorna ids en todos los motores
+        monitores_qs = UsuarioPersonalizado.objects.filter(
+            username__in=[monitor.username for monitor in nuevos]
+        ).order_by('id')
+        monitor_ids = list(monitores_qs.values_list('id', flat=True))
+
+        horarios = []
+        for monitor_id in monitor_ids:
+            bloques = aleatorio.sample([(dia, jornada) for dia in range(6) for jornada in 'MT'], aleatorio.randint(2, 6))
+            for dia, jornada in bloques:
+                horarios.append(HorarioFijo(
+                    usuario_id=monitor_id, dia_semana=dia, jornada=jornada, sede=aleatorio.choice(['SA', 'BA'])
+                ))
+        HorarioFijo.objects.bulk_create(horarios, batch_size=TAMANO_LOTE)
+
+        # Orden cronológico, como llegan las asistencias reales (afecta la disposición física)
+        asistencias = []
+        ajustes = []
+        hoy = date.today()
+        horarios_creados = list(HorarioFijo.objects.filter(
+            usuario_id__in=monitor_ids
+        ).order_by('dia_semana', 'id').values_list('id', 'usuario_id', 'dia_semana'))
+        for semana in range(semanas):
+            for horario_id, usuario_id, dia_semana in horarios_creados:
+                fecha = fecha_inicio + timedelta(weeks=semana, days=dia_semana)
+                if fecha > hoy:
+                    continue
+                estado = aleatorio.choices(['autorizado', 'pendiente', 'rechazado'], [70, 20, 10])[0]
+                presente = estado == 'autorizado' and aleatorio.random() < 0.85
+                asistencias.append(Asistencia(
+                    usuario_id=usuario_id, fecha=fecha, horario_id=horario_id, presente=presente,
+                    estado_autorizacion=estado, horas=4.00 if presente else 0.00
+                ))
+                if aleatorio.random() < 0.03:
+                    ajustes.append(AjusteHoras(
+                        usuario_id=usuario_id, fecha=fecha, creado_por=directivo,
+                        cantidad_horas=aleatorio.choice([-2, -1, 1, 2, 4]), motivo='Ajuste sintético'
+                    ))
+        Asistencia.objects.bulk_create(asistencias, batch_size=TAMANO_LOTE)
+        AjusteHoras.objects.bulk_create(ajustes, batch_size=TAMANO_LOTE)
+        # bulk_create no emite post_save
+        invalidar_reportes(UsuarioPersonalizado, HorarioFijo, Asistencia, AjusteHoras)
+
+    reconstruir_resumen_diario(usuario_ids=monitor_ids)
+
+    return {
+        'monitores': len(monitor_ids),
+        'horarios': len(horarios),
+        'asistencias': len(asistencias),
+        'ajustes': len(ajustes),
+        'fecha_inicio': fecha_inicio,
+        'fecha_fin': fecha_inicio + timedelta(weeks=semanas, days=-1)
+    }
@@ -0,0 +1,407 @@
+"""
+Flujo de cambios de asistencias y ajustes para los directivos (Server-Sent Events).
+
+En lugar de repetir cada pocos segundos el listado completo de asistencias, la
+página de directivos se suscribe a /directivo/asistencias/eventos/ y recibe un
+evento compacto por cada cambio:
+
+- asistencia_creada, asistencia_marcada, asistencia_autorizada, asistencia_rechazada:
+  el tipo sale del estado de la fila (pendiente sin marcar, marcada, autorizada,
+  rechazada), con id, usuario_id, fecha, horario_id, presente, estado_autorizacion
+  y horas
+- ajuste_creado: id, usuario_id, fecha, cantidad_horas y asistencia_id
+- asistencias_generadas: total, fecha_inicio y fecha_fin de una generación masiva
+- recargar: se perdieron eventos (reconexión tardía, otro proceso o un lote
+  demasiado grande); el cliente debe volver a pedir el listado
+
+Los eventos se publican en un difusor del proceso (un buffer circular con número
+de secuencia) al confirmar la transacción, uno por fila aunque se guarde varias
+veces. Con varios procesos, EVENTOS_SONDEO_SEGUNDOS > 0 cambia la fuente: un hilo
+por proceso lee las filas con updated_at posterior a la última marca (con un
+margen para las transacciones que confirman tarde) y las publica en el difusor
+local, de modo que cada proceso ve los cambios de todos.
+
+Con WSGI cada conexión ocupa un hilo del servidor hasta EVENTOS_DURACION_SEGUNDOS;
+el cliente se reconecta con Last-Event-ID y recibe lo que se perdió. Con ASGI
+(api/asgi.py, con_flujo_de_eventos) la vista solo autentica y arma los
+encabezados, y los eventos se envían desde el event loop sin ocupar hilos.
+"""
+import asyncio
+import json
+import os
+import secrets
+import threading
+import time
+from collections import deque
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models.signals import post_save
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Asistencia, AjusteHoras
+
+CAPACIDAD_BUFFER = 1000
+MAXIMO_EVENTOS_SONDEO = 200
+MARGEN_SONDEO = timedelta(seconds=5)
+RECONEXION_MS = 3000
+CABECERA_FLUJO = 'X-Flujo-Eventos'
+CLAVE_SCOPE = 'example.flujo_eventos'
+
+TIPOS_ASISTENCIA = {
+    'autorizado': 'asistencia_autorizada',
+    'rechazado': 'asistencia_rechazada',
+}
+
+_lock = threading.Lock()
+_estado = {'pid': None, 'difusor': None}
+
+
+def evento_asistencia(asistencia_id, usuario_id, fecha, horario_id, presente, estado_autorizacion, horas):
+    tipo = TIPOS_ASISTENCIA.get(estado_autorizacion)
+    if tipo is None:
+        tipo = 'asistencia_marcada' if presente else 'asistencia_creada'
+    return {
+        'tipo': tipo,
+        'id': asistencia_id,
+        'usuario_id': usuario_id,
+        'fecha': fecha.isoformat(),
+        'horario_id': horario_id,
+        'presente': presente,
+        'estado_autorizacion': estado_autorizacion,
+        'horas': f'{float(horas):.2f}'
+    }
+
+
+def evento_ajuste(ajuste_id, usuario_id, fecha, cantidad_horas, asistencia_id):
+    return {
+        'tipo': 'ajuste_creado',
+        'id': ajuste_id,
+        'usuario_id': usuario_id,
+        'fecha': fecha.isoformat(),
+        'cantidad_horas': f'{float(cantidad_horas):.2f}',
+        'asistencia_id': asistencia_id
+    }
+
+
+class Difusor:
+    """
+    Últimos eventos del proceso con su número de secuencia. Los identificadores
+    enviados al cliente llevan una marca de la instancia: un Last-Event-ID de otro
+    proceso (o de antes de reiniciar) se responde con 'recargar'.
+    """
+
+    def __init__(self, capacidad=CAPACIDAD_BUFFER):
+        self.instancia = secrets.token_hex(4)
+        self.ultimo = 0
+        self._eventos = deque(maxlen=capacidad)
+        self._condicion = threading.Condition()
+        self._esperas = set()  # (loop, asyncio.Event) de las conexiones ASGI
+
+    def publicar(self, *eventos):
+        with self._condicion:
+            for evento in eventos:
+                self.ultimo += 1
+                self._eventos.append((self.ultimo, evento))
+            self._condicion.notify_all()
+            esperas = list(self._esperas)
+        for loop, senal in esperas:
+            try:
+                loop.call_soon_threadsafe(senal.set)
+            except RuntimeError:
+                pass  # loop ya cerrado
+
+    def identificador(self, numero):
+        return f'{self.instancia}-{numero}'
+
+    def reanudar(self, ultimo_id):
+        """
+        (número, eventos pendientes) para una conexión nueva. Sin Last-Event-ID empieza
+        desde ahora; con uno de este proceso, desde ese evento.
+        """
+        if not ultimo_id:
+            return self.ultimo, []
+        instancia, _, numero = ultimo_id.rpartition('-')
+        if instancia != self.instancia or not numero.isdigit():
+            return self.ultimo, [(self.ultimo, {'tipo': 'recargar'})]
+        return self.posteriores(int(numero))
+
+    def posteriores(self, numero):
+        """(último número, eventos con número mayor al indicado)."""
+        with self._condicion:
+            ultimo = self.ultimo
+            if numero >= ultimo:
+                return ultimo, []
+            if not self._eventos or numero < self._eventos[0][0] - 1:
+                # Los eventos siguientes ya salieron del buffer
+                return ultimo, [(ultimo, {'tipo': 'recargar'})]
+            return ultimo, [(n, evento) for n, evento in self._eventos if n > numero]
+
+    def esperar(self, numero, segundos):
+        """Bloquea hasta que haya eventos posteriores a numero o pasen los segundos."""
+        with self._condicion:
+            self._condicion.wait_for(lambda: self.ultimo > numero, segundos)
+
+    async def esperar_async(self, numero, segundos, desconexion):
+        """Como esperar, sin bloquear el event loop; termina antes si el cliente se desconecta."""
+        senal = asyncio.Event()
+        espera = (asyncio.get_running_loop(), senal)
+        with self._condicion:
+            if self.ultimo > numero:
+                return
+            self._esperas.add(espera)
+        tarea = asyncio.ensure_future(senal.wait())
+        try:
+            await asyncio.wait({tarea, desconexion}, timeout=segundos, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            tarea.cancel()
+            with self._condicion:
+                self._esperas.discard(espera)
+
+
+def obtener_difusor():
+    pid = os.getpid()  # tras un fork el proceso hijo arma su propio difusor (y su hilo de sondeo)
+    if _estado['pid'] != pid:
+        with _lock:
+            if _estado['pid'] != pid:
+                _estado['difusor'] = Difusor()
+                _estado['pid'] = pid
+                if settings.EVENTOS_SONDEO_SEGUNDOS > 0:
+                    threading.Thread(
+                        target=_sondear, args=(_estado['difusor'],), name='eventos-sondeo', daemon=True
+                    ).start()
+    return _estado['difusor']
+
+
+# Publicación al confirmar (un solo proceso)
+
+class _Publicacion:
+    """Callback de on_commit con el último evento de cada fila escrita en la transacción."""
+
+    def __init__(self):
+        self.eventos = {}
+
+    def __call__(self):
+        obtener_difusor().publicar(*self.eventos.values())
+
+
+def publicar_al_confirmar(clave, evento):
+    """
+    Publica el evento al confirmar la transacción actual (de inmediato fuera de una
+    transacción). Con sondeo no hace nada: los eventos salen de la base de datos.
+    """
+    if settings.EVENTOS_SONDEO_SEGUNDOS > 0:
+        return
+    conexion = transaction.get_connection()
+    if not conexion.in_atomic_block:
+        obtener_difusor().publicar(evento)
+        return
+    for entrada in conexion.run_on_commit:
+        if isinstance(entrada[1], _Publicacion):
+            entrada[1].eventos[clave] = evento
+            return
+    publicacion = _Publicacion()
+    publicacion.eventos[clave] = evento
+    transaction.on_commit(publicacion)
+
+
+def publicar_generacion(total, fecha_inicio, fecha_fin):
+    """Evento de una generación masiva de asistencias (bulk_create/COPY, sin señales)."""
+    if total:
+        publicar_al_confirmar(('asistencias_generadas', fecha_inicio, fecha_fin), {
+            'tipo': 'asistencias_generadas',
+            'total': total,
+            'fecha_inicio': fecha_inicio.isoformat(),
+            'fecha_fin': fecha_fin.isoformat()
+        })
+
+
+def publicar_asistencias(filas):
+    """
+    Eventos de asistencias actualizadas en bloque con queryset.update(), que no emite
+    señales. filas: tuplas con los argumentos de evento_asistencia. Un lote mayor que
+    MAXIMO_EVENTOS_SONDEO se publica como un solo aviso de recargar.
+    """
+    if len(filas) > MAXIMO_EVENTOS_SONDEO:
+        publicar_al_confirmar(('recargar',), {'tipo': 'recargar'})
+        return
+    for fila in filas:
+        publicar_al_confirmar(('asistencia', fila[0]), evento_asistencia(*fila))
+
+
+def _al_guardar_asistencia(sender, instance, **kwargs):
+    publicar_al_confirmar(('asistencia', instance.pk), evento_asistencia(
+        instance.pk, instance.usuario_id, instance.fecha, instance.horario_id,
+        instance.presente, instance.estado_autorizacion, instance.horas
+    ))
+
+
+def _al_guardar_ajuste(sender, instance, created, **kwargs):
+    if created:
+        publicar_al_confirmar(('ajuste', instance.pk), evento_ajuste(
+            instance.pk, instance.usuario_id, instance.fecha, instance.cantidad_horas, instance.asistencia_id
+        ))
+
+
+post_save.connect(_al_guardar_asistencia, sender=Asistencia, dispatch_uid='eventos_asistencia')
+post_save.connect(_al_guardar_ajuste, sender=AjusteHoras, dispatch_uid='eventos_ajuste')
+
+
+# Sondeo de la base de datos (varios procesos)
+
+def _filas_nuevas(desde):
+    asistencias = list(Asistencia.objects.filter(updated_at__gt=desde).order_by('updated_at').values_list(
+        'updated_at', 'id', 'usuario_id', 'fecha', 'horario_id', 'presente', 'estado_autorizacion', 'horas'
+    )[:MAXIMO_EVENTOS_SONDEO + 1])
+    ajustes = list(AjusteHoras.objects.filter(created_at__gt=desde).order_by('created_at').values_list(
+        'created_at', 'id', 'usuario_id', 'fecha', 'cantidad_horas', 'asistencia_id'
+    )[:MAXIMO_EVENTOS_SONDEO + 1])
+    return asistencias, ajustes
+
+
+def sondear_una_vez(difusor, marca, vistos):
+    """
+    Publica las filas modificadas después de marca - MARGEN_SONDEO que no se hayan
+    publicado ya (vistos: (tabla, id, marca de la fila) -> marca). Retorna la nueva marca.
+    """
+    asistencias, ajustes = _filas_nuevas(marca - MARGEN_SONDEO)
+    if len(asistencias) > MAXIMO_EVENTOS_SONDEO or len(ajustes) > MAXIMO_EVENTOS_SONDEO:
+        # Un lote grande (p. ej. una generación masiva): un solo aviso y se salta
+        vistos.clear()
+        difusor.publicar({'tipo': 'recargar'})
+        return timezone.now()
+
+    eventos = []
+    for fila in asistencias:
+        clave = ('asistencia', fila[1], fila[0])
+        if clave not in vistos:
+            vistos[clave] = fila[0]
+            eventos.append((fila[0], evento_asistencia(*fila[1:])))
+    for fila in ajustes:
+        clave = ('ajuste', fila[1], fila[0])
+        if clave not in vistos:
+            vistos[clave] = fila[0]
+            eventos.append((fila[0], evento_ajuste(*fila[1:])))
+    if eventos:
+        eventos.sort(key=lambda par: par[0])
+        difusor.publicar(*(evento for _, evento in eventos))
+        marca = max(marca, eventos[-1][0])
+
+    for clave, marca_fila in list(vistos.items()):
+        if marca_fila <= marca - MARGEN_SONDEO:
+            del vistos[clave]
+    return marca
+
+
+def _sondear(difusor):
+    marca = timezone.now()
+    vistos = {}
+    while True:
+        time.sleep(settings.EVENTOS_SONDEO_SEGUNDOS)
+        try:
+            marca = sondear_una_vez(difusor, marca, vistos)
+        except Exception:
+            # Base de datos no disponible: se reintenta en el siguiente ciclo
+            pass
+        finally:
+            close_old_connections()
+
+
+# Formato SSE
+
+def _mensaje(identificador, evento):
+    datos = json.dumps(evento, separators=(',', ':'), ensure_ascii=False)
+    return f"id: {identificador}\nevent: {evento['tipo']}\ndata: {datos}\n\n".encode('utf-8')
+
+
+LATIDO = b': latido\n\n'
+INICIO = f'retry: {RECONEXION_MS}\n\n'.encode('ascii')
+
+
+def en_envoltura_asgi(request):
+    """True si la petición llegó por con_flujo_de_eventos (los eventos los envía la envoltura)."""
+    return getattr(request, 'scope', {}).get(CLAVE_SCOPE, False)
+
+
+def flujo_eventos(ultimo_id):
+    """Cuerpo de la respuesta con WSGI: un generador que bloquea el hilo entre eventos."""
+    difusor = obtener_difusor()
+    numero, pendientes = difusor.reanudar(ultimo_id)
+    fin = time.monotonic() + settings.EVENTOS_DURACION_SEGUNDOS
+    yield INICIO
+    while True:
+        for n, evento in pendientes:
+            yield _mensaje(difusor.identificador(n), evento)
+        restante = fin - time.monotonic()
+        if restante <= 0:
+            return
+        difusor.esperar(numero, min(settings.EVENTOS_LATIDO_SEGUNDOS, restante))
+        numero, pendientes = difusor.posteriores(numero)
+        if not pendientes:
+            yield LATIDO
+
+
+async def _transmitir(ultimo_id, receive, send):
+    difusor = obtener_difusor()
+    numero, pendientes = difusor.reanudar(ultimo_id)
+    fin = time.monotonic() + settings.EVENTOS_DURACION_SEGUNDOS
+
+    async def _esperar_desconexion():
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    desconexion = asyncio.ensure_future(_esperar_desconexion())
+    try:
+        await send({'type': 'http.response.body', 'body': INICIO, 'more_body': True})
+        while not desconexion.done():
+            for n, evento in pendientes:
+                await send({'type': 'http.response.body', 'body': _mensaje(difusor.identificador(n), evento),
+                            'more_body': True})
+            restante = fin - time.monotonic()
+            if restante <= 0:
+                break
+            await difusor.esperar_async(numero, min(settings.EVENTOS_LATIDO_SEGUNDOS, restante), desconexion)
+            numero, pendientes = difusor.posteriores(numero)
+            if not pendientes and not desconexion.done():
+                await send({'type': 'http.response.body', 'body': LATIDO, 'more_body': True})
+        if not desconexion.done():
+            await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+    finally:
+        desconexion.cancel()
+
+
+def con_flujo_de_eventos(aplicacion):
+    """
+    Envuelve la aplicación ASGI de Django. Marca el scope de las peticiones al flujo
+    (CLAVE_SCOPE) para que la vista responda solo los encabezados, con CABECERA_FLUJO
+    (autenticación, permisos, CORS y métricas pasan por Django como siempre); esta
+    envoltura quita la marca, descarta el cuerpo vacío y envía los eventos desde el
+    event loop.
+    """
+    async def app(scope, receive, send):
+        if scope['type'] != 'http' or scope['path'] != reverse('directivo_asistencias_eventos'):
+            return await aplicacion(scope, receive, send)
+
+        scope = dict(scope, **{CLAVE_SCOPE: True})
+        flujo = False
+        marca = CABECERA_FLUJO.lower().encode('latin-1')
+
+        async def enviar(mensaje):
+            nonlocal flujo
+            if mensaje['type'] == 'http.response.start':
+                flujo = any(nombre.lower() == marca for nombre, _ in mensaje['headers'])
+                if flujo:
+                    mensaje = dict(mensaje, headers=[
+                        (nombre, valor) for nombre, valor in mensaje['headers'] if nombre.lower() != marca
+                    ])
+            elif flujo:
+                return  # cuerpo vacío de la vista
+            await send(mensaje)
+
+        await aplicacion(scope, receive, enviar)
+        if flujo:
+            ultimo_id = dict(scope['headers']).get(b'last-event-id', b'').decode('latin-1')
+            await _transmitir(ultimo_id, receive, send)
+    return app
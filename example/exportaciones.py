@@ -0,0 +1,102 @@
+"""
+Exportación en streaming (CSV o NDJSON) de asistencias y ajustes de horas.
+
+Las filas se leen con values_list(...).iterator(), que en PostgreSQL usa un
+cursor del lado del servidor, y se escriben a medida que llegan mediante un
+StreamingHttpResponse. La memoria usada no depende del número de filas y el
+encabezado sale antes de ejecutar la consulta.
+"""
+import csv
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.http import StreamingHttpResponse
+
+FORMATOS_EXPORTACION = ('csv', 'ndjson')
+TAMANO_BLOQUE = 2000
+
+# (nombre de columna, campo para values_list)
+COLUMNAS_ASISTENCIAS = [
+    ('id', 'id'),
+    ('fecha', 'fecha'),
+    ('monitor_id', 'usuario_id'),
+    ('monitor_username', 'usuario__username'),
+    ('monitor', 'usuario__nombre'),
+    ('horario_id', 'horario_id'),
+    ('dia_semana', 'horario__dia_semana'),
+    ('jornada', 'horario__jornada'),
+    ('sede', 'horario__sede'),
+    ('presente', 'presente'),
+    ('estado', 'estado_autorizacion'),
+    ('horas', 'horas'),
+    ('created_at', 'created_at'),
+    ('updated_at', 'updated_at'),
+]
+
+COLUMNAS_AJUSTES = [
+    ('id', 'id'),
+    ('fecha', 'fecha'),
+    ('monitor_id', 'usuario_id'),
+    ('monitor_username', 'usuario__username'),
+    ('monitor', 'usuario__nombre'),
+    ('cantidad_horas', 'cantidad_horas'),
+    ('motivo', 'motivo'),
+    ('asistencia_id', 'asistencia_id'),
+    ('creado_por_id', 'creado_por_id'),
+    ('creado_por_username', 'creado_por__username'),
+    ('created_at', 'created_at'),
+    ('updated_at', 'updated_at'),
+]
+
+
+class _Eco:
+    """Objeto tipo archivo que retorna lo escrito, para usar csv.writer sin buffer."""
+
+    def write(self, valor):
+        return valor
+
+
+def _valor_csv(valor):
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    return valor
+
+
+def _valor_json(valor):
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return float(valor)
+    return valor
+
+
+def _filas(queryset, campos):
+    return queryset.values_list(*campos).iterator(chunk_size=TAMANO_BLOQUE)
+
+
+def _generar_csv(queryset, columnas):
+    escritor = csv.writer(_Eco())
+    yield escritor.writerow([nombre for nombre, _ in columnas])
+    for fila in _filas(queryset, [campo for _, campo in columnas]):
+        yield escritor.writerow([_valor_csv(valor) for valor in fila])
+
+
+def _generar_ndjson(queryset, columnas):
+    nombres = [nombre for nombre, _ in columnas]
+    for fila in _filas(queryset, [campo for _, campo in columnas]):
+        yield json.dumps(dict(zip(nombres, map(_valor_json, fila))), ensure_ascii=False) + '\n'
+
+
+def respuesta_exportacion(queryset, columnas, formato, nombre_archivo):
+    """StreamingHttpResponse con las filas del queryset en CSV o NDJSON."""
+    if formato == 'ndjson':
+        respuesta = StreamingHttpResponse(
+            _generar_ndjson(queryset, columnas), content_type='application/x-ndjson; charset=utf-8'
+        )
+    else:
+        respuesta = StreamingHttpResponse(
+            _generar_csv(queryset, columnas), content_type='text/csv; charset=utf-8'
+        )
+    respuesta['Content-Disposition'] = f'attachment; filename="{nombre_archivo}.{formato}"'
+    return respuesta
@@ -0,0 +1,212 @@
+"""
+Motor financiero por lotes.
+
+Calcula horas, costos y proyecciones de todos los monitores con un número fijo
+de consultas, ejecutadas en paralelo (en_paralelo), leyendo las configuraciones
+una sola vez por llamada (desde la caché de configuraciones del proceso).
+"""
+from datetime import date, timedelta
+from functools import partial
+
+from django.db.models import Count
+
+from .models import UsuarioPersonalizado, HorarioFijo
+from .configuracion import obtener_configuraciones
+from .concurrencia import en_paralelo
+from .reportes import (
+    consultas_horas_por_monitor, combinar_horas_por_monitor, consultas_horas_por_semana, combinar_horas_por_semana
+)
+
+COSTO_POR_HORA_POR_DEFECTO = 9965.0
+SEMANAS_SEMESTRE_POR_DEFECTO = 14
+HORAS_POR_JORNADA = 4
+
+
+def obtener_parametros_finanzas():
+    """
+    Lee costo_por_hora, semanas_semestre y fecha_inicio_semestre de la caché de
+    configuraciones. Si alguna no existe, se usa su valor por defecto.
+    """
+    configuraciones = obtener_configuraciones()
+    return {
+        'costo_por_hora': configuraciones.get('costo_por_hora', COSTO_POR_HORA_POR_DEFECTO),
+        'semanas_semestre': configuraciones.get('semanas_semestre', SEMANAS_SEMESTRE_POR_DEFECTO),
+        'fecha_inicio_semestre': configuraciones.get('fecha_inicio_semestre')
+    }
+
+
+def calcular_finanzas_monitores(fecha_inicio, fecha_fin, semanas_trabajadas, monitor_ids=None, parametros=None):
+    """
+    Tabla financiera por monitor para el período y las semanas trabajadas.
+
+    Cada fila contiene 'monitor', 'calculo_horas' (mismas claves que
+    calcular_horas_totales_monitor), 'costo_actual' y 'proyeccion' (mismas
+    claves que calcular_costo_proyectado_monitor). Las filas se retornan
+    ordenadas por id de monitor.
+    """
+    if parametros is None:
+        parametros = obtener_parametros_finanzas()
+    costo_por_hora = parametros['costo_por_hora']
+    total_semanas = parametros['semanas_semestre']
+
+    # Monitores con su número de jornadas semanales en una sola consulta, en paralelo
+    # con los agregados de horas (que ya se limitan a monitores)
+    monitores_qs = UsuarioPersonalizado.objects.filter(tipo_usuario='MONITOR')
+    if monitor_ids is not None:
+        monitores_qs = monitores_qs.filter(id__in=monitor_ids)
+    monitores_qs = monitores_qs.annotate(total_horarios=Count('horario_fijo')).order_by('id')
+    consultas = consultas_horas_por_monitor(fecha_inicio, fecha_fin, monitor_ids=monitor_ids)
+
+    monitores, filas_asistencias, filas_ajustes = en_paralelo(
+        partial(list, monitores_qs), *(partial(list, qs) for qs in consultas)
+    )
+    agregados = combinar_horas_por_monitor(filas_asistencias, filas_ajustes)
+    sin_datos = {
+        'horas_asistencias': 0.0,
+        'horas_ajustes': 0.0,
+        'horas_totales': 0.0,
+        'total_asistencias': 0,
+        'total_ajustes': 0
+    }
+
+    filas = []
+    for monitor in monitores:
+        calculo_horas = agregados.get(monitor.id, sin_datos)
+        horas_semanales = monitor.total_horarios * HORAS_POR_JORNADA
+        horas_totales_proyectadas = horas_semanales * total_semanas
+        horas_trabajadas_proyectadas = horas_semanales * semanas_trabajadas
+
+        filas.append({
+            'monitor': {
+                'id': monitor.id,
+                'username': monitor.username,
+                'nombre': monitor.nombre
+            },
+            'calculo_horas': calculo_horas,
+            'costo_actual': round(calculo_horas['horas_totales'] * costo_por_hora, 2),
+            'proyeccion': {
+                'horas_semanales': horas_semanales,
+                'horas_totales_proyectadas': horas_totales_proyectadas,
+                'horas_trabajadas_proyectadas': horas_trabajadas_proyectadas,
+                'costo_total_proyectado': round(horas_totales_proyectadas * costo_por_hora, 2),
+                'costo_trabajado_proyectado': round(horas_trabajadas_proyectadas * costo_por_hora, 2),
+                'semanas_trabajadas': semanas_trabajadas,
+                'semanas_faltantes': total_semanas - semanas_trabajadas
+            }
+        })
+
+    return filas
+
+
+def comparativa_semanas(fecha_inicio_semestre, parametros=None, hoy=None):
+    """
+    Comparativa semana a semana del semestre con valores reales y proyectados.
+
+    Las semanas son semanas ISO (lunes a domingo) contadas desde la semana que
+    contiene fecha_inicio_semestre. Los valores reales salen de las horas de
+    asistencias y ajustes de cada semana; los proyectados, de los horarios fijos
+    actuales de los monitores.
+    """
+    if parametros is None:
+        parametros = obtener_parametros_finanzas()
+    if hoy is None:
+        hoy = date.today()
+    costo_por_hora = parametros['costo_por_hora']
+    total_semanas = parametros['semanas_semestre']
+
+    inicio = fecha_inicio_semestre - timedelta(days=fecha_inicio_semestre.weekday())
+    fin = inicio + timedelta(days=total_semanas * 7 - 1)
+
+    # Horas reales por semana y jornadas fijas actuales (proyección), en paralelo
+    horarios_qs = HorarioFijo.objects.filter(usuario__tipo_usuario='MONITOR')
+    horarios, *filas_por_consulta = en_paralelo(
+        partial(horarios_qs.aggregate, jornadas=Count('id'), monitores=Count('usuario', distinct=True)),
+        *(partial(list, qs) for qs in consultas_horas_por_semana(inicio, fin))
+    )
+
+    # Horas reales agrupadas por semana: lunes -> lista de horas por monitor
+    horas_por_semana = {}
+    for (semana, _), horas in combinar_horas_por_semana(*filas_por_consulta).items():
+        horas_por_semana.setdefault(semana, []).append(horas)
+
+    # Proyección semanal: jornadas fijas actuales de todos los monitores
+    monitores_con_horarios = horarios['monitores']
+    horas_proyectadas_semana = horarios['jornadas'] * HORAS_POR_JORNADA
+    costo_proyectado_semana = horas_proyectadas_semana * costo_por_hora
+
+    semanas_data = []
+    costo_acumulado = 0.0
+    horas_acumuladas = 0.0
+    costo_proyectado_acumulado = 0.0
+    horas_proyectadas_acumuladas = 0.0
+    semanas_trabajadas = 0
+
+    for numero in range(1, total_semanas + 1):
+        lunes = inicio + timedelta(days=(numero - 1) * 7)
+        domingo = lunes + timedelta(days=6)
+
+        horas_monitores = horas_por_semana.get(lunes, [])
+        semana_horas_total = sum(horas_monitores)
+        semana_costo_total = semana_horas_total * costo_por_hora
+        monitores_semana = sum(1 for horas in horas_monitores if horas > 0)
+
+        if domingo < hoy:
+            estado = 'completada'
+        elif lunes <= hoy:
+            estado = 'en_curso'
+        else:
+            estado = 'pendiente'
+        if estado != 'pendiente':
+            semanas_trabajadas += 1
+
+        costo_acumulado += semana_costo_total
+        horas_acumuladas += semana_horas_total
+        costo_proyectado_acumulado += costo_proyectado_semana
+        horas_proyectadas_acumuladas += horas_proyectadas_semana
+
+        semanas_data.append({
+            'semana': numero,
+            'fecha_inicio': lunes.strftime('%Y-%m-%d'),
+            'fecha_fin': domingo.strftime('%Y-%m-%d'),
+            'costo_total': round(semana_costo_total, 2),
+            'horas_total': round(semana_horas_total, 2),
+            'monitores_activos': monitores_semana,
+            'costo_promedio_por_monitor': round(semana_costo_total / max(1, monitores_semana), 2),
+            'costo_proyectado': round(costo_proyectado_semana, 2),
+            'horas_proyectadas': round(horas_proyectadas_semana, 2),
+            'estado': estado,
+            'costo_acumulado': round(costo_acumulado, 2),
+            'horas_acumuladas': round(horas_acumuladas, 2),
+            'costo_proyectado_acumulado': round(costo_proyectado_acumulado, 2),
+            'horas_proyectadas_acumuladas': round(horas_proyectadas_acumuladas, 2)
+        })
+
+    # Porcentaje del presupuesto proyectado del semestre ya ejecutado
+    for semana_data in semanas_data:
+        semana_data['porcentaje_completado'] = round(
+            (semana_data['costo_acumulado'] / max(1, costo_proyectado_acumulado)) * 100, 2
+        )
+
+    return {
+        'fecha_inicio_semestre': inicio.strftime('%Y-%m-%d'),
+        'fecha_fin_semestre': fin.strftime('%Y-%m-%d'),
+        'total_semanas': total_semanas,
+        'semanas_trabajadas': semanas_trabajadas,
+        'semanas_pendientes': total_semanas - semanas_trabajadas,
+        'resumen_general': {
+            'costo_total_semestre': round(costo_acumulado, 2),
+            'horas_total_semestre': round(horas_acumuladas, 2),
+            'costo_promedio_por_semana': round(costo_acumulado / max(1, semanas_trabajadas), 2),
+            'horas_promedio_por_semana': round(horas_acumuladas / max(1, semanas_trabajadas), 2),
+            'costo_proyectado_semestre': round(costo_proyectado_acumulado, 2),
+            'horas_proyectadas_semestre': round(horas_proyectadas_acumuladas, 2),
+            'monitores_con_horarios': monitores_con_horarios
+        },
+        'semanas': semanas_data,
+        'tendencias': {
+            'costo_por_semana': [s['costo_total'] for s in semanas_data],
+            'horas_por_semana': [s['horas_total'] for s in semanas_data],
+            'costo_acumulado': [s['costo_acumulado'] for s in semanas_data],
+            'costo_proyectado_acumulado': [s['costo_proyectado_acumulado'] for s in semanas_data]
+        }
+    }
@@ -0,0 +1,268 @@
+"""
+Generación por lotes de las asistencias que faltan según los horarios fijos.
+
+En lugar de un get_or_create por cada HorarioFijo, se calculan en memoria los
+tripletes (usuario, fecha, horario) que no existen todavía y se insertan con un
+solo bulk_create(ignore_conflicts=True), apoyado en el unique_together de
+Asistencia para tolerar inserciones concurrentes.
+
+Con ASISTENCIAS_VIRTUALES activo, las lecturas no crean filas: las jornadas
+pendientes se construyen en memoria (asistencias_virtuales) y se combinan con las
+filas reales.
+
+pregenerar_asistencias expande los horarios de todo un semestre (omitiendo
+festivos) en lotes grandes: COPY a una tabla temporal en PostgreSQL y
+bulk_create por lotes en otros motores.
+"""
+import io
+import time
+from datetime import datetime, timedelta
+
+from django.db import connection, transaction
+
+from .models import HorarioFijo, Asistencia
+from .configuracion import obtener_configuracion_cacheada
+from .resumenes import actualizar_resumen_diario, reconstruir_resumen_diario
+from .cache_reportes import invalidar_reportes
+from .eventos import publicar_generacion
+
+TAMANO_LOTE = 1000
+TAMANO_LOTE_PREGENERACION = 5000
+
+
+def fechas_por_dia_semana(fecha_inicio, fecha_fin):
+    """Agrupa las fechas del rango (inclusive) por día de la semana (0=Lunes)."""
+    fechas = {}
+    fecha = fecha_inicio
+    while fecha <= fecha_fin:
+        fechas.setdefault(fecha.weekday(), []).append(fecha)
+        fecha += timedelta(days=1)
+    return fechas
+
+
+def _pares_existentes(fecha_inicio, fecha_fin, horarios_qs):
+    """Pares (horario_id, fecha) que ya tienen asistencia en el rango."""
+    return set(Asistencia.objects.filter(
+        fecha__gte=fecha_inicio,
+        fecha__lte=fecha_fin,
+        horario__in=horarios_qs
+    ).values_list('horario_id', 'fecha'))
+
+
+def generar_asistencias_faltantes(fecha_inicio, fecha_fin, horarios_qs=None):
+    """
+    Crea las asistencias pendientes que faltan entre fecha_inicio y fecha_fin
+    para los horarios de `horarios_qs` (por defecto, todos los de monitores).
+    Retorna el número de asistencias que faltaban (e intentó crear).
+    """
+    if horarios_qs is None:
+        horarios_qs = HorarioFijo.objects.filter(usuario__tipo_usuario='MONITOR')
+
+    fechas = fechas_por_dia_semana(fecha_inicio, fecha_fin)
+    horarios_qs = horarios_qs.filter(dia_semana__in=fechas.keys())
+    horarios = list(horarios_qs.values_list('id', 'usuario_id', 'dia_semana'))
+    if not horarios:
+        return 0
+
+    existentes = _pares_existentes(fecha_inicio, fecha_fin, horarios_qs)
+
+    nuevas = [
+        Asistencia(
+            usuario_id=usuario_id,
+            fecha=fecha,
+            horario_id=horario_id,
+            presente=False,
+            estado_autorizacion='pendiente',
+            horas=0.00
+        )
+        for horario_id, usuario_id, dia_semana in horarios
+        for fecha in fechas[dia_semana]
+        if (horario_id, fecha) not in existentes
+    ]
+    if not nuevas:
+        return 0
+
+    with transaction.atomic():
+        Asistencia.objects.bulk_create(nuevas, batch_size=TAMANO_LOTE, ignore_conflicts=True)
+        invalidar_reportes(Asistencia)
+        publicar_generacion(len(nuevas), fecha_inicio, fecha_fin)
+        actualizar_resumen_diario({(asistencia.usuario_id, asistencia.fecha) for asistencia in nuevas})
+
+    return len(nuevas)
+
+
+def asistencias_virtuales(fecha_inicio, fecha_fin, horarios_qs=None):
+    """
+    Asistencias pendientes sin guardar (id=None) de los horarios que no tienen
+    fila real entre fecha_inicio y fecha_fin. Traen usuario y horario cargados.
+    """
+    if horarios_qs is None:
+        horarios_qs = HorarioFijo.objects.filter(usuario__tipo_usuario='MONITOR')
+
+    fechas = fechas_por_dia_semana(fecha_inicio, fecha_fin)
+    horarios_qs = horarios_qs.filter(dia_semana__in=fechas.keys())
+    existentes = _pares_existentes(fecha_inicio, fecha_fin, horarios_qs)
+
+    return [
+        Asistencia(
+            usuario=horario.usuario,
+            fecha=fecha,
+            horario=horario,
+            presente=False,
+            estado_autorizacion='pendiente',
+            horas=0.00
+        )
+        for horario in horarios_qs.select_related('usuario')
+        for fecha in fechas[horario.dia_semana]
+        if (horario.id, fecha) not in existentes
+    ]
+
+
+def obtener_dias_festivos():
+    """
+    Fechas de la configuración 'dias_festivos' (texto con fechas YYYY-MM-DD
+    separadas por comas). Las entradas inválidas se ignoran.
+    """
+    festivos = set()
+    for valor in str(obtener_configuracion_cacheada('dias_festivos', '')).split(','):
+        try:
+            festivos.add(datetime.strptime(valor.strip(), "%Y-%m-%d").date())
+        except ValueError:
+            continue
+    return festivos
+
+
+def _filas_pregeneracion(fecha_inicio, fecha_fin, horarios_qs, festivos):
+    """Genera tuplas (usuario_id, fecha, horario_id) del rango, sin festivos."""
+    fechas = {
+        dia: [fecha for fecha in lista if fecha not in festivos]
+        for dia, lista in fechas_por_dia_semana(fecha_inicio, fecha_fin).items()
+    }
+    horarios = horarios_qs.filter(dia_semana__in=fechas.keys()).order_by('id').values_list(
+        'id', 'usuario_id', 'dia_semana'
+    )
+    for horario_id, usuario_id, dia_semana in horarios.iterator():
+        for fecha in fechas[dia_semana]:
+            yield (usuario_id, fecha, horario_id)
+
+
+def _insertar_lote_copy(filas):
+    """
+    Inserta el lote con COPY a una tabla temporal y luego INSERT ... ON CONFLICT
+    DO NOTHING sobre la restricción única. Retorna las filas realmente creadas.
+    """
+    tabla = connection.ops.quote_name(Asistencia._meta.db_table)
+    buffer = io.StringIO()
+    for usuario_id, fecha, horario_id in filas:
+        buffer.write(f"{usuario_id}\t{fecha.isoformat()}\t{horario_id}\n")
+    buffer.seek(0)
+
+    # La tabla se borra explícitamente: si pregenerar_asistencias corre dentro de otra
+    # transacción, este atomic es solo un savepoint y ON COMMIT DROP no llegaría a
+    # ejecutarse antes del siguiente lote
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            "CREATE TEMP TABLE tmp_pregeneracion_asistencias "
+            "(usuario_id bigint, fecha date, horario_id bigint)"
+        )
+        cursor.copy_expert(
+            "COPY tmp_pregeneracion_asistencias (usuario_id, fecha, horario_id) FROM STDIN",
+            buffer
+        )
+        cursor.execute(
+            f"INSERT INTO {tabla} "
+            "(usuario_id, fecha, horario_id, presente, estado_autorizacion, horas, created_at, updated_at) "
+            "SELECT usuario_id, fecha, horario_id, false, 'pendiente', 0, now(), now() "
+            "FROM tmp_pregeneracion_asistencias "
+            "ON CONFLICT (usuario_id, fecha, horario_id) DO NOTHING"
+        )
+        creadas = cursor.rowcount
+        cursor.execute("DROP TABLE tmp_pregeneracion_asistencias")
+        return creadas
+
+
+def _insertar_lote_bulk(filas):
+    """Inserta el lote con bulk_create(ignore_conflicts=True)."""
+    with transaction.atomic():
+        Asistencia.objects.bulk_create(
+            [
+                Asistencia(
+                    usuario_id=usuario_id,
+                    fecha=fecha,
+                    horario_id=horario_id,
+                    presente=False,
+                    estado_autorizacion='pendiente',
+                    horas=0.00
+                )
+                for usuario_id, fecha, horario_id in filas
+            ],
+            batch_size=TAMANO_LOTE,
+            ignore_conflicts=True
+        )
+
+
+def pregenerar_asistencias(fecha_inicio, fecha_fin, horarios_qs=None, festivos=(),
+                           tamano_lote=TAMANO_LOTE_PREGENERACION, usar_copy=None):
+    """
+    Crea todas las asistencias pendientes del rango para los horarios indicados
+    (por defecto, todos los de monitores), omitiendo los festivos. Es idempotente:
+    las filas que ya existen se respetan gracias al unique_together de Asistencia.
+
+    Cada lote se confirma en su propia transacción; al final se recalcula el
+    resumen diario del rango. Retorna un diccionario con 'candidatas', 'creadas',
+    'segundos' y 'filas_por_segundo' (de la inserción, sin el resumen) y 'metodo'.
+    """
+    if horarios_qs is None:
+        horarios_qs = HorarioFijo.objects.filter(usuario__tipo_usuario='MONITOR')
+    if usar_copy is None:
+        usar_copy = connection.vendor == 'postgresql'
+    festivos = set(festivos)
+
+    existentes_antes = None
+    if not usar_copy:
+        # bulk_create con ignore_conflicts no informa cuántas filas insertó
+        existentes_antes = Asistencia.objects.filter(
+            fecha__gte=fecha_inicio, fecha__lte=fecha_fin, horario__in=horarios_qs
+        ).count()
+
+    inicio = time.monotonic()
+    candidatas = 0
+    creadas = 0
+    usuario_ids = set()
+    lote = []
+
+    def _vaciar():
+        if usar_copy:
+            return _insertar_lote_copy(lote)
+        _insertar_lote_bulk(lote)
+        return 0
+
+    for fila in _filas_pregeneracion(fecha_inicio, fecha_fin, horarios_qs, festivos):
+        lote.append(fila)
+        usuario_ids.add(fila[0])
+        if len(lote) >= tamano_lote:
+            creadas += _vaciar()
+            candidatas += len(lote)
+            lote = []
+    if lote:
+        creadas += _vaciar()
+        candidatas += len(lote)
+
+    if not usar_copy:
+        creadas = Asistencia.objects.filter(
+            fecha__gte=fecha_inicio, fecha__lte=fecha_fin, horario__in=horarios_qs
+        ).count() - existentes_antes
+
+    segundos = time.monotonic() - inicio
+
+    if creadas:
+        invalidar_reportes(Asistencia)
+        publicar_generacion(creadas, fecha_inicio, fecha_fin)
+        reconstruir_resumen_diario(usuario_ids=sorted(usuario_ids), fecha_inicio=fecha_inicio, fecha_fin=fecha_fin)
+    return {
+        'candidatas': candidatas,
+        'creadas': creadas,
+        'segundos': round(segundos, 3),
+        'filas_por_segundo': round(candidatas / segundos, 1) if segundos > 0 else 0.0,
+        'metodo': 'copy' if usar_copy else 'bulk_create'
+    }
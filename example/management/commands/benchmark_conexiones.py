@@ -0,0 +1,120 @@
+"""
+Mide el costo de obtener la conexión a la base de datos en cada petición, con las
+distintas formas de manejar las conexiones.
+
+Cada "petición" reproduce lo que hace Django: al empezar y al terminar se llama a
+close_if_unusable_or_obsolete (close_old_connections) y en medio se ejecuta una
+consulta trivial. Modos:
+
+- nueva: CONN_MAX_AGE=0, una conexión por petición (el comportamiento anterior
+  con DB_HOST)
+- persistente: CONN_MAX_AGE con verificación de salud (DB_CONN_MAX_AGE)
+- pool: backend api.postgresql_pool (solo PostgreSQL)
+
+Con --hilo-por-peticion cada petición corre en un hilo nuevo, como runserver: la
+conexión persistente de un hilo no sobrevive a la petición, la del pool sí.
+
+Uso:
+    python manage.py benchmark_conexiones --peticiones 200
+    python manage.py benchmark_conexiones --hilo-por-peticion
+"""
+import copy
+import statistics
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.signals import connection_created
+from django.db.utils import load_backend
+
+MODOS = ('nueva', 'persistente', 'pool')
+ENGINE_POOL = 'api.postgresql_pool'
+
+
+def _configuracion(modo, base):
+    configuracion = copy.deepcopy(base)
+    if configuracion['ENGINE'] == ENGINE_POOL:
+        configuracion['ENGINE'] = 'django.db.backends.postgresql'
+    if modo == 'nueva':
+        configuracion['CONN_MAX_AGE'] = 0
+    elif modo == 'persistente':
+        configuracion['CONN_MAX_AGE'] = settings.DB_CONN_MAX_AGE or 600
+        configuracion['CONN_HEALTH_CHECKS'] = True
+    else:
+        configuracion['ENGINE'] = ENGINE_POOL
+        configuracion['CONN_MAX_AGE'] = 0
+        configuracion.setdefault('POOL', {})
+    return configuracion
+
+
+def _peticion(conexion):
+    inicio = time.perf_counter()
+    conexion.close_if_unusable_or_obsolete()
+    with conexion.cursor() as cursor:
+        cursor.execute('SELECT 1')
+        cursor.fetchone()
+    conexion.close_if_unusable_or_obsolete()
+    return time.perf_counter() - inicio
+
+
+class Command(BaseCommand):
+    help = 'Mide el costo por petición de abrir o reutilizar la conexión a la base de datos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--peticiones', type=int, default=200, help='Peticiones por modo')
+        parser.add_argument('--modo', action='append', choices=MODOS, dest='modos',
+                            help='Modo a medir (se puede repetir; por defecto todos)')
+        parser.add_argument('--hilo-por-peticion', action='store_true',
+                            help='Ejecutar cada petición en un hilo nuevo, como runserver')
+
+    def handle(self, *args, **options):
+        if options['peticiones'] < 1:
+            raise CommandError('--peticiones debe ser mayor que cero')
+        base = connections.databases[DEFAULT_DB_ALIAS]
+        modos = options['modos'] or list(MODOS)
+        if 'pool' in modos and connections[DEFAULT_DB_ALIAS].vendor != 'postgresql':
+            self.stdout.write(self.style.WARNING('El modo pool requiere PostgreSQL; se omite'))
+            modos.remove('pool')
+
+        creadas = []
+        connection_created.connect(lambda sender, connection, **kwargs: creadas.append(connection))
+
+        self.stdout.write(f"{'modo':<14}{'ms p50':>10}{'ms p95':>10}{'ms max':>10}{'conexiones':>12}")
+        for modo in modos:
+            configuracion = _configuracion(modo, base)
+            backend = load_backend(configuracion['ENGINE'])
+            alias = f'benchmark_{modo}'
+            creadas.clear()
+            tiempos = []
+
+            if options['hilo_por_peticion']:
+                def en_hilo():
+                    conexion = backend.DatabaseWrapper(copy.deepcopy(configuracion), alias)
+                    tiempos.append(_peticion(conexion))
+                    if modo == 'persistente':
+                        # La conexión del hilo queda abierta hasta que se recolecta;
+                        # se cierra aquí para no acumularlas durante la medición
+                        conexion.close()
+
+                for _ in range(options['peticiones']):
+                    hilo = threading.Thread(target=en_hilo)
+                    hilo.start()
+                    hilo.join()
+            else:
+                conexion = backend.DatabaseWrapper(configuracion, alias)
+                for _ in range(options['peticiones']):
+                    tiempos.append(_peticion(conexion))
+                conexion.close()
+
+            if modo == 'pool':
+                fisicas = backend.estadisticas().get(alias, {}).get('creadas', 0)
+            else:
+                fisicas = len(creadas)
+            tiempos_ms = sorted(segundos * 1000 for segundos in tiempos)
+            p95 = tiempos_ms[min(len(tiempos_ms) - 1, int(len(tiempos_ms) * 0.95))]
+            self.stdout.write(
+                f'{modo:<14}{statistics.median(tiempos_ms):>10.3f}{p95:>10.3f}'
+                f'{tiempos_ms[-1]:>10.3f}{fisicas:>12}'
+            )
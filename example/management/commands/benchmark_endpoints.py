@@ -0,0 +1,119 @@
+import json
+import subprocess
+from datetime import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from example.benchmark import (
+    ContextoBenchmark, construir_escenarios, rutas_sin_escenario, medir_escenarios, comparar_reportes
+)
+from example.datos_sinteticos import MONITORES_POR_ESCALA, borrar_datos, sembrar_datos
+from example.finanzas import SEMANAS_SEMESTRE_POR_DEFECTO
+from example.models import UsuarioPersonalizado, HorarioFijo, Asistencia, AjusteHoras
+
+
+def _commit_actual():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _conteos():
+    return {
+        'monitores': UsuarioPersonalizado.objects.filter(tipo_usuario='MONITOR').count(),
+        'horarios': HorarioFijo.objects.count(),
+        'asistencias': Asistencia.objects.count(),
+        'ajustes': AjusteHoras.objects.count(),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide tiempo, consultas SQL y tamaño de respuesta de todos los endpoints de example/urls.py '
+        'con el cliente de pruebas, a una o varias escalas de datos sintéticos, y escribe un reporte JSON '
+        'comparable entre commits. Las escrituras se revierten.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--escala', type=float, action='append', dest='escalas',
+                            help=f'Sembrar datos a esta escala ({MONITORES_POR_ESCALA} monitores por unidad) '
+                                 'antes de medir; se puede repetir. Sin --escala se miden los datos actuales')
+        parser.add_argument('--semanas', type=int, default=SEMANAS_SEMESTRE_POR_DEFECTO,
+                            help='Semanas de asistencias al sembrar')
+        parser.add_argument('--semanas-consulta', type=int, default=4,
+                            help='Semanas que abarcan los filtros de fecha, hasta la última asistencia')
+        parser.add_argument('--repeticiones', type=int, default=5, help='Ejecuciones medidas por escenario')
+        parser.add_argument('--solo', action='append', default=[],
+                            help='Medir solo las rutas cuyo nombre contiene este texto (se puede repetir)')
+        parser.add_argument('--cache-reportes', action='store_true',
+                            help='No vaciar la caché de reportes entre peticiones (mide los aciertos)')
+        parser.add_argument('--salida', default='benchmark_endpoints.json', help='Archivo del reporte JSON')
+        parser.add_argument('--comparar', help='Reporte JSON anterior contra el cual comparar')
+
+    def handle(self, *args, **options):
+        if options['repeticiones'] < 1:
+            raise CommandError('--repeticiones debe ser mayor que cero')
+
+        reporte = {
+            'generado_en': datetime.now().isoformat(timespec='seconds'),
+            'commit': _commit_actual(),
+            'motor': connection.vendor,
+            'repeticiones': options['repeticiones'],
+            'semanas_consulta': options['semanas_consulta'],
+            'cache_reportes': options['cache_reportes'],
+            'escalas': [],
+        }
+
+        for escala in options['escalas'] or [None]:
+            if escala is not None:
+                borrar_datos()
+                sembrar_datos(monitores=max(1, round(escala * MONITORES_POR_ESCALA)), semanas=options['semanas'])
+                if connection.vendor == 'postgresql':
+                    with connection.cursor() as cursor:
+                        cursor.execute('ANALYZE')
+
+            try:
+                ctx = ContextoBenchmark(semanas_consulta=options['semanas_consulta'])
+            except ValueError as e:
+                raise CommandError(str(e))
+            escenarios = construir_escenarios(ctx)
+            sin_escenario = rutas_sin_escenario(escenarios)
+            if options['solo']:
+                escenarios = [e for e in escenarios if any(texto in e.ruta for texto in options['solo'])]
+
+            datos = _conteos()
+            self.stdout.write(f"\nEscala {escala if escala is not None else 'actual'}: "
+                              + ', '.join(f'{valor} {clave}' for clave, valor in datos.items()))
+            endpoints = medir_escenarios(escenarios, ctx, options['repeticiones'], options['cache_reportes'])
+            reporte['escalas'].append({
+                'escala': escala,
+                'datos': datos,
+                'rutas_sin_escenario': sin_escenario,
+                'endpoints': endpoints,
+            })
+
+            self.stdout.write(f"{'endpoint':<58}{'estado':>7}{'ms':>10}{'consultas':>11}{'bytes':>11}")
+            for nombre, medicion in endpoints.items():
+                self.stdout.write(f"{nombre:<58}{medicion['estado']:>7}{medicion['ms_mediana']:>10.2f}"
+                                  f"{medicion['consultas']:>11}{medicion['bytes']:>11}")
+            if sin_escenario:
+                self.stdout.write(self.style.WARNING(f"Rutas sin escenario: {', '.join(sin_escenario)}"))
+
+        with open(options['salida'], 'w', encoding='utf-8') as archivo:
+            json.dump(reporte, archivo, ensure_ascii=False, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"\nReporte escrito en {options['salida']}"))
+
+        if options['comparar']:
+            with open(options['comparar'], encoding='utf-8') as archivo:
+                anterior = json.load(archivo)
+            self.stdout.write(f"\nComparación con {options['comparar']} (commit {anterior.get('commit')})")
+            self.stdout.write(f"{'escala':>7}  {'endpoint':<58}{'ms antes':>10}{'ms ahora':>10}{'consultas':>13}")
+            for escala, nombre, ms_antes, ms_ahora, consultas_antes, consultas_ahora in comparar_reportes(anterior, reporte):
+                self.stdout.write(f"{str(escala):>7}  {nombre:<58}{ms_antes:>10.2f}{ms_ahora:>10.2f}"
+                                  f"{consultas_antes:>6} -> {consultas_ahora:<4}")
@@ -0,0 +1,131 @@
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+
+from example.models import UsuarioPersonalizado, Asistencia, AjusteHoras, ResumenHorasDiario
+from example.paginacion import ORDEN_ASISTENCIAS
+from example.datos_sinteticos import sembrar_datos
+
+MODELOS_CON_INDICES = [UsuarioPersonalizado, Asistencia, AjusteHoras, ResumenHorasDiario]
+
+
+def _consultas(fecha_inicio, fecha_fin, monitor_id):
+    """Consultas con la forma de las que hacen los reportes y listados."""
+    rango = {'fecha__gte': fecha_inicio, 'fecha__lte': fecha_fin}
+    return [
+        ('asistencias_por_monitor', Asistencia.objects.filter(
+            usuario__tipo_usuario='MONITOR', **rango
+        ).order_by().values('usuario_id').annotate(horas=Sum('horas'), total=Count('id'))),
+        ('asistencias_de_un_monitor', Asistencia.objects.filter(
+            usuario_id=monitor_id, **rango
+        ).order_by().values('usuario_id').annotate(horas=Sum('horas'))),
+        ('asistencias_sede_jornada', Asistencia.objects.filter(
+            horario__sede='SA', horario__jornada='M', **rango
+        ).order_by().values('usuario_id').annotate(horas=Sum('horas'))),
+        ('asistencias_pendientes_dia', Asistencia.objects.filter(
+            fecha=fecha_fin, estado_autorizacion='pendiente'
+        ).order_by().values_list('id', flat=True)),
+        ('listado_asistencias_pagina', Asistencia.objects.filter(
+            usuario__tipo_usuario='MONITOR', **rango
+        ).order_by(*ORDEN_ASISTENCIAS).values_list('id', flat=True)[:100]),
+        ('ajustes_por_monitor', AjusteHoras.objects.filter(
+            usuario__tipo_usuario='MONITOR', **rango
+        ).order_by().values('usuario_id').annotate(horas=Sum('cantidad_horas'))),
+        ('ajustes_de_un_monitor', AjusteHoras.objects.filter(
+            usuario_id=monitor_id, **rango
+        ).order_by().values('usuario_id').annotate(horas=Sum('cantidad_horas'))),
+        ('monitores', UsuarioPersonalizado.objects.filter(
+            tipo_usuario='MONITOR'
+        ).order_by().values_list('id', flat=True)),
+        ('resumen_por_monitor', ResumenHorasDiario.objects.filter(
+            usuario__tipo_usuario='MONITOR', **rango
+        ).order_by().values('usuario_id').annotate(horas=Sum('horas_asistencias'))),
+    ]
+
+
+def _medir(consultas, repeticiones, con_planes):
+    """Mediana en milisegundos (y plan, si se pide) de cada consulta."""
+    resultados = {}
+    for nombre, queryset in consultas:
+        list(queryset.all())  # calentamiento (all() evita el caché del queryset)
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            list(queryset.all())
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        plan = None
+        if con_planes:
+            plan = queryset.explain(analyze=True) if connection.vendor == 'postgresql' else queryset.explain()
+        resultados[nombre] = (statistics.median(tiempos), plan)
+    return resultados
+
+
+def _indices_existentes():
+    """(tabla, índice) de los índices declarados en Meta.indexes que existen en la base de datos."""
+    existentes = []
+    with connection.cursor() as cursor:
+        for modelo in MODELOS_CON_INDICES:
+            tabla = modelo._meta.db_table
+            restricciones = connection.introspection.get_constraints(cursor, tabla)
+            for indice in modelo._meta.indexes:
+                if indice.name in restricciones:
+                    existentes.append((tabla, indice.name))
+    return existentes
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara planes y tiempos de las consultas de reportes sin y con los índices de Meta.indexes. '
+        'Los índices se eliminan dentro de una transacción que luego se revierte.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sembrar-monitores', type=int, default=0,
+                            help='Crear antes N monitores sintéticos con sus asistencias y ajustes')
+        parser.add_argument('--semanas', type=int, default=16, help='Semanas de datos a sembrar')
+        parser.add_argument('--semanas-consulta', type=int, default=4,
+                            help='Semanas que abarcan las consultas, contadas hacia atrás desde la última asistencia')
+        parser.add_argument('--repeticiones', type=int, default=5, help='Ejecuciones por consulta')
+        parser.add_argument('--planes', action='store_true', help='Mostrar los planes de ejecución')
+
+    def handle(self, *args, **options):
+        if options['sembrar_monitores']:
+            creados = sembrar_datos(monitores=options['sembrar_monitores'], semanas=options['semanas'])
+            self.stdout.write(f"Sembrados {creados['monitores']} monitores, {creados['asistencias']} asistencias, "
+                              f"{creados['ajustes']} ajustes")
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE')
+
+        ultima = Asistencia.objects.order_by('-fecha').values_list('fecha', flat=True).first()
+        monitor_id = UsuarioPersonalizado.objects.filter(tipo_usuario='MONITOR').values_list('id', flat=True).first()
+        if ultima is None or monitor_id is None:
+            raise CommandError('No hay asistencias. Use --sembrar-monitores N')
+        consultas = _consultas(ultima - timedelta(weeks=options['semanas_consulta']), ultima, monitor_id)
+
+        indices = _indices_existentes()
+        if not indices:
+            raise CommandError('Los índices no están creados. Ejecute las migraciones')
+
+        # Sin índices: se eliminan dentro de una transacción que se revierte al terminar
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                for _, nombre in indices:
+                    cursor.execute(f'DROP INDEX {connection.ops.quote_name(nombre)}')
+            sin_indices = _medir(consultas, options['repeticiones'], options['planes'])
+            transaction.set_rollback(True)
+
+        con_indices = _medir(consultas, options['repeticiones'], options['planes'])
+
+        self.stdout.write(f"{connection.vendor}: {len(indices)} índices, mediana de {options['repeticiones']} ejecuciones")
+        self.stdout.write(f"{'consulta':<30}{'sin (ms)':>12}{'con (ms)':>12}{'mejora':>10}")
+        for nombre, _ in consultas:
+            antes, plan_antes = sin_indices[nombre]
+            despues, plan_despues = con_indices[nombre]
+            self.stdout.write(f"{nombre:<30}{antes:>12.2f}{despues:>12.2f}{antes / max(despues, 1e-6):>9.1f}x")
+            if options['planes']:
+                self.stdout.write(f'  -- sin índices:\n{plan_antes}\n  -- con índices:\n{plan_despues}\n')
@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from example.models import HorarioFijo
+from example.finanzas import obtener_parametros_finanzas
+from example.generacion import obtener_dias_festivos, pregenerar_asistencias, TAMANO_LOTE_PREGENERACION
+
+
+def _fecha(valor):
+    try:
+        return datetime.strptime(str(valor), "%Y-%m-%d").date()
+    except ValueError:
+        raise CommandError(f'Fecha inválida "{valor}". Use YYYY-MM-DD')
+
+
+class Command(BaseCommand):
+    help = (
+        'Crea por lotes las asistencias pendientes de todo el semestre a partir de los horarios fijos, '
+        'omitiendo festivos. Se puede ejecutar varias veces sin duplicar registros.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fecha-inicio',
+                            help="Inicio del semestre (YYYY-MM-DD), por defecto la configuración 'fecha_inicio_semestre'")
+        parser.add_argument('--fecha-fin',
+                            help="Fin del semestre (YYYY-MM-DD), por defecto inicio + 'semanas_semestre' semanas")
+        parser.add_argument('--festivo', action='append', dest='festivos', default=[],
+                            help="Fecha festiva a omitir (YYYY-MM-DD, se puede repetir). "
+                                 "Se suman a la configuración 'dias_festivos'")
+        parser.add_argument('--monitor', type=int, action='append', dest='monitores',
+                            help='ID de monitor a generar (se puede repetir), por defecto todos')
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE_PREGENERACION,
+                            help=f'Filas por lote (por defecto {TAMANO_LOTE_PREGENERACION})')
+        parser.add_argument('--sin-copy', action='store_true',
+                            help='Usar bulk_create aunque la base de datos sea PostgreSQL')
+
+    def handle(self, *args, **options):
+        parametros = obtener_parametros_finanzas()
+
+        fecha_inicio_str = options['fecha_inicio'] or parametros['fecha_inicio_semestre']
+        if not fecha_inicio_str:
+            raise CommandError("Indique --fecha-inicio o configure 'fecha_inicio_semestre'")
+        fecha_inicio = _fecha(fecha_inicio_str)
+
+        if options['fecha_fin']:
+            fecha_fin = _fecha(options['fecha_fin'])
+        else:
+            # Misma convención que la comparativa semanal: semanas de lunes a domingo
+            lunes = fecha_inicio - timedelta(days=fecha_inicio.weekday())
+            fecha_fin = lunes + timedelta(days=parametros['semanas_semestre'] * 7 - 1)
+        if fecha_fin < fecha_inicio:
+            raise CommandError('La fecha final debe ser mayor o igual a la inicial')
+        if options['lote'] < 1:
+            raise CommandError('--lote debe ser mayor que cero')
+
+        festivos = obtener_dias_festivos() | {_fecha(valor) for valor in options['festivos']}
+
+        horarios_qs = HorarioFijo.objects.filter(usuario__tipo_usuario='MONITOR')
+        if options['monitores']:
+            horarios_qs = horarios_qs.filter(usuario__id__in=options['monitores'])
+
+        resultado = pregenerar_asistencias(
+            fecha_inicio,
+            fecha_fin,
+            horarios_qs=horarios_qs,
+            festivos=festivos,
+            tamano_lote=options['lote'],
+            usar_copy=False if options['sin_copy'] else None
+        )
+
+        self.stdout.write(
+            f"Período {fecha_inicio:%Y-%m-%d} a {fecha_fin:%Y-%m-%d}, {len(festivos)} festivos omitidos"
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Asistencias creadas: {resultado['creadas']} de {resultado['candidatas']} "
+            f"({resultado['metodo']}, {resultado['segundos']} s, {resultado['filas_por_segundo']} filas/s)"
+        ))
@@ -0,0 +1,33 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from example.resumenes import reconstruir_resumen_diario
+
+
+def _fecha(valor):
+    try:
+        return datetime.strptime(valor, "%Y-%m-%d").date()
+    except ValueError:
+        raise CommandError(f'Fecha inválida "{valor}". Use YYYY-MM-DD')
+
+
+class Command(BaseCommand):
+    help = 'Recalcula desde cero el resumen diario de horas (ResumenHorasDiario)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fecha-inicio', help='Fecha inicial (YYYY-MM-DD), por defecto todo el histórico')
+        parser.add_argument('--fecha-fin', help='Fecha final (YYYY-MM-DD), por defecto todo el histórico')
+        parser.add_argument('--monitor', type=int, action='append', dest='monitores',
+                            help='ID de monitor a recalcular (se puede repetir)')
+
+    def handle(self, *args, **options):
+        fecha_inicio = _fecha(options['fecha_inicio']) if options['fecha_inicio'] else None
+        fecha_fin = _fecha(options['fecha_fin']) if options['fecha_fin'] else None
+
+        total_filas = reconstruir_resumen_diario(
+            usuario_ids=options['monitores'],
+            fecha_inicio=fecha_inicio,
+            fecha_fin=fecha_fin
+        )
+        self.stdout.write(self.style.SUCCESS(f'Resumen diario reconstruido: {total_filas} filas'))
@@ -0,0 +1,109 @@
+import signal
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from example.models import Trabajo
+from example.programador import iniciar_programador
+from example.trabajos import (
+    ejecutar_trabajo, identificador_trabajador, purgar_antiguos, reclamar_trabajos, recuperar_abandonados
+)
+
+# Cada cuánto se borran los trabajos terminados que superaron TRABAJOS_RETENCION_DIAS
+INTERVALO_PURGA_SEGUNDOS = 600
+
+
+def _ejecutar(trabajo_id):
+    close_old_connections()
+    inicio = time.monotonic()
+    try:
+        return trabajo_id, ejecutar_trabajo(trabajo_id), time.monotonic() - inicio
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = (
+        'Ejecuta los trabajos en segundo plano encolados con POST /directivo/trabajos/ '
+        '(reportes y exportaciones pesados), varios a la vez en un pool de hilos. '
+        'Se pueden correr varios procesos: cada trabajo lo toma uno solo.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hilos', type=int, default=settings.TRABAJOS_HILOS,
+                            help=f'Trabajos simultáneos (por defecto TRABAJOS_HILOS={settings.TRABAJOS_HILOS})')
+        parser.add_argument('--intervalo', type=float, default=settings.TRABAJOS_INTERVALO_SEGUNDOS,
+                            help='Segundos entre búsquedas de trabajos cuando la cola está vacía')
+        parser.add_argument('--una-vez', action='store_true',
+                            help='Terminar cuando no queden trabajos pendientes (p. ej. desde un cron)')
+
+    def handle(self, *args, **options):
+        hilos = options['hilos']
+        if hilos < 1:
+            raise CommandError('--hilos debe ser mayor que cero')
+
+        trabajador = identificador_trabajador()
+        detener = threading.Event()
+
+        def _senal(numero, marco):
+            self.stdout.write('Deteniendo: se terminan los trabajos en curso...')
+            detener.set()
+
+        signal.signal(signal.SIGINT, _senal)
+        signal.signal(signal.SIGTERM, _senal)
+
+        self.stdout.write(f'Trabajador {trabajador} con {hilos} hilos')
+        # Con PROGRAMADOR_ACTIVO el trabajador también puede ser el líder de las tareas periódicas
+        programador = None if options['una_vez'] else iniciar_programador()
+        en_curso = set()
+        ultima_purga = None
+        with ThreadPoolExecutor(max_workers=hilos, thread_name_prefix='trabajos') as ejecutor:
+            while not detener.is_set():
+                close_old_connections()
+                terminados = {futuro for futuro in en_curso if futuro.done()}
+                en_curso -= terminados
+                for futuro in terminados:
+                    self._informar(futuro)
+
+                if ultima_purga is None or time.monotonic() - ultima_purga > INTERVALO_PURGA_SEGUNDOS:
+                    borrados = purgar_antiguos()
+                    if borrados:
+                        self.stdout.write(f'{borrados} trabajos antiguos borrados')
+                    ultima_purga = time.monotonic()
+
+                reencolados, fallidos = recuperar_abandonados()
+                if reencolados or fallidos:
+                    self.stdout.write(self.style.WARNING(
+                        f'Trabajos abandonados: {reencolados} reencolados, {fallidos} fallidos'
+                    ))
+
+                ids = reclamar_trabajos(hilos - len(en_curso), trabajador)
+                for trabajo_id in ids:
+                    en_curso.add(ejecutor.submit(_ejecutar, trabajo_id))
+                if ids:
+                    continue
+                if options['una_vez'] and not en_curso:
+                    break
+                if en_curso:
+                    wait(en_curso, timeout=options['intervalo'], return_when=FIRST_COMPLETED)
+                else:
+                    detener.wait(options['intervalo'])
+
+            for futuro in wait(en_curso).done:
+                self._informar(futuro)
+        if programador is not None:
+            programador.detener()
+        close_old_connections()
+
+    def _informar(self, futuro):
+        try:
+            trabajo_id, estado, segundos = futuro.result()
+        except Exception as e:
+            self.stderr.write(f'Error inesperado en un trabajo: {e}')
+            return
+        estilo = self.style.SUCCESS if estado == Trabajo.COMPLETADO else self.style.ERROR
+        self.stdout.write(estilo(f'Trabajo {trabajo_id}: {estado} en {segundos:.2f}s'))
@@ -0,0 +1,68 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from example.models import EjecucionTarea
+from example.programador import TAREAS, Programador
+
+
+class Command(BaseCommand):
+    help = (
+        'Ejecuta el programador de tareas periódicas en primer plano. Si otro proceso es el '
+        'líder, este espera y lo reemplaza cuando ese proceso termina.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--una-vez', action='store_true',
+                            help='Ejecutar las tareas con horario vencido y terminar (p. ej. desde un cron cada minuto)')
+        parser.add_argument('--listar', action='store_true',
+                            help='Mostrar las tareas registradas y su última ejecución')
+
+    def handle(self, *args, **options):
+        if options['listar']:
+            self._listar()
+            return
+
+        if options['una_vez']:
+            programador = Programador(en_linea=True)
+            ejecuciones = programador.paso()
+            programador.bloqueo.liberar(timezone.now())
+            if not programador.es_lider:
+                raise CommandError('Otro proceso es el líder del programador')
+            for ejecucion in ejecuciones:
+                ejecucion.refresh_from_db()
+                self._informar(ejecucion)
+            if not ejecuciones:
+                self.stdout.write('Ninguna tarea con horario vencido')
+            return
+
+        detener = threading.Event()
+
+        def _senal(numero, marco):
+            self.stdout.write('Deteniendo: se terminan las tareas en curso...')
+            detener.set()
+
+        signal.signal(signal.SIGINT, _senal)
+        signal.signal(signal.SIGTERM, _senal)
+
+        programador = Programador()
+        self.stdout.write(f'Programador {programador.propietario} con {len(programador.tareas)} tareas')
+        programador.iniciar()
+        detener.wait()
+        programador.detener()
+
+    def _listar(self):
+        for tarea in TAREAS.values():
+            ultima = EjecucionTarea.objects.filter(tarea=tarea.nombre).first()
+            detalle = f'{timezone.localtime(ultima.programada_para):%Y-%m-%d %H:%M} {ultima.estado}' if ultima else 'nunca'
+            self.stdout.write(f'{tarea.nombre:<28} {str(tarea.cron):<16} última: {detalle}')
+
+    def _informar(self, ejecucion):
+        estilo = {
+            EjecucionTarea.COMPLETADA: self.style.SUCCESS,
+            EjecucionTarea.OMITIDA: self.style.WARNING,
+        }.get(ejecucion.estado, self.style.ERROR)
+        detalle = ejecucion.resultado or ejecucion.error
+        self.stdout.write(estilo(f'{ejecucion.tarea}: {ejecucion.estado} {detalle}'))
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from example.datos_sinteticos import MONITORES_POR_ESCALA, PREFIJO_USERNAME, borrar_datos, sembrar_datos
+from example.finanzas import SEMANAS_SEMESTRE_POR_DEFECTO
+
+
+class Command(BaseCommand):
+    help = (
+        'Genera datos sintéticos reproducibles para benchmarks: monitores con horarios fijos, '
+        'un semestre de asistencias en estados mezclados y ajustes de horas. '
+        f'La escala 1 equivale a {MONITORES_POR_ESCALA} monitores.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--escala', type=float, default=1,
+                            help=f'Factor de escala (monitores = escala x {MONITORES_POR_ESCALA})')
+        parser.add_argument('--monitores', type=int, help='Número exacto de monitores (ignora --escala)')
+        parser.add_argument('--semanas', type=int, default=SEMANAS_SEMESTRE_POR_DEFECTO,
+                            help=f'Semanas de asistencias, hasta hoy (por defecto {SEMANAS_SEMESTRE_POR_DEFECTO})')
+        parser.add_argument('--semilla', type=int, default=0, help='Semilla aleatoria (mismos datos con la misma semilla)')
+        parser.add_argument('--conservar', action='store_true',
+                            help=f'No borrar antes los datos sintéticos existentes (usuarios {PREFIJO_USERNAME}*)')
+        parser.add_argument('--solo-borrar', action='store_true', help='Solo borrar los datos sintéticos')
+
+    def handle(self, *args, **options):
+        if options['solo_borrar'] or not options['conservar']:
+            borrados = borrar_datos()
+            self.stdout.write(f'Datos sintéticos anteriores borrados: {borrados} filas')
+            if options['solo_borrar']:
+                return
+
+        monitores = options['monitores'] or round(options['escala'] * MONITORES_POR_ESCALA)
+        if monitores < 1:
+            raise CommandError('Debe crear al menos un monitor')
+        if options['semanas'] < 1:
+            raise CommandError('--semanas debe ser mayor que cero')
+
+        creados = sembrar_datos(monitores=monitores, semanas=options['semanas'], semilla=options['semilla'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Sembrados {creados['monitores']} monitores, {creados['horarios']} horarios, "
+            f"{creados['asistencias']} asistencias y {creados['ajustes']} ajustes "
+            f"({creados['fecha_inicio']:%Y-%m-%d} a {creados['fecha_fin']:%Y-%m-%d})"
+        ))
@@ -0,0 +1,157 @@
+"""
+Métricas de las peticiones HTTP en el formato de texto de Prometheus.
+
+MetricasMiddleware (example/middleware.py) registra por cada petición, agrupado por
+el nombre de la ruta resuelta (view_name de example/urls.py):
+
+- api_request_duration_seconds: histograma de latencia
+- api_db_queries: histograma de consultas SQL por petición
+- api_db_duration_seconds: histograma del tiempo en la base de datos por petición
+- api_response_size_bytes: histograma del tamaño de la respuesta
+- api_requests_total: contador por vista, método y código de estado
+
+Los valores viven en la memoria del proceso (cada worker expone los suyos) y se
+actualizan con un solo lock por petición. Las consultas se miden con
+connection.execute_wrapper, que solo agrega dos lecturas del reloj por consulta.
+"""
+import bisect
+import os
+import threading
+import time
+
+BUCKETS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_CONSULTAS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+BUCKETS_BYTES = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+VISTA_SIN_RUTA = 'sin_ruta'
+CONTENT_TYPE_PROMETHEUS = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _etiquetas(nombres, valores, extra=''):
+    pares = [f'{nombre}="{_escapar(valor)}"' for nombre, valor in zip(nombres, valores)]
+    if extra:
+        pares.append(extra)
+    return '{' + ','.join(pares) + '}' if pares else ''
+
+
+def _numero(valor):
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class Histograma:
+    """Histograma con buckets fijos, una serie por valor de las etiquetas."""
+
+    def __init__(self, nombre, ayuda, buckets, etiquetas=('view',)):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.buckets = buckets
+        self.etiquetas = etiquetas
+        self.series = {}  # valores de etiquetas -> [conteos por bucket (no acumulados), suma, total]
+
+    def observar(self, valores, valor):
+        serie = self.series.get(valores)
+        if serie is None:
+            serie = self.series[valores] = [[0] * (len(self.buckets) + 1), 0, 0]
+        serie[0][bisect.bisect_left(self.buckets, valor)] += 1
+        serie[1] += valor
+        serie[2] += 1
+
+    def exportar(self):
+        lineas = [f'# HELP {self.nombre} {self.ayuda}', f'# TYPE {self.nombre} histogram']
+        for valores, (conteos, suma, total) in sorted(self.series.items()):
+            acumulado = 0
+            for limite, conteo in zip(self.buckets + ('+Inf',), conteos):
+                acumulado += conteo
+                le = 'le="+Inf"' if limite == '+Inf' else f'le="{_numero(limite)}"'
+                lineas.append(f'{self.nombre}_bucket{_etiquetas(self.etiquetas, valores, le)} {acumulado}')
+            lineas.append(f'{self.nombre}_sum{_etiquetas(self.etiquetas, valores)} {_numero(suma)}')
+            lineas.append(f'{self.nombre}_count{_etiquetas(self.etiquetas, valores)} {total}')
+        return lineas
+
+
+class Contador:
+    """Contador monotónico, una serie por valor de las etiquetas."""
+
+    def __init__(self, nombre, ayuda, etiquetas):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = etiquetas
+        self.series = {}
+
+    def incrementar(self, valores, cantidad=1):
+        self.series[valores] = self.series.get(valores, 0) + cantidad
+
+    def exportar(self):
+        lineas = [f'# HELP {self.nombre} {self.ayuda}', f'# TYPE {self.nombre} counter']
+        for valores, total in sorted(self.series.items()):
+            lineas.append(f'{self.nombre}{_etiquetas(self.etiquetas, valores)} {_numero(total)}')
+        return lineas
+
+
+_lock = threading.Lock()
+DURACION = Histograma('api_request_duration_seconds', 'Latencia de las peticiones por vista', BUCKETS_SEGUNDOS)
+CONSULTAS = Histograma('api_db_queries', 'Consultas SQL por petición', BUCKETS_CONSULTAS)
+DURACION_BD = Histograma('api_db_duration_seconds', 'Tiempo en la base de datos por petición', BUCKETS_SEGUNDOS)
+TAMANO = Histograma('api_response_size_bytes', 'Tamaño del cuerpo de la respuesta', BUCKETS_BYTES)
+PETICIONES = Contador('api_requests_total', 'Peticiones por vista, método y código de estado',
+                      ('view', 'method', 'status'))
+METRICAS = (PETICIONES, DURACION, CONSULTAS, DURACION_BD, TAMANO)
+_inicio_proceso = time.time()
+
+
+class MedicionBD:
+    """
+    execute_wrapper que cuenta las consultas y suma su duración. Puede estar activo
+    a la vez en varios hilos (consultas de un reporte ejecutadas con en_paralelo).
+    """
+    __slots__ = ('consultas', 'segundos', '_lock')
+
+    def __init__(self):
+        self.consultas = 0
+        self.segundos = 0.0
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            segundos = time.perf_counter() - inicio
+            with self._lock:
+                self.segundos += segundos
+                self.consultas += 1
+
+
+def registrar_peticion(vista, metodo, estado, segundos, medicion, tamano):
+    """Registra una petición terminada en todas las métricas."""
+    with _lock:
+        PETICIONES.incrementar((vista, metodo, str(estado)))
+        DURACION.observar((vista,), segundos)
+        CONSULTAS.observar((vista,), medicion.consultas)
+        DURACION_BD.observar((vista,), medicion.segundos)
+        TAMANO.observar((vista,), tamano)
+
+
+def exportar_metricas():
+    """Todas las métricas del proceso en formato de texto de Prometheus."""
+    with _lock:
+        lineas = []
+        for metrica in METRICAS:
+            lineas.extend(metrica.exportar())
+    lineas.extend([
+        '# HELP api_process_start_time_seconds Inicio del proceso (segundos desde epoch)',
+        '# TYPE api_process_start_time_seconds gauge',
+        f'api_process_start_time_seconds{{pid="{os.getpid()}"}} {_numero(_inicio_proceso)}',
+    ])
+    return '\n'.join(lineas) + '\n'
+
+
+def reiniciar_metricas():
+    """Vacía todas las series (útil para mediciones aisladas)."""
+    with _lock:
+        for metrica in METRICAS:
+            metrica.series.clear()
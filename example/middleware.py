@@ -1,5 +1,13 @@
+import contextlib
+import time
+
+from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
 from .models import UsuarioPersonalizado
+from .metricas import VISTA_SIN_RUTA, MedicionBD, registrar_peticion
 
 class UsuarioPersonalizadoMiddleware:
     """
@@ -46,3 +54,55 @@ class UsuarioPersonalizadoMiddleware:
             request.user = AnonymousUser()
         
         return None
+
+
+class MetricasMiddleware:
+    """
+    Registra latencia, consultas, tiempo en la base de datos, tamaño y código de
+    estado de cada petición, por nombre de ruta (ver example/metricas.py).
+    Debe ir primero en MIDDLEWARE para medir la petición completa.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICAS_HABILITADAS', True):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        medicion = MedicionBD()
+        inicio = time.perf_counter()
+        with self._medir_consultas(medicion):
+            response = self.get_response(request)
+
+        resolver_match = getattr(request, 'resolver_match', None)
+        vista = resolver_match.view_name if resolver_match else VISTA_SIN_RUTA
+
+        if response.streaming:
+            # Las filas de una exportación se leen mientras se envía la respuesta
+            response.streaming_content = self._medir_streaming(
+                response.streaming_content, vista, request.method, response.status_code, inicio, medicion
+            )
+            return response
+
+        registrar_peticion(vista, request.method, response.status_code,
+                           time.perf_counter() - inicio, medicion, len(response.content))
+        return response
+
+    @staticmethod
+    def _medir_consultas(medicion):
+        """Mide las consultas de todas las bases de datos (primaria y réplica)."""
+        pila = contextlib.ExitStack()
+        for conexion in connections.all():
+            pila.enter_context(conexion.execute_wrapper(medicion))
+        return pila
+
+    @staticmethod
+    def _medir_streaming(contenido, vista, metodo, estado, inicio, medicion):
+        tamano = 0
+        try:
+            with MetricasMiddleware._medir_consultas(medicion):
+                for bloque in contenido:
+                    tamano += len(bloque)
+                    yield bloque
+        finally:
+            registrar_peticion(vista, metodo, estado, time.perf_counter() - inicio, medicion, tamano)
@@ -0,0 +1,83 @@
+# Generated by Django 4.1.3 on 2026-10-18 07:13
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+import django.db.models.deletion
+
+
+def poblar_resumen_horas(apps, schema_editor):
+    """Construir el resumen diario a partir de las asistencias y ajustes existentes"""
+    Asistencia = apps.get_model('example', 'Asistencia')
+    AjusteHoras = apps.get_model('example', 'AjusteHoras')
+    ResumenHorasDiario = apps.get_model('example', 'ResumenHorasDiario')
+
+    filas = []
+    asistencias_agrupadas = Asistencia.objects.order_by().values(
+        'usuario_id', 'fecha', 'horario__sede', 'horario__jornada'
+    ).annotate(
+        horas=Sum('horas'),
+        total=Count('id'),
+        presentes=Count('id', filter=Q(presente=True)),
+        autorizadas=Count('id', filter=Q(estado_autorizacion='autorizado')),
+        pendientes=Count('id', filter=Q(estado_autorizacion='pendiente'))
+    )
+    for fila in asistencias_agrupadas:
+        filas.append(ResumenHorasDiario(
+            usuario_id=fila['usuario_id'],
+            fecha=fila['fecha'],
+            sede=fila['horario__sede'],
+            jornada=fila['horario__jornada'],
+            horas_asistencias=fila['horas'] or 0,
+            total_asistencias=fila['total'],
+            asistencias_presentes=fila['presentes'],
+            asistencias_autorizadas=fila['autorizadas'],
+            asistencias_pendientes=fila['pendientes']
+        ))
+
+    ajustes_agrupados = AjusteHoras.objects.order_by().values('usuario_id', 'fecha').annotate(
+        horas=Sum('cantidad_horas'),
+        total=Count('id')
+    )
+    for fila in ajustes_agrupados:
+        filas.append(ResumenHorasDiario(
+            usuario_id=fila['usuario_id'],
+            fecha=fila['fecha'],
+            horas_ajustes=fila['horas'] or 0,
+            total_ajustes=fila['total']
+        ))
+
+    ResumenHorasDiario.objects.bulk_create(filas, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('example', '0007_add_asistencia_timestamps'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenHorasDiario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('sede', models.CharField(blank=True, choices=[('SA', 'San Antonio'), ('BA', 'Barcelona')], default='', max_length=2)),
+                ('jornada', models.CharField(blank=True, choices=[('M', 'Mañana'), ('T', 'Tarde')], default='', max_length=1)),
+                ('horas_asistencias', models.DecimalField(decimal_places=2, default=0.0, max_digits=7)),
+                ('horas_ajustes', models.DecimalField(decimal_places=2, default=0.0, max_digits=7)),
+                ('total_asistencias', models.PositiveIntegerField(default=0)),
+                ('asistencias_presentes', models.PositiveIntegerField(default=0)),
+                ('asistencias_autorizadas', models.PositiveIntegerField(default=0)),
+                ('asistencias_pendientes', models.PositiveIntegerField(default=0)),
+                ('total_ajustes', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumenes_horas', to='example.usuariopersonalizado')),
+            ],
+            options={
+                'verbose_name': 'Resumen Diario de Horas',
+                'verbose_name_plural': 'Resúmenes Diarios de Horas',
+                'unique_together': {('usuario', 'fecha', 'sede', 'jornada')},
+            },
+        ),
+        migrations.RunPython(poblar_resumen_horas, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.1.3 on 2026-10-18 07:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('example', '0008_resumenhorasdiario'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ajustehoras',
+            index=models.Index(fields=['fecha', 'usuario'], include=('cantidad_horas',), name='ajuste_fecha_usuario_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ajustehoras',
+            index=models.Index(fields=['usuario', 'fecha'], include=('cantidad_horas',), name='ajuste_usuario_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='asistencia',
+            index=models.Index(fields=['fecha', 'usuario'], include=('horas',), name='asistencia_fecha_usuario_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='asistencia',
+            index=models.Index(fields=['fecha', 'estado_autorizacion'], name='asistencia_fecha_estado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='asistencia',
+            index=models.Index(fields=['usuario', 'fecha'], include=('horas',), name='asistencia_usuario_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='resumenhorasdiario',
+            index=models.Index(fields=['fecha', 'usuario'], include=('horas_asistencias', 'horas_ajustes', 'total_asistencias', 'total_ajustes'), name='resumen_fecha_usuario_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usuariopersonalizado',
+            index=models.Index(fields=['tipo_usuario'], name='usuario_tipo_idx'),
+        ),
+    ]
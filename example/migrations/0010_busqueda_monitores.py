@@ -0,0 +1,48 @@
+# Generated by Django 4.1.3 on 2026-10-18 07:32
+
+from django.db import migrations, models
+
+from example.busqueda import texto_busqueda
+
+
+def poblar_busqueda(apps, schema_editor):
+    """Calcular el texto de búsqueda normalizado de los usuarios existentes"""
+    UsuarioPersonalizado = apps.get_model('example', 'UsuarioPersonalizado')
+    usuarios = list(UsuarioPersonalizado.objects.only('id', 'nombre', 'username'))
+    for usuario in usuarios:
+        usuario.busqueda = texto_busqueda(usuario.nombre, usuario.username)
+    UsuarioPersonalizado.objects.bulk_update(usuarios, ['busqueda'], batch_size=1000)
+
+
+def crear_indice_trigramas(apps, schema_editor):
+    """Índice GIN de trigramas sobre busqueda (solo PostgreSQL, requiere pg_trgm)"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS usuario_busqueda_trgm_idx '
+        'ON example_usuariopersonalizado USING gin (busqueda gin_trgm_ops)'
+    )
+
+
+def eliminar_indice_trigramas(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS usuario_busqueda_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('example', '0009_indices_reportes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usuariopersonalizado',
+            name='busqueda',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(poblar_busqueda, migrations.RunPython.noop),
+        migrations.RunPython(crear_indice_trigramas, eliminar_indice_trigramas),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.1.3 on 2026-10-18 07:45
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('example', '0010_busqueda_monitores'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='horariofijo',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='ajustehoras',
+            index=models.Index(fields=['updated_at'], name='ajuste_updated_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='asistencia',
+            index=models.Index(fields=['updated_at'], name='asistencia_updated_at_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.1.3 on 2026-10-18 07:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('example', '0011_marcas_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeneracionModelo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('modelo', models.CharField(max_length=100, unique=True)),
+                ('generacion', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Generación de Modelo',
+                'verbose_name_plural': 'Generaciones de Modelos',
+            },
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.1.3 on 2026-10-18 08:06
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('example', '0012_generaciones_modelos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Trabajo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(help_text='Tipo de trabajo (ver trabajos.TIPOS_TRABAJO)', max_length=50)),
+                ('parametros', models.JSONField(blank=True, default=dict)),
+                ('huella', models.CharField(help_text='Hash del tipo y los parámetros, para deduplicar', max_length=64)),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('en_proceso', 'En proceso'), ('completado', 'Completado'), ('fallido', 'Fallido')], default='pendiente', max_length=20)),
+                ('resultado', models.BinaryField(blank=True, null=True)),
+                ('cabeceras', models.JSONField(blank=True, default=dict, help_text='Content-Type y Content-Disposition del resultado')),
+                ('codigo_estado', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('error', models.TextField(blank=True, default='')),
+                ('intentos', models.PositiveSmallIntegerField(default=0)),
+                ('trabajador', models.CharField(blank=True, default='', max_length=150)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('solicitado_por', models.ForeignKey(help_text='Directivo que encoló el trabajo', limit_choices_to={'tipo_usuario': 'DIRECTIVO'}, on_delete=django.db.models.deletion.CASCADE, related_name='trabajos', to='example.usuariopersonalizado')),
+            ],
+            options={
+                'verbose_name': 'Trabajo',
+                'verbose_name_plural': 'Trabajos',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='trabajo',
+            index=models.Index(fields=['estado', 'created_at'], name='trabajo_estado_created_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='trabajo',
+            constraint=models.UniqueConstraint(condition=models.Q(('estado__in', ['pendiente', 'en_proceso'])), fields=('huella',), name='trabajo_huella_activa_uniq'),
+        ),
+    ]
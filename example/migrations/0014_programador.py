@@ -0,0 +1,46 @@
+# Generated by Django 4.1.3 on 2026-10-18 08:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('example', '0013_trabajos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BloqueoProgramador',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=50, unique=True)),
+                ('propietario', models.CharField(max_length=150)),
+                ('vence_en', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Bloqueo del Programador',
+                'verbose_name_plural': 'Bloqueos del Programador',
+            },
+        ),
+        migrations.CreateModel(
+            name='EjecucionTarea',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tarea', models.CharField(max_length=100)),
+                ('programada_para', models.DateTimeField(help_text='Horario de la expresión cron que originó la ejecución')),
+                ('estado', models.CharField(choices=[('en_proceso', 'En proceso'), ('completada', 'Completada'), ('fallida', 'Fallida'), ('omitida', 'Omitida')], default='en_proceso', max_length=20)),
+                ('propietario', models.CharField(help_text='Proceso que la ejecutó', max_length=150)),
+                ('resultado', models.TextField(blank=True, default='')),
+                ('error', models.TextField(blank=True, default='')),
+                ('started_at', models.DateTimeField()),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Ejecución de Tarea',
+                'verbose_name_plural': 'Ejecuciones de Tareas',
+                'ordering': ['-programada_para'],
+                'unique_together': {('tarea', 'programada_para')},
+            },
+        ),
+    ]
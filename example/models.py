@@ -3,6 +3,9 @@ from django.contrib.auth.hashers import make_password, check_password
 from django.conf import settings
 from django.utils import timezone
 
+from .busqueda import texto_busqueda, invalidar_indice_monitores
+from .usuarios_cacheados import invalidar_usuario_cacheado
+
 class UsuarioPersonalizado(models.Model):
     """
     Modelo de usuario completamente personalizado, independiente de Django
@@ -19,6 +22,8 @@ class UsuarioPersonalizado(models.Model):
     is_active = models.BooleanField(default=True)
     date_joined = models.DateTimeField(auto_now_add=True)
     last_login = models.DateTimeField(null=True, blank=True)
+    # Nombre y username normalizados (sin acentos, minúsculas) para la búsqueda de monitores
+    busqueda = models.TextField(blank=True, default='', editable=False)
     
     USERNAME_FIELD = 'username'
     REQUIRED_FIELDS = ['nombre']
@@ -27,7 +32,20 @@ class UsuarioPersonalizado(models.Model):
         # Hashear la contraseña solo si no está ya hasheada
         if not self.password.startswith('pbkdf2_sha256$'):
             self.password = make_password(self.password)
+        self.busqueda = texto_busqueda(self.nombre, self.username)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'nombre', 'username'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'busqueda'}
         super().save(*args, **kwargs)
+        invalidar_indice_monitores()
+        invalidar_usuario_cacheado(self.pk)
+    
+    def delete(self, *args, **kwargs):
+        usuario_id = self.pk
+        resultado = super().delete(*args, **kwargs)
+        invalidar_indice_monitores()
+        invalidar_usuario_cacheado(usuario_id)
+        return resultado
     
     def set_password(self, raw_password):
         """Establecer la contraseña hasheada"""
@@ -47,6 +65,9 @@ class UsuarioPersonalizado(models.Model):
     class Meta:
         verbose_name = "Usuario"
         verbose_name_plural = "Usuarios"
+        indexes = [
+            models.Index(fields=['tipo_usuario'], name='usuario_tipo_idx'),
+        ]
 
 
 # 📦 Modelos (versión final)
@@ -83,6 +104,7 @@ class HorarioFijo(models.Model):
     dia_semana = models.IntegerField(choices=DIAS)
     jornada = models.CharField(max_length=1, choices=JORNADAS)
     sede = models.CharField(max_length=2, choices=SEDES)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ("usuario", "dia_semana", "jornada")
@@ -111,6 +133,15 @@ class Asistencia(models.Model):
 
     class Meta:
         unique_together = ("usuario", "fecha", "horario")
+        # Índices según las consultas de reportes y listados. En PostgreSQL incluyen
+        # las horas para que las sumas se resuelvan solo con el índice.
+        indexes = [
+            models.Index(fields=['fecha', 'usuario'], include=['horas'], name='asistencia_fecha_usuario_idx'),
+            models.Index(fields=['fecha', 'estado_autorizacion'], name='asistencia_fecha_estado_idx'),
+            models.Index(fields=['usuario', 'fecha'], include=['horas'], name='asistencia_usuario_fecha_idx'),
+            # Marca de versión para los ETag de los reportes (ver condicionales.py)
+            models.Index(fields=['updated_at'], name='asistencia_updated_at_idx'),
+        ]
 
     def __str__(self):
         estado = "Presente" if self.presente else "Pendiente"
@@ -158,6 +189,11 @@ class AjusteHoras(models.Model):
         ordering = ['-created_at']
         verbose_name = "Ajuste de Horas"
         verbose_name_plural = "Ajustes de Horas"
+        indexes = [
+            models.Index(fields=['fecha', 'usuario'], include=['cantidad_horas'], name='ajuste_fecha_usuario_idx'),
+            models.Index(fields=['usuario', 'fecha'], include=['cantidad_horas'], name='ajuste_usuario_fecha_idx'),
+            models.Index(fields=['updated_at'], name='ajuste_updated_at_idx'),
+        ]
 
     def __str__(self):
         signo = "+" if self.cantidad_horas >= 0 else ""
@@ -227,4 +263,169 @@ class ConfiguracionSistema(models.Model):
             return self.valor
 
     def __str__(self):
-        return f"{self.clave}: {self.valor} ({self.tipo_dato})"
\ No newline at end of file
+        return f"{self.clave}: {self.valor} ({self.tipo_dato})"
+
+class ResumenHorasDiario(models.Model):
+    """
+    Resumen diario de horas por monitor, fecha, sede y jornada.
+    Se mantiene al día cada vez que cambian asistencias o ajustes, para que los
+    reportes lean estas filas en lugar de agregar todo el histórico.
+    Los ajustes no tienen sede ni jornada: se guardan en la fila con sede y jornada vacías.
+    """
+    usuario = models.ForeignKey(UsuarioPersonalizado, on_delete=models.CASCADE, related_name="resumenes_horas")
+    fecha = models.DateField()
+    sede = models.CharField(max_length=2, choices=HorarioFijo.SEDES, blank=True, default='')
+    jornada = models.CharField(max_length=1, choices=HorarioFijo.JORNADAS, blank=True, default='')
+    horas_asistencias = models.DecimalField(max_digits=7, decimal_places=2, default=0.00)
+    horas_ajustes = models.DecimalField(max_digits=7, decimal_places=2, default=0.00)
+    total_asistencias = models.PositiveIntegerField(default=0)
+    asistencias_presentes = models.PositiveIntegerField(default=0)
+    asistencias_autorizadas = models.PositiveIntegerField(default=0)
+    asistencias_pendientes = models.PositiveIntegerField(default=0)
+    total_ajustes = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("usuario", "fecha", "sede", "jornada")
+        indexes = [
+            models.Index(
+                fields=['fecha', 'usuario'],
+                include=['horas_asistencias', 'horas_ajustes', 'total_asistencias', 'total_ajustes'],
+                name='resumen_fecha_usuario_idx'
+            ),
+        ]
+        verbose_name = "Resumen Diario de Horas"
+        verbose_name_plural = "Resúmenes Diarios de Horas"
+
+    def __str__(self):
+        return f"{self.usuario} - {self.fecha} {self.sede}/{self.jornada}: {self.horas_asistencias}h + {self.horas_ajustes}h"
+
+
+class GeneracionModelo(models.Model):
+    """
+    Contador de versión de un modelo (por su etiqueta, p. ej. 'example.asistencia').
+    Se incrementa al confirmar cada escritura; la caché de reportes lo incluye en sus
+    claves (ver cache_reportes.py).
+    """
+    modelo = models.CharField(max_length=100, unique=True)
+    generacion = models.BigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Generación de Modelo"
+        verbose_name_plural = "Generaciones de Modelos"
+
+    def __str__(self):
+        return f"{self.modelo}: {self.generacion}"
+
+
+class Trabajo(models.Model):
+    """
+    Trabajo en segundo plano (reporte o exportación pesada) que ejecuta el comando
+    run_jobs. Guarda los parámetros, el resultado (los bytes de la respuesta del
+    endpoint) y los tiempos de espera y ejecución (ver trabajos.py).
+    """
+    PENDIENTE = 'pendiente'
+    EN_PROCESO = 'en_proceso'
+    COMPLETADO = 'completado'
+    FALLIDO = 'fallido'
+    ESTADOS = [
+        (PENDIENTE, 'Pendiente'),
+        (EN_PROCESO, 'En proceso'),
+        (COMPLETADO, 'Completado'),
+        (FALLIDO, 'Fallido'),
+    ]
+    ESTADOS_ACTIVOS = (PENDIENTE, EN_PROCESO)
+    ESTADOS_TERMINADOS = (COMPLETADO, FALLIDO)
+
+    tipo = models.CharField(max_length=50, help_text="Tipo de trabajo (ver trabajos.TIPOS_TRABAJO)")
+    parametros = models.JSONField(default=dict, blank=True)
+    huella = models.CharField(max_length=64, help_text="Hash del tipo y los parámetros, para deduplicar")
+    estado = models.CharField(max_length=20, choices=ESTADOS, default=PENDIENTE)
+    solicitado_por = models.ForeignKey(
+        UsuarioPersonalizado,
+        on_delete=models.CASCADE,
+        related_name="trabajos",
+        limit_choices_to={'tipo_usuario': 'DIRECTIVO'},
+        help_text="Directivo que encoló el trabajo"
+    )
+    resultado = models.BinaryField(null=True, blank=True)
+    cabeceras = models.JSONField(default=dict, blank=True, help_text="Content-Type y Content-Disposition del resultado")
+    codigo_estado = models.PositiveSmallIntegerField(null=True, blank=True)
+    error = models.TextField(blank=True, default='')
+    intentos = models.PositiveSmallIntegerField(default=0)
+    trabajador = models.CharField(max_length=150, blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Trabajo"
+        verbose_name_plural = "Trabajos"
+        indexes = [
+            models.Index(fields=['estado', 'created_at'], name='trabajo_estado_created_idx'),
+        ]
+        constraints = [
+            # Un solo trabajo activo por tipo y parámetros
+            models.UniqueConstraint(
+                fields=['huella'],
+                condition=models.Q(estado__in=['pendiente', 'en_proceso']),
+                name='trabajo_huella_activa_uniq'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.tipo} #{self.id} [{self.estado}]"
+
+
+class EjecucionTarea(models.Model):
+    """
+    Historial de las tareas periódicas del programador (ver programador.py): una
+    fila por horario atendido, con su estado, resultado y tiempos.
+    """
+    EN_PROCESO = 'en_proceso'
+    COMPLETADA = 'completada'
+    FALLIDA = 'fallida'
+    OMITIDA = 'omitida'
+    ESTADOS = [
+        (EN_PROCESO, 'En proceso'),
+        (COMPLETADA, 'Completada'),
+        (FALLIDA, 'Fallida'),
+        (OMITIDA, 'Omitida'),
+    ]
+
+    tarea = models.CharField(max_length=100)
+    programada_para = models.DateTimeField(help_text="Horario de la expresión cron que originó la ejecución")
+    estado = models.CharField(max_length=20, choices=ESTADOS, default=EN_PROCESO)
+    propietario = models.CharField(max_length=150, help_text="Proceso que la ejecutó")
+    resultado = models.TextField(blank=True, default='')
+    error = models.TextField(blank=True, default='')
+    started_at = models.DateTimeField()
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-programada_para']
+        unique_together = ("tarea", "programada_para")
+        verbose_name = "Ejecución de Tarea"
+        verbose_name_plural = "Ejecuciones de Tareas"
+
+    def __str__(self):
+        return f"{self.tarea} {self.programada_para:%Y-%m-%d %H:%M} [{self.estado}]"
+
+
+class BloqueoProgramador(models.Model):
+    """
+    Arrendamiento del liderazgo del programador en bases de datos sin advisory
+    locks o detrás de un pooler en modo transacción (DB_PGBOUNCER): el proceso
+    propietario lo renueva mientras vive.
+    """
+    nombre = models.CharField(max_length=50, unique=True)
+    propietario = models.CharField(max_length=150)
+    vence_en = models.DateTimeField()
+
+    class Meta:
+        verbose_name = "Bloqueo del Programador"
+        verbose_name_plural = "Bloqueos del Programador"
+
+    def __str__(self):
+        return f"{self.nombre}: {self.propietario} hasta {self.vence_en}"
@@ -0,0 +1,94 @@
+"""
+Paginación por cursor (keyset) del listado de asistencias de directivos.
+
+El orden del listado es (-fecha, usuario__nombre, horario__jornada, usuario_id,
+horario_id). La clave incluye (usuario, fecha, horario), el unique_together de
+Asistencia, así que identifica una asistencia de forma única aunque un monitor
+tenga dos asistencias el mismo día en la misma jornada (el POST no exige que el
+día del horario coincida con la fecha). Las asistencias virtuales (sin id) también
+tienen horario_id, por eso no se usa el id como último criterio.
+
+El nombre se ordena y se compara con una intercalación binaria (C en PostgreSQL,
+BINARY en SQLite), es decir, por punto de código como las cadenas de Python. Así
+el orden de la base de datos coincide con el de clave_asistencia, que ordena en
+Python las páginas que mezclan asistencias virtuales; con la intercalación del
+idioma (acentos, mayúsculas) el cursor podía saltarse filas.
+El cursor es la clave de la última fila entregada, codificada en base64; cada
+página filtra "después del cursor" en lugar de usar OFFSET, así que una página
+profunda cuesta lo mismo que la primera.
+"""
+import base64
+import json
+from datetime import date
+
+from django.db.models import F, Q
+from django.db.models.functions import Collate
+
+
+class NombreBinario(Collate):
+    """usuario__nombre con intercalación binaria (orden por punto de código)."""
+
+    INTERCALACIONES = {'postgresql': 'C', 'sqlite': 'BINARY'}
+
+    def __init__(self):
+        super().__init__(F('usuario__nombre'), 'C')
+
+    def as_sql(self, compiler, connection, **extra_context):
+        intercalacion = self.INTERCALACIONES.get(connection.vendor)
+        if intercalacion is None:
+            return compiler.compile(self.source_expressions[0])
+        extra_context.setdefault('collation', connection.ops.quote_name(intercalacion))
+        return super().as_sql(compiler, connection, **extra_context)
+
+
+ORDEN_ASISTENCIAS = ('-fecha', NombreBinario().asc(), 'horario__jornada', 'usuario_id', 'horario_id')
+TAMANO_PAGINA_POR_DEFECTO = 100
+TAMANO_PAGINA_MAXIMO = 1000
+
+
+class CursorInvalido(ValueError):
+    pass
+
+
+def clave_asistencia(asistencia):
+    """Clave de orden de una asistencia (real o virtual), comparable en Python."""
+    return (
+        -asistencia.fecha.toordinal(), asistencia.usuario.nombre, asistencia.horario.jornada,
+        asistencia.usuario_id, asistencia.horario_id
+    )
+
+
+def codificar_cursor(asistencia):
+    valores = [
+        asistencia.fecha.isoformat(), asistencia.usuario.nombre, asistencia.horario.jornada,
+        asistencia.usuario_id, asistencia.horario_id
+    ]
+    return base64.urlsafe_b64encode(json.dumps(valores).encode()).decode()
+
+
+def decodificar_cursor(cursor):
+    """Retorna (fecha, nombre, jornada, usuario_id, horario_id); lanza CursorInvalido si no se puede leer."""
+    try:
+        fecha, nombre, jornada, usuario_id, horario_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return date.fromisoformat(fecha), str(nombre), str(jornada), int(usuario_id), int(horario_id)
+    except (ValueError, TypeError):
+        raise CursorInvalido('Cursor inválido')
+
+
+def filtrar_despues_de(asistencias_qs, cursor):
+    """Filtra las asistencias que van después del cursor en ORDEN_ASISTENCIAS."""
+    fecha, nombre, jornada, usuario_id, horario_id = cursor
+    return asistencias_qs.alias(nombre_binario=NombreBinario()).filter(
+        Q(fecha__lt=fecha)
+        | Q(fecha=fecha, nombre_binario__gt=nombre)
+        | Q(fecha=fecha, nombre_binario=nombre, horario__jornada__gt=jornada)
+        | Q(fecha=fecha, nombre_binario=nombre, horario__jornada=jornada, usuario_id__gt=usuario_id)
+        | Q(fecha=fecha, nombre_binario=nombre, horario__jornada=jornada, usuario_id=usuario_id,
+            horario_id__gt=horario_id)
+    )
+
+
+def esta_despues_de(asistencia, cursor):
+    """Equivalente en Python de filtrar_despues_de, para asistencias virtuales."""
+    fecha, nombre, jornada, usuario_id, horario_id = cursor
+    return clave_asistencia(asistencia) > (-fecha.toordinal(), nombre, jornada, usuario_id, horario_id)
@@ -0,0 +1,38 @@
+from rest_framework.exceptions import NotAuthenticated
+from rest_framework.permissions import BasePermission
+
+from .authentication import RECOLECTOR_METRICAS
+
+
+class IsAutenticado(BasePermission):
+    """
+    Usuario autenticado con token (de cualquier tipo, o del tipo_usuario indicado
+    en las subclases). Sin token responde 401 con el mismo formato de siempre.
+    """
+    tipo_usuario = None
+
+    def has_permission(self, request, view):
+        if request.auth is None:
+            raise NotAuthenticated({'detail': 'Token de autenticación requerido', 'code': 'token_required'})
+        return self.tipo_usuario is None or request.user.tipo_usuario == self.tipo_usuario
+
+
+class IsDirectivo(IsAutenticado):
+    """Solo usuarios DIRECTIVO."""
+    tipo_usuario = 'DIRECTIVO'
+    message = 'Acceso denegado. Solo directivos pueden acceder a este endpoint.'
+
+
+class IsMonitor(IsAutenticado):
+    """Solo usuarios MONITOR."""
+    tipo_usuario = 'MONITOR'
+    message = 'Solo monitores pueden acceder a este endpoint'
+
+
+class IsRecolectorMetricas(IsDirectivo):
+    """El recolector de métricas (token METRICAS_TOKEN) o un usuario DIRECTIVO."""
+
+    def has_permission(self, request, view):
+        if request.auth == RECOLECTOR_METRICAS:
+            return True
+        return super().has_permission(request, view)
@@ -0,0 +1,382 @@
+"""
+Programador de tareas periódicas (mantenimiento) dentro de los procesos de la aplicación.
+
+Las tareas se registran en código con @tarea_periodica y una expresión tipo cron
+de 5 campos (minuto hora día-del-mes mes día-de-la-semana, en la zona horaria
+TIME_ZONE); las de la aplicación están en tareas_periodicas.py. Con
+PROGRAMADOR_ACTIVO el programador corre en un hilo de cada proceso (servidor web o
+manage.py run_jobs), pero solo uno de todos ejecuta tareas, el líder:
+
+- en PostgreSQL con conexión directa, el proceso que tiene el advisory lock de
+  sesión CLAVE_BLOQUEO, en una conexión propia fuera del pool; si el proceso
+  muere, PostgreSQL lo libera
+- con DB_PGBOUNCER y en otras bases de datos, el que tiene vigente la fila de
+  BloqueoProgramador (un arrendamiento que renueva en cada paso y vence tras tres
+  pasos sin renovar). Un pooler en modo transacción reparte las sentencias entre
+  sesiones del servidor, así que un lock de sesión no identifica a un proceso:
+  quedaría tomado en una sesión compartida y otro proceso que cayera en ella también
+  lo obtendría
+
+Cada ejecución queda en EjecucionTarea con su hora programada, estado y tiempos.
+La restricción única (tarea, programada_para) garantiza que cada horario se
+ejecute una sola vez aunque el liderazgo cambie de proceso. Si la ejecución
+anterior de una tarea sigue en curso, el nuevo horario se registra como omitido.
+Los horarios perdidos mientras no había líder se recuperan (solo el más reciente
+de cada tarea) si caen dentro de PROGRAMADOR_RECUPERACION_MINUTOS.
+
+Programador recibe el reloj como parámetro y paso() hace una sola iteración, de
+modo que se puede ejecutar con un reloj simulado y sin hilos (en_linea=True).
+"""
+import logging
+import os
+import socket
+import threading
+import zlib
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import IntegrityError, close_old_connections, connection, connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import BloqueoProgramador, EjecucionTarea
+
+logger = logging.getLogger(__name__)
+
+NOMBRE_BLOQUEO = 'programador'
+# Clave del advisory lock de PostgreSQL (entero de 32 bits estable entre procesos)
+CLAVE_BLOQUEO = zlib.crc32(b'example.programador')
+PASOS_ARRENDAMIENTO = 3
+MAXIMO_RESULTADO = 1000
+
+# (nombre del campo, mínimo, máximo)
+_CAMPOS_CRON = (('minuto', 0, 59), ('hora', 0, 23), ('dia', 1, 31), ('mes', 1, 12), ('dia_semana', 0, 7))
+
+
+class ExpresionCron:
+    """
+    Expresión cron de 5 campos con *, valores, rangos (a-b), listas (a,b) y pasos
+    (*/n, a-b/n). En día de la semana 0 y 7 son domingo. Como en cron, si se
+    restringen tanto el día del mes como el de la semana, basta con que coincida uno.
+    """
+
+    def __init__(self, expresion):
+        partes = expresion.split()
+        if len(partes) != len(_CAMPOS_CRON):
+            raise ValueError(f'La expresión cron "{expresion}" debe tener 5 campos')
+        self.expresion = expresion
+        self.valores = {}
+        for parte, (nombre, minimo, maximo) in zip(partes, _CAMPOS_CRON):
+            self.valores[nombre] = self._campo(parte, nombre, minimo, maximo)
+        if 7 in self.valores['dia_semana']:
+            self.valores['dia_semana'] = (self.valores['dia_semana'] - {7}) | {0}
+        # Como en cron, un campo que empieza con * (también */n) no restringe el día
+        self.dia_restringido = not partes[2].startswith('*')
+        self.dia_semana_restringido = not partes[4].startswith('*')
+
+    @staticmethod
+    def _campo(parte, nombre, minimo, maximo):
+        valores = set()
+        for elemento in parte.split(','):
+            rango, _, paso = elemento.partition('/')
+            try:
+                paso = int(paso) if paso else 1
+                if rango == '*':
+                    inicio, fin = minimo, maximo
+                elif '-' in rango:
+                    inicio, fin = (int(valor) for valor in rango.split('-', 1))
+                else:
+                    # Un valor con paso (p. ej. 5/15) va hasta el máximo, como en cron
+                    inicio = int(rango)
+                    fin = maximo if '/' in elemento else inicio
+            except ValueError:
+                raise ValueError(f'Valor inválido "{elemento}" en el campo {nombre}')
+            if paso < 1 or not minimo <= inicio <= fin <= maximo:
+                raise ValueError(f'Valor fuera de rango "{elemento}" en el campo {nombre} ({minimo}-{maximo})')
+            valores.update(range(inicio, fin + 1, paso))
+        return valores
+
+    def coincide(self, momento):
+        """True si el minuto de `momento` (hora local) cumple la expresión."""
+        if momento.minute not in self.valores['minuto'] or momento.hour not in self.valores['hora']:
+            return False
+        if momento.month not in self.valores['mes']:
+            return False
+        dia = momento.day in self.valores['dia']
+        dia_semana = (momento.isoweekday() % 7) in self.valores['dia_semana']
+        if self.dia_restringido and self.dia_semana_restringido:
+            return dia or dia_semana
+        return dia and dia_semana
+
+    def ultima_coincidencia(self, desde, hasta):
+        """Último minuto de (desde, hasta] que cumple la expresión, o None."""
+        minuto = timezone.localtime(hasta).replace(second=0, microsecond=0)
+        limite = timezone.localtime(desde)
+        while minuto > limite:
+            if self.coincide(minuto):
+                return minuto
+            minuto -= timedelta(minutes=1)
+        return None
+
+    def __str__(self):
+        return self.expresion
+
+
+# duracion_maxima: tras este tiempo una ejecución en proceso se da por abandonada
+Tarea = namedtuple('Tarea', 'nombre cron funcion duracion_maxima')
+
+TAREAS = {}
+
+
+def tarea_periodica(cron, nombre=None, duracion_maxima=timedelta(hours=1)):
+    """Decorador que registra una función sin argumentos como tarea periódica."""
+    expresion = ExpresionCron(cron)
+
+    def decorador(funcion):
+        nombre_tarea = nombre or funcion.__name__
+        TAREAS[nombre_tarea] = Tarea(nombre_tarea, expresion, funcion, duracion_maxima)
+        return funcion
+    return decorador
+
+
+class _BloqueoAsesor:
+    """Liderazgo con pg_try_advisory_lock en una sesión de PostgreSQL propia del programador."""
+
+    def __init__(self):
+        self.conexion = None
+
+    def _nueva_conexion(self):
+        # Backend de PostgreSQL sin pool: el lock vive lo que vive la sesión
+        from django.db.backends.postgresql.base import DatabaseWrapper
+        return DatabaseWrapper(connections['default'].settings_dict.copy(), 'default')
+
+    def adquirir(self, ahora):
+        if self.conexion is not None:
+            try:
+                with self.conexion.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+                return True
+            except Exception:
+                logger.warning('Se perdió la conexión del bloqueo del programador')
+                self.liberar(ahora)
+        conexion = self._nueva_conexion()
+        try:
+            with conexion.cursor() as cursor:
+                cursor.execute('SELECT pg_try_advisory_lock(%s)', [CLAVE_BLOQUEO])
+                adquirido = cursor.fetchone()[0]
+        except Exception:
+            conexion.close()
+            raise
+        if adquirido:
+            self.conexion = conexion
+        else:
+            conexion.close()
+        return adquirido
+
+    def liberar(self, ahora):
+        if self.conexion is None:
+            return
+        try:
+            with self.conexion.cursor() as cursor:
+                cursor.execute('SELECT pg_advisory_unlock(%s)', [CLAVE_BLOQUEO])
+        except Exception:
+            pass
+        finally:
+            self.conexion.close()
+            self.conexion = None
+
+
+class _BloqueoFila:
+    """Liderazgo con un arrendamiento en BloqueoProgramador (bases de datos sin advisory locks)."""
+
+    def __init__(self, propietario, duracion):
+        self.propietario = propietario
+        self.duracion = duracion
+
+    def adquirir(self, ahora):
+        filas = BloqueoProgramador.objects.filter(nombre=NOMBRE_BLOQUEO).filter(
+            Q(propietario=self.propietario) | Q(vence_en__lt=ahora)
+        )
+        if filas.update(propietario=self.propietario, vence_en=ahora + self.duracion):
+            return True
+        _, creado = BloqueoProgramador.objects.get_or_create(
+            nombre=NOMBRE_BLOQUEO, defaults={'propietario': self.propietario, 'vence_en': ahora + self.duracion}
+        )
+        return creado
+
+    def liberar(self, ahora):
+        BloqueoProgramador.objects.filter(nombre=NOMBRE_BLOQUEO, propietario=self.propietario).update(
+            vence_en=ahora - timedelta(seconds=1)
+        )
+
+
+def _truncar(valor):
+    return '' if valor is None else str(valor)[:MAXIMO_RESULTADO]
+
+
+class Programador:
+    """
+    Ejecuta las tareas registradas cuando este proceso es el líder.
+    reloj: función que retorna la hora actual (aware); en_linea: ejecutar las
+    tareas en el mismo hilo de paso() en lugar de un hilo por ejecución.
+    """
+
+    def __init__(self, tareas=None, reloj=timezone.now, intervalo=None, en_linea=False, propietario=None):
+        self.tareas = dict(TAREAS if tareas is None else tareas)
+        self.reloj = reloj
+        self.intervalo = settings.PROGRAMADOR_INTERVALO_SEGUNDOS if intervalo is None else intervalo
+        self.en_linea = en_linea
+        self.propietario = propietario or f'{socket.gethostname()}:{os.getpid()}:{id(self):x}'
+        if connection.vendor == 'postgresql' and not settings.DB_PGBOUNCER:
+            self.bloqueo = _BloqueoAsesor()
+        else:
+            self.bloqueo = _BloqueoFila(self.propietario, timedelta(seconds=self.intervalo * PASOS_ARRENDAMIENTO))
+        self.es_lider = False
+        self._ultimo_paso = None
+        self._atendidos = {}
+        self._en_curso = {}
+        self._detener = threading.Event()
+        self._hilo = None
+
+    def paso(self):
+        """
+        Una iteración: renueva o intenta obtener el liderazgo y, si lo tiene, lanza
+        las tareas con un horario vencido. Retorna las EjecucionTarea creadas.
+        """
+        ahora = self.reloj()
+        lider = self.bloqueo.adquirir(ahora)
+        if lider != self.es_lider:
+            logger.info('Programador %s: %s', self.propietario, 'es el líder' if lider else 'ya no es el líder')
+            self.es_lider = lider
+        if not lider:
+            self._ultimo_paso = None
+            return []
+
+        desde = ahora - timedelta(minutes=settings.PROGRAMADOR_RECUPERACION_MINUTOS)
+        if self._ultimo_paso is not None and self._ultimo_paso > desde:
+            desde = self._ultimo_paso
+        self._ultimo_paso = ahora
+
+        ejecuciones = []
+        for tarea in self.tareas.values():
+            horario = tarea.cron.ultima_coincidencia(desde, ahora)
+            if horario is None or self._atendidos.get(tarea.nombre) == horario:
+                continue
+            self._atendidos[tarea.nombre] = horario
+            ejecucion = self._registrar(tarea, horario, ahora)
+            if ejecucion is None:
+                continue
+            ejecuciones.append(ejecucion)
+            if ejecucion.estado == EjecucionTarea.EN_PROCESO:
+                self._lanzar(tarea, ejecucion)
+        return ejecuciones
+
+    def _en_proceso(self, tarea, ahora):
+        """True si la tarea tiene una ejecución en curso (en este u otro proceso)."""
+        hilo = self._en_curso.get(tarea.nombre)
+        if hilo is not None and hilo.is_alive():
+            return True
+        # Las ejecuciones en proceso más viejas que duracion_maxima quedaron abandonadas
+        EjecucionTarea.objects.filter(
+            tarea=tarea.nombre, estado=EjecucionTarea.EN_PROCESO, started_at__lt=ahora - tarea.duracion_maxima
+        ).update(estado=EjecucionTarea.FALLIDA, finished_at=ahora, error='Ejecución abandonada')
+        return EjecucionTarea.objects.filter(tarea=tarea.nombre, estado=EjecucionTarea.EN_PROCESO).exists()
+
+    def _registrar(self, tarea, horario, ahora):
+        """Crea la ejecución del horario, o None si otro líder ya lo atendió."""
+        if self._en_proceso(tarea, ahora):
+            estado, error, finished_at = EjecucionTarea.OMITIDA, 'La ejecución anterior sigue en curso', ahora
+        else:
+            estado, error, finished_at = EjecucionTarea.EN_PROCESO, '', None
+        try:
+            with transaction.atomic():
+                return EjecucionTarea.objects.create(
+                    tarea=tarea.nombre, programada_para=horario, estado=estado, propietario=self.propietario,
+                    started_at=ahora, finished_at=finished_at, error=error
+                )
+        except IntegrityError:
+            return None
+
+    def _lanzar(self, tarea, ejecucion):
+        if self.en_linea:
+            self._ejecutar(tarea, ejecucion)
+            return
+        hilo = threading.Thread(
+            target=self._ejecutar, args=(tarea, ejecucion, True), name=f'tarea-{tarea.nombre}', daemon=True
+        )
+        self._en_curso[tarea.nombre] = hilo
+        hilo.start()
+
+    def _ejecutar(self, tarea, ejecucion, en_hilo=False):
+        try:
+            try:
+                resultado = tarea.funcion()
+            except Exception as exc:
+                logger.exception('Error en la tarea periódica %s', tarea.nombre)
+                campos = {'estado': EjecucionTarea.FALLIDA, 'error': _truncar(f'{type(exc).__name__}: {exc}')}
+            else:
+                campos = {'estado': EjecucionTarea.COMPLETADA, 'resultado': _truncar(resultado)}
+            EjecucionTarea.objects.filter(pk=ejecucion.pk, estado=EjecucionTarea.EN_PROCESO).update(
+                finished_at=self.reloj(), **campos
+            )
+        finally:
+            if en_hilo:
+                close_old_connections()
+
+    def _bucle(self):
+        while True:
+            try:
+                self.paso()
+            except Exception:
+                logger.exception('Error en el programador de tareas')
+                self.es_lider = False
+            finally:
+                close_old_connections()
+            if self._detener.wait(self.intervalo):
+                break
+        try:
+            self.bloqueo.liberar(self.reloj())
+        except Exception:
+            logger.exception('No se pudo liberar el bloqueo del programador')
+        close_old_connections()
+
+    def iniciar(self):
+        self._hilo = threading.Thread(target=self._bucle, name='programador', daemon=True)
+        self._hilo.start()
+
+    def detener(self, esperar=True):
+        """Detiene el bucle y libera el liderazgo. Las tareas en curso siguen hasta terminar."""
+        self._detener.set()
+        if esperar and self._hilo is not None:
+            self._hilo.join()
+        if esperar:
+            for hilo in list(self._en_curso.values()):
+                hilo.join()
+
+
+_lock = threading.Lock()
+_estado = {'pid': None, 'programador': None}
+
+
+def iniciar_programador():
+    """Inicia (una vez por proceso) el hilo del programador si PROGRAMADOR_ACTIVO."""
+    if not settings.PROGRAMADOR_ACTIVO:
+        return None
+    pid = os.getpid()  # tras un fork el hilo del proceso padre no existe en el hijo
+    if _estado['pid'] != pid:
+        with _lock:
+            if _estado['pid'] != pid:
+                programador = Programador()
+                programador.iniciar()
+                _estado['programador'] = programador
+                _estado['pid'] = pid
+    return _estado['programador']
+
+
+def _al_iniciar_peticion(sender, **kwargs):
+    iniciar_programador()
+
+
+request_started.connect(_al_iniciar_peticion, dispatch_uid='programador_iniciar')
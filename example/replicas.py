@@ -0,0 +1,81 @@
+"""
+Lecturas de los reportes en una réplica de la base de datos.
+
+Si DATABASES tiene el alias 'replica' (DB_REPLICA_URL en settings), las vistas
+decoradas con @lectura_en_replica leen de la réplica, de modo que los reportes
+pesados no compiten con las escrituras (p. ej. monitor_marcar al inicio de cada
+jornada). Todas las escrituras van a la primaria y, desde la primera escritura de
+la petición, también las lecturas siguientes ("pegado a la primaria"), para que
+la petición vea lo que acaba de escribir.
+
+El estado vive en un ContextVar: es propio de cada petición (hilo o tarea) y se
+restaura al salir de la vista. Fuera de las vistas decoradas el enrutador no
+interviene y todo va a 'default'.
+
+La réplica puede ir unos segundos atrasada: un reporte pedido justo después de
+una escritura hecha en otra petición puede no incluirla todavía.
+"""
+import contextvars
+import functools
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+ALIAS_REPLICA = 'replica'
+
+# None fuera de las vistas de reportes; dentro, {'primaria': True} tras escribir
+_lectura = contextvars.ContextVar('lectura_en_replica', default=None)
+
+
+def replica_configurada():
+    return ALIAS_REPLICA in settings.DATABASES
+
+
+def alias_lectura():
+    """Alias del que lee la petición actual ('replica' o 'default')."""
+    estado = _lectura.get()
+    if estado is None or estado['primaria'] or not replica_configurada():
+        return DEFAULT_DB_ALIAS
+    return ALIAS_REPLICA
+
+
+class EnrutadorReplica:
+    """Enrutador de DATABASE_ROUTERS para las lecturas de reportes."""
+
+    def db_for_read(self, model, **hints):
+        if _lectura.get() is None:
+            return None
+        # Explícito también para 'default': sin router, Django leería los objetos
+        # relacionados de la base de datos de la instancia (la réplica)
+        return alias_lectura()
+
+    def db_for_write(self, model, **hints):
+        estado = _lectura.get()
+        if estado is not None:
+            estado['primaria'] = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # La réplica tiene los mismos datos que la primaria
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
+
+
+def lectura_en_replica(vista):
+    """
+    Decorador para vistas GET de reportes: sus lecturas van a la réplica hasta que
+    la petición escribe algo. Va debajo de @permission_classes y encima de los
+    decoradores de caché y ETag, para que estos también lean de la réplica.
+    """
+    @functools.wraps(vista)
+    def envoltura(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return vista(request, *args, **kwargs)
+        token = _lectura.set({'primaria': False})
+        try:
+            return vista(request, *args, **kwargs)
+        finally:
+            _lectura.reset(token)
+    return envoltura
@@ -0,0 +1,265 @@
+"""
+Motor de reportes de horas.
+
+Calcula las horas de todos los monitores con un número constante de consultas
+agrupadas por usuario, en lugar de consultar monitor por monitor. Las consultas
+se exponen por separado (consultas_* / combinar_*) para que cada reporte ejecute
+en paralelo, con en_paralelo, todas las que no dependen entre sí.
+
+Si RESUMEN_HORAS_DIARIO está activo, los agregados se leen del resumen diario
+(ResumenHorasDiario) en lugar de recorrer las asistencias y ajustes originales.
+"""
+from functools import partial
+
+from django.conf import settings
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncWeek
+
+from .concurrencia import en_paralelo
+from .models import UsuarioPersonalizado, Asistencia, AjusteHoras, ResumenHorasDiario
+from .serializacion import asistencias_a_dicts, ajustes_a_dicts
+
+
+def _filtrar_asistencias(fecha_inicio, fecha_fin, sede=None, jornada=None, monitor_ids=None):
+    """Asistencias de monitores en el rango, con los mismos filtros que los reportes."""
+    asistencias_qs = Asistencia.objects.filter(
+        usuario__tipo_usuario='MONITOR',
+        fecha__gte=fecha_inicio,
+        fecha__lte=fecha_fin
+    )
+    if sede:
+        asistencias_qs = asistencias_qs.filter(horario__sede=sede)
+    if jornada:
+        asistencias_qs = asistencias_qs.filter(horario__jornada=jornada)
+    if monitor_ids is not None:
+        asistencias_qs = asistencias_qs.filter(usuario_id__in=monitor_ids)
+    return asistencias_qs
+
+
+def _filtrar_ajustes(fecha_inicio, fecha_fin, monitor_ids=None):
+    """Ajustes de monitores en el rango (los ajustes no dependen de sede ni jornada)."""
+    ajustes_qs = AjusteHoras.objects.filter(
+        usuario__tipo_usuario='MONITOR',
+        fecha__gte=fecha_inicio,
+        fecha__lte=fecha_fin
+    )
+    if monitor_ids is not None:
+        ajustes_qs = ajustes_qs.filter(usuario_id__in=monitor_ids)
+    return ajustes_qs
+
+
+def _agregados_desde_resumen(fecha_inicio, fecha_fin, sede=None, jornada=None, monitor_ids=None):
+    """Agregados por monitor leídos del resumen diario (mismo formato que los originales)."""
+    resumen_qs = ResumenHorasDiario.objects.filter(
+        usuario__tipo_usuario='MONITOR',
+        fecha__gte=fecha_inicio,
+        fecha__lte=fecha_fin
+    )
+    if monitor_ids is not None:
+        resumen_qs = resumen_qs.filter(usuario_id__in=monitor_ids)
+
+    # Las filas de asistencias se filtran por sede/jornada; las de ajustes no
+    asistencias_qs = resumen_qs.filter(total_asistencias__gt=0)
+    if sede:
+        asistencias_qs = asistencias_qs.filter(sede=sede)
+    if jornada:
+        asistencias_qs = asistencias_qs.filter(jornada=jornada)
+
+    asistencias_agrupadas = asistencias_qs.order_by().values('usuario_id').annotate(
+        horas=Sum('horas_asistencias'),
+        total=Sum('total_asistencias'),
+        presentes=Sum('asistencias_presentes'),
+        autorizadas=Sum('asistencias_autorizadas')
+    )
+    ajustes_agrupados = resumen_qs.filter(total_ajustes__gt=0).order_by().values('usuario_id').annotate(
+        horas=Sum('horas_ajustes'),
+        total=Sum('total_ajustes')
+    )
+    return asistencias_agrupadas, ajustes_agrupados
+
+
+def _agregados_desde_origen(fecha_inicio, fecha_fin, sede=None, jornada=None, monitor_ids=None):
+    """Agregados por monitor calculados sobre Asistencia y AjusteHoras."""
+    asistencias_agrupadas = _filtrar_asistencias(
+        fecha_inicio, fecha_fin, sede, jornada, monitor_ids
+    ).order_by().values('usuario_id').annotate(
+        horas=Sum('horas'),
+        total=Count('id'),
+        presentes=Count('id', filter=Q(presente=True)),
+        autorizadas=Count('id', filter=Q(estado_autorizacion='autorizado'))
+    )
+    ajustes_agrupados = _filtrar_ajustes(
+        fecha_inicio, fecha_fin, monitor_ids
+    ).order_by().values('usuario_id').annotate(
+        horas=Sum('cantidad_horas'),
+        total=Count('id')
+    )
+    return asistencias_agrupadas, ajustes_agrupados
+
+
+def consultas_horas_por_monitor(fecha_inicio, fecha_fin, sede=None, jornada=None, monitor_ids=None):
+    """
+    Las dos consultas agrupadas por monitor (asistencias y ajustes) en el período,
+    para ejecutarlas con en_paralelo junto con otras y combinar sus filas con
+    combinar_horas_por_monitor.
+    """
+    if getattr(settings, 'RESUMEN_HORAS_DIARIO', False):
+        return _agregados_desde_resumen(fecha_inicio, fecha_fin, sede, jornada, monitor_ids)
+    return _agregados_desde_origen(fecha_inicio, fecha_fin, sede, jornada, monitor_ids)
+
+
+def combinar_horas_por_monitor(asistencias_agrupadas, ajustes_agrupados):
+    """
+    Diccionario monitor_id -> horas_asistencias, horas_ajustes, horas_totales,
+    total_asistencias, total_ajustes, asistencias_presentes, asistencias_autorizadas.
+    Solo aparecen los monitores con asistencias o ajustes en el período.
+    """
+    resultado = {}
+
+    def _fila(monitor_id):
+        if monitor_id not in resultado:
+            resultado[monitor_id] = {
+                'horas_asistencias': 0.0,
+                'horas_ajustes': 0.0,
+                'horas_totales': 0.0,
+                'total_asistencias': 0,
+                'total_ajustes': 0,
+                'asistencias_presentes': 0,
+                'asistencias_autorizadas': 0
+            }
+        return resultado[monitor_id]
+
+    for fila in asistencias_agrupadas:
+        datos = _fila(fila['usuario_id'])
+        datos['horas_asistencias'] = float(fila['horas'] or 0)
+        datos['total_asistencias'] = fila['total']
+        datos['asistencias_presentes'] = fila['presentes']
+        datos['asistencias_autorizadas'] = fila['autorizadas']
+
+    for fila in ajustes_agrupados:
+        datos = _fila(fila['usuario_id'])
+        datos['horas_ajustes'] = float(fila['horas'] or 0)
+        datos['total_ajustes'] = fila['total']
+
+    for datos in resultado.values():
+        datos['horas_totales'] = datos['horas_asistencias'] + datos['horas_ajustes']
+
+    return resultado
+
+
+def consultas_horas_por_semana(fecha_inicio, fecha_fin):
+    """
+    Horas reales (asistencias + ajustes) agrupadas por semana ISO y monitor en el
+    rango: una consulta por tabla de origen (una sola si se lee el resumen diario).
+    """
+    if getattr(settings, 'RESUMEN_HORAS_DIARIO', False):
+        return [ResumenHorasDiario.objects.filter(
+            usuario__tipo_usuario='MONITOR',
+            fecha__gte=fecha_inicio,
+            fecha__lte=fecha_fin
+        ).annotate(semana=TruncWeek('fecha')).order_by().values('semana', 'usuario_id').annotate(
+            horas=Sum(F('horas_asistencias') + F('horas_ajustes'))
+        )]
+    return [
+        _filtrar_asistencias(fecha_inicio, fecha_fin).annotate(
+            semana=TruncWeek('fecha')
+        ).order_by().values('semana', 'usuario_id').annotate(horas=Sum('horas')),
+        _filtrar_ajustes(fecha_inicio, fecha_fin).annotate(
+            semana=TruncWeek('fecha')
+        ).order_by().values('semana', 'usuario_id').annotate(horas=Sum('cantidad_horas')),
+    ]
+
+
+def combinar_horas_por_semana(*filas_por_consulta):
+    """Diccionario (lunes_de_la_semana, monitor_id) -> horas a partir de las filas de consultas_horas_por_semana."""
+    horas_por_semana = {}
+    for filas in filas_por_consulta:
+        for fila in filas:
+            semana = fila['semana']
+            if hasattr(semana, 'date'):
+                semana = semana.date()
+            clave = (semana, fila['usuario_id'])
+            horas_por_semana[clave] = horas_por_semana.get(clave, 0.0) + float(fila['horas'] or 0)
+    return horas_por_semana
+
+
+def reporte_horas_todos(fecha_inicio, fecha_fin, sede=None, jornada=None):
+    """
+    Reporte de horas de todos los monitores con un número fijo de consultas, todas
+    en paralelo: agregados de asistencias, agregados de ajustes, el detalle de filas
+    y los nombres de los monitores.
+    Retorna las secciones 'estadisticas_generales' y 'monitores' del reporte.
+    """
+    consultas = consultas_horas_por_monitor(fecha_inicio, fecha_fin, sede, jornada)
+
+    # El detalle no se limita a los monitores de los agregados: son los mismos filtros,
+    # así que incluye exactamente a esos monitores y puede consultarse a la vez
+    asistencias_qs = _filtrar_asistencias(
+        fecha_inicio, fecha_fin, sede, jornada
+    ).order_by('usuario_id', 'fecha', 'horario_id')
+    ajustes_qs = _filtrar_ajustes(fecha_inicio, fecha_fin).order_by('usuario_id', '-created_at')
+    monitores_qs = UsuarioPersonalizado.objects.filter(tipo_usuario='MONITOR').values_list('id', 'username', 'nombre')
+
+    # Serialización plana; cada hilo con su propio caché de usuarios
+    filas_asistencias, filas_ajustes, asistencias, ajustes, monitores = en_paralelo(
+        *(partial(list, qs) for qs in consultas),
+        partial(asistencias_a_dicts, asistencias_qs),
+        partial(ajustes_a_dicts, ajustes_qs),
+        partial(list, monitores_qs)
+    )
+    agregados = combinar_horas_por_monitor(filas_asistencias, filas_ajustes)
+
+    # Detalle agrupado en memoria
+    asistencias_por_monitor = {monitor_id: [] for monitor_id in agregados}
+    for asistencia in asistencias:
+        asistencias_por_monitor.get(asistencia['usuario']['id'], []).append(asistencia)
+    ajustes_por_monitor = {monitor_id: [] for monitor_id in agregados}
+    for ajuste in ajustes:
+        ajustes_por_monitor.get(ajuste['usuario']['id'], []).append(ajuste)
+
+    monitores_data = []
+    total_horas_general = 0.0
+    total_asistencias_general = 0
+    total_ajustes_general = 0
+
+    for monitor_id, username, nombre in sorted(monitores):
+        calculo_horas = agregados.get(monitor_id)
+        if calculo_horas is None:
+            continue
+        monitores_data.append({
+            'monitor': {
+                'id': monitor_id,
+                'username': username,
+                'nombre': nombre
+            },
+            'horas_asistencias': round(calculo_horas['horas_asistencias'], 2),
+            'horas_ajustes': round(calculo_horas['horas_ajustes'], 2),
+            'total_horas': round(calculo_horas['horas_totales'], 2),
+            'total_asistencias': calculo_horas['total_asistencias'],
+            'total_ajustes': calculo_horas['total_ajustes'],
+            'asistencias_presentes': calculo_horas['asistencias_presentes'],
+            'asistencias_autorizadas': calculo_horas['asistencias_autorizadas'],
+            'asistencias': asistencias_por_monitor[monitor_id],
+            'ajustes': ajustes_por_monitor[monitor_id]
+        })
+
+        # Acumular estadísticas generales
+        total_horas_general += calculo_horas['horas_totales']
+        total_asistencias_general += calculo_horas['total_asistencias']
+        total_ajustes_general += calculo_horas['total_ajustes']
+
+    total_monitores = len(monitores_data)
+
+    # Ordenar monitores por horas trabajadas (descendente)
+    monitores_data.sort(key=lambda x: x['total_horas'], reverse=True)
+
+    return {
+        'estadisticas_generales': {
+            'total_horas': round(total_horas_general, 2),
+            'total_asistencias': total_asistencias_general,
+            'total_ajustes': total_ajustes_general,
+            'total_monitores': total_monitores,
+            'promedio_horas_por_monitor': round(total_horas_general / max(1, total_monitores), 2)
+        },
+        'monitores': monitores_data
+    }
@@ -0,0 +1,112 @@
+"""
+Mantenimiento del resumen diario de horas (ResumenHorasDiario).
+
+Cada vez que cambian asistencias o ajustes se recalculan, dentro de una
+transacción, las filas de los pares (monitor, fecha) afectados a partir de los
+datos originales. El recálculo es idempotente: borra y vuelve a crear las filas
+del alcance indicado.
+"""
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+from .models import UsuarioPersonalizado, Asistencia, AjusteHoras, ResumenHorasDiario
+from .cache_reportes import invalidar_reportes
+
+TAMANO_LOTE = 1000
+
+
+def _recalcular(filtros, usuario_ids=None):
+    """
+    Recalcula las filas del resumen que cumplen `filtros` (sobre usuario_id y fecha).
+    Si se indican usuario_ids se bloquean esos usuarios para serializar
+    actualizaciones concurrentes del mismo monitor.
+    """
+    with transaction.atomic():
+        if usuario_ids is not None:
+            list(UsuarioPersonalizado.objects.select_for_update().filter(id__in=usuario_ids).order_by('id').values_list('id', flat=True))
+
+        filas = {}
+        asistencias_agrupadas = Asistencia.objects.filter(**filtros).order_by().values(
+            'usuario_id', 'fecha', 'horario__sede', 'horario__jornada'
+        ).annotate(
+            horas=Sum('horas'),
+            total=Count('id'),
+            presentes=Count('id', filter=Q(presente=True)),
+            autorizadas=Count('id', filter=Q(estado_autorizacion='autorizado')),
+            pendientes=Count('id', filter=Q(estado_autorizacion='pendiente'))
+        )
+        for fila in asistencias_agrupadas:
+            clave = (fila['usuario_id'], fila['fecha'], fila['horario__sede'], fila['horario__jornada'])
+            filas[clave] = ResumenHorasDiario(
+                usuario_id=fila['usuario_id'],
+                fecha=fila['fecha'],
+                sede=fila['horario__sede'],
+                jornada=fila['horario__jornada'],
+                horas_asistencias=fila['horas'] or 0,
+                total_asistencias=fila['total'],
+                asistencias_presentes=fila['presentes'],
+                asistencias_autorizadas=fila['autorizadas'],
+                asistencias_pendientes=fila['pendientes']
+            )
+
+        ajustes_agrupados = AjusteHoras.objects.filter(**filtros).order_by().values(
+            'usuario_id', 'fecha'
+        ).annotate(
+            horas=Sum('cantidad_horas'),
+            total=Count('id')
+        )
+        for fila in ajustes_agrupados:
+            clave = (fila['usuario_id'], fila['fecha'], '', '')
+            filas[clave] = ResumenHorasDiario(
+                usuario_id=fila['usuario_id'],
+                fecha=fila['fecha'],
+                horas_ajustes=fila['horas'] or 0,
+                total_ajustes=fila['total']
+            )
+
+        ResumenHorasDiario.objects.filter(**filtros).delete()
+        ResumenHorasDiario.objects.bulk_create(filas.values(), batch_size=TAMANO_LOTE)
+        # Los reportes leen el resumen: sus respuestas en caché dejan de valer
+        invalidar_reportes(ResumenHorasDiario)
+
+    return len(filas)
+
+
+def actualizar_resumen_diario(pares):
+    """
+    Recalcula el resumen de los pares (usuario_id, fecha) indicados.
+    Se llama después de cualquier escritura sobre Asistencia o AjusteHoras.
+    """
+    pares = set(pares)
+    if not pares:
+        return 0
+    usuario_ids = sorted({usuario_id for usuario_id, _ in pares})
+    fechas = sorted({fecha for _, fecha in pares})
+    # Se recalcula el producto usuarios x fechas: incluye los pares pedidos y
+    # recalcular pares adicionales es inocuo
+    return _recalcular({'usuario_id__in': usuario_ids, 'fecha__in': fechas}, usuario_ids)
+
+
+def pares_de_horarios(horarios):
+    """
+    Pares (usuario_id, fecha) de las asistencias de los horarios indicados (queryset,
+    lista de ids o de instancias). Se obtienen antes de cambiar o borrar horarios
+    para recalcular solo esos pares, incluidas las asistencias de otros usuarios
+    que apunten a los mismos horarios.
+    """
+    return set(Asistencia.objects.filter(horario__in=horarios).values_list('usuario_id', 'fecha'))
+
+
+def reconstruir_resumen_diario(usuario_ids=None, fecha_inicio=None, fecha_fin=None):
+    """
+    Recalcula desde cero el resumen en el alcance indicado (todo por defecto).
+    Retorna el número de filas creadas.
+    """
+    filtros = {}
+    if usuario_ids is not None:
+        filtros['usuario_id__in'] = list(usuario_ids)
+    if fecha_inicio:
+        filtros['fecha__gte'] = fecha_inicio
+    if fecha_fin:
+        filtros['fecha__lte'] = fecha_fin
+    return _recalcular(filtros, filtros.get('usuario_id__in'))
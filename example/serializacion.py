@@ -0,0 +1,165 @@
+"""
+Serialización plana de asistencias y ajustes para listados y reportes.
+
+Genera exactamente el mismo JSON que AsistenciaSerializer y AjusteHorasSerializer
+(many=True), pero a partir de tuplas de values_list: no instancia modelos ni
+serializers por fila, usa mapas de etiquetas precalculados para los get_*_display
+y reutiliza el diccionario de cada usuario y de cada horario entre filas.
+Los valores de fecha, hora y decimales se formatean con campos de DRF creados una
+sola vez, para que el formato coincida con el de los serializers.
+"""
+from rest_framework import serializers
+
+from .models import UsuarioPersonalizado, HorarioFijo, Asistencia
+
+
+def _etiquetas(modelo, campo):
+    return {valor: str(etiqueta) for valor, etiqueta in modelo._meta.get_field(campo).flatchoices}
+
+
+ETIQUETAS_TIPO_USUARIO = _etiquetas(UsuarioPersonalizado, 'tipo_usuario')
+ETIQUETAS_DIA_SEMANA = _etiquetas(HorarioFijo, 'dia_semana')
+ETIQUETAS_JORNADA = _etiquetas(HorarioFijo, 'jornada')
+ETIQUETAS_SEDE = _etiquetas(HorarioFijo, 'sede')
+ETIQUETAS_ESTADO = _etiquetas(Asistencia, 'estado_autorizacion')
+
+_CAMPO_FECHA = serializers.DateField()
+_CAMPO_FECHA_HORA = serializers.DateTimeField()
+_CAMPO_HORAS = serializers.DecimalField(max_digits=4, decimal_places=2)
+_CAMPO_CANTIDAD_HORAS = serializers.DecimalField(max_digits=5, decimal_places=2)
+
+CAMPOS_USUARIO = ('id', 'username', 'nombre', 'tipo_usuario')
+
+CAMPOS_ASISTENCIA = (
+    'id', 'fecha', 'presente', 'estado_autorizacion', 'horas',
+    'usuario_id', 'usuario__username', 'usuario__nombre', 'usuario__tipo_usuario',
+    'horario_id', 'horario__dia_semana', 'horario__jornada', 'horario__sede', 'horario__usuario_id'
+)
+
+CAMPOS_AJUSTE = (
+    'id', 'fecha', 'cantidad_horas', 'motivo', 'asistencia_id', 'created_at', 'updated_at',
+    'usuario_id', 'usuario__username', 'usuario__nombre', 'usuario__tipo_usuario',
+    'creado_por_id', 'creado_por__username', 'creado_por__nombre', 'creado_por__tipo_usuario'
+)
+
+
+def _etiqueta(etiquetas, valor):
+    return etiquetas.get(valor, str(valor))
+
+
+def _usuario(usuarios, usuario_id, username, nombre, tipo_usuario):
+    """Diccionario de UsuarioSerializer, creado una sola vez por usuario."""
+    dato = usuarios.get(usuario_id)
+    if dato is None:
+        dato = usuarios[usuario_id] = {
+            'id': usuario_id,
+            'username': username,
+            'nombre': nombre,
+            'tipo_usuario': tipo_usuario,
+            'tipo_usuario_display': _etiqueta(ETIQUETAS_TIPO_USUARIO, tipo_usuario)
+        }
+    return dato
+
+
+def _cargar_usuarios(usuarios, usuario_ids):
+    """Agrega al caché los usuarios que falten, en una sola consulta."""
+    faltantes = set(usuario_ids) - usuarios.keys()
+    if faltantes:
+        for fila in UsuarioPersonalizado.objects.filter(id__in=faltantes).values_list(*CAMPOS_USUARIO):
+            _usuario(usuarios, *fila)
+
+
+def asistencias_a_dicts(asistencias_qs, usuarios=None):
+    """
+    Equivalente a AsistenciaSerializer(asistencias_qs, many=True).data, en el
+    orden del queryset. `usuarios` es un caché opcional id -> diccionario de usuario.
+    """
+    return _filas_asistencias_a_dicts(list(asistencias_qs.values_list(*CAMPOS_ASISTENCIA)), usuarios)
+
+
+def asistencias_en_memoria_a_dicts(asistencias, usuarios=None):
+    """
+    Igual que asistencias_a_dicts, pero para instancias ya cargadas (con usuario y
+    horario), por ejemplo asistencias virtuales sin guardar mezcladas con filas
+    reales, en el orden de la lista.
+    """
+    filas = [
+        (asistencia.id, asistencia.fecha, asistencia.presente, asistencia.estado_autorizacion, asistencia.horas,
+         asistencia.usuario_id, asistencia.usuario.username, asistencia.usuario.nombre,
+         asistencia.usuario.tipo_usuario, asistencia.horario_id, asistencia.horario.dia_semana,
+         asistencia.horario.jornada, asistencia.horario.sede, asistencia.horario.usuario_id)
+        for asistencia in asistencias
+    ]
+    return _filas_asistencias_a_dicts(filas, usuarios)
+
+
+def _filas_asistencias_a_dicts(filas, usuarios):
+    """Diccionarios de AsistenciaSerializer a partir de tuplas con los CAMPOS_ASISTENCIA."""
+    if usuarios is None:
+        usuarios = {}
+    for fila in filas:
+        _usuario(usuarios, *fila[5:9])
+    # El usuario del horario casi siempre es el de la asistencia; los demás se cargan aparte
+    _cargar_usuarios(usuarios, {fila[13] for fila in filas})
+
+    horarios = {}
+    resultado = []
+    for (asistencia_id, fecha, presente, estado, horas, usuario_id, _, _, _,
+         horario_id, dia_semana, jornada, sede, horario_usuario_id) in filas:
+        horario = horarios.get(horario_id)
+        if horario is None:
+            horario = horarios[horario_id] = {
+                'id': horario_id,
+                'usuario': usuarios[horario_usuario_id],
+                'dia_semana': dia_semana,
+                'dia_semana_display': _etiqueta(ETIQUETAS_DIA_SEMANA, dia_semana),
+                'jornada': jornada,
+                'jornada_display': _etiqueta(ETIQUETAS_JORNADA, jornada),
+                'sede': sede,
+                'sede_display': _etiqueta(ETIQUETAS_SEDE, sede)
+            }
+        resultado.append({
+            'id': asistencia_id,
+            'usuario': usuarios[usuario_id],
+            'fecha': _CAMPO_FECHA.to_representation(fecha),
+            'horario': horario,
+            'presente': presente,
+            'estado_autorizacion': estado,
+            'estado_autorizacion_display': _etiqueta(ETIQUETAS_ESTADO, estado),
+            'horas': _CAMPO_HORAS.to_representation(horas)
+        })
+    return resultado
+
+
+def ajustes_a_dicts(ajustes_qs, usuarios=None):
+    """
+    Equivalente a AjusteHorasSerializer(ajustes_qs, many=True).data, en el orden
+    del queryset. Las asistencias relacionadas se serializan con una consulta adicional.
+    """
+    if usuarios is None:
+        usuarios = {}
+    filas = list(ajustes_qs.values_list(*CAMPOS_AJUSTE))
+
+    asistencia_ids = {fila[4] for fila in filas if fila[4] is not None}
+    asistencias = {}
+    if asistencia_ids:
+        asistencias = {
+            asistencia['id']: asistencia
+            for asistencia in asistencias_a_dicts(Asistencia.objects.filter(id__in=asistencia_ids), usuarios)
+        }
+
+    resultado = []
+    for fila in filas:
+        (ajuste_id, fecha, cantidad_horas, motivo, asistencia_id, created_at, updated_at) = fila[:7]
+        resultado.append({
+            'id': ajuste_id,
+            'usuario': _usuario(usuarios, *fila[7:11]),
+            'fecha': _CAMPO_FECHA.to_representation(fecha),
+            'cantidad_horas': _CAMPO_CANTIDAD_HORAS.to_representation(cantidad_horas),
+            'motivo': motivo,
+            'asistencia': asistencias.get(asistencia_id) if asistencia_id is not None else None,
+            'creado_por': _usuario(usuarios, *fila[11:15]),
+            'created_at': _CAMPO_FECHA_HORA.to_representation(created_at),
+            'updated_at': _CAMPO_FECHA_HORA.to_representation(updated_at)
+        })
+    return resultado
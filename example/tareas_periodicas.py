@@ -0,0 +1,67 @@
+"""
+Tareas periódicas de mantenimiento de la aplicación (ver programador.py).
+
+Los horarios están en la hora local (TIME_ZONE) y caen de madrugada, fuera de las
+horas de uso, para que el trabajo pesado no lo pague la primera petición del día.
+"""
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .generacion import obtener_dias_festivos, pregenerar_asistencias
+from .models import EjecucionTarea, UsuarioPersonalizado
+from .programador import tarea_periodica
+from .resumenes import reconstruir_resumen_diario
+from .trabajos import ejecutar_endpoint
+
+# Días hacia atrás que se recalculan del resumen diario cada noche
+DIAS_REFRESCO_RESUMEN = 7
+# Reportes (tipos de trabajo, con sus parámetros por defecto) que se precalculan en la mañana
+REPORTES_A_CALENTAR = (
+    'reporte_horas_todos',
+    'finanzas_todos_monitores',
+    'finanzas_resumen_ejecutivo',
+    'finanzas_comparativa_semanas',
+    'total_horas_horarios',
+)
+
+
+@tarea_periodica('0 1 * * *')
+def preabrir_asistencias():
+    """Crea las asistencias pendientes de mañana según los horarios fijos (si no es festivo)."""
+    manana = date.today() + timedelta(days=1)
+    resultado = pregenerar_asistencias(manana, manana, festivos=obtener_dias_festivos())
+    return f"{resultado['creadas']} asistencias creadas para {manana:%Y-%m-%d}"
+
+
+@tarea_periodica('30 1 * * *')
+def refrescar_resumen_diario():
+    """Recalcula el resumen diario de horas de la última semana (corrige cualquier desfase)."""
+    hoy = date.today()
+    filas = reconstruir_resumen_diario(fecha_inicio=hoy - timedelta(days=DIAS_REFRESCO_RESUMEN), fecha_fin=hoy)
+    return f'{filas} filas del resumen recalculadas'
+
+
+@tarea_periodica('0 6 * * 1-6')
+def calentar_reportes():
+    """
+    Calcula los reportes de directivos con sus parámetros por defecto para dejarlos
+    en la caché de reportes. Solo sirve a los demás procesos si la caché es
+    compartida (REPORTES_CACHE_BACKEND); con la caché local, solo al proceso líder.
+    """
+    directivo = UsuarioPersonalizado.objects.filter(tipo_usuario='DIRECTIVO', is_active=True).order_by('id').first()
+    if directivo is None:
+        return 'Sin directivos activos'
+    codigos = [ejecutar_endpoint(tipo, {}, directivo)[0] for tipo in REPORTES_A_CALENTAR]
+    return f'{codigos.count(200)} de {len(codigos)} reportes calculados'
+
+
+@tarea_periodica('15 0 * * *')
+def purgar_historial_tareas():
+    """Borra el historial de tareas más antiguo que PROGRAMADOR_RETENCION_DIAS."""
+    limite = timezone.now() - timedelta(days=settings.PROGRAMADOR_RETENCION_DIAS)
+    borradas, _ = EjecucionTarea.objects.filter(programada_para__lt=limite).exclude(
+        estado=EjecucionTarea.EN_PROCESO
+    ).delete()
+    return f'{borradas} ejecuciones borradas'
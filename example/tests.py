@@ -0,0 +1,241 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.test import TestCase, TransactionTestCase, override_settings
+from rest_framework.renderers import JSONRenderer
+
+from .authentication import emitir_token
+from .models import UsuarioPersonalizado, HorarioFijo, Asistencia, AjusteHoras
+from .serializacion import asistencias_a_dicts, asistencias_en_memoria_a_dicts, ajustes_a_dicts
+from .serializers import AsistenciaSerializer, AjusteHorasSerializer
+
+
+class SerializacionPlanaTest(TestCase):
+    """
+    La serialización plana debe producir exactamente el mismo JSON que los
+    serializers de DRF, para que cualquier cambio en ellos se note aquí.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.directivo = UsuarioPersonalizado.objects.create(
+            username='directivo', nombre='Directiva Uno', password='x', tipo_usuario='DIRECTIVO'
+        )
+        cls.monitores = [
+            UsuarioPersonalizado.objects.create(
+                username=f'monitor{numero}', nombre=f'Monitor {numero}', password='x', tipo_usuario='MONITOR'
+            )
+            for numero in range(2)
+        ]
+        lunes = date(2026, 3, 2)
+        jornadas = [valor for valor, _ in HorarioFijo.JORNADAS]
+        sedes = [valor for valor, _ in HorarioFijo.SEDES]
+        estados = [valor for valor, _ in Asistencia.ESTADOS_AUTORIZACION]
+        horas = [Decimal('0.00'), Decimal('4.00'), Decimal('2.50')]
+
+        # Todos los días, jornadas, sedes y estados, repartidos entre dos monitores
+        indice = 0
+        for monitor in cls.monitores:
+            for dia, _ in HorarioFijo.DIAS:
+                for jornada in jornadas:
+                    horario = HorarioFijo.objects.create(
+                        usuario=monitor, dia_semana=dia, jornada=jornada, sede=sedes[indice % len(sedes)]
+                    )
+                    Asistencia.objects.create(
+                        usuario=monitor,
+                        fecha=lunes + timedelta(days=dia),
+                        horario=horario,
+                        presente=indice % 2 == 0,
+                        estado_autorizacion=estados[indice % len(estados)],
+                        horas=horas[indice % len(horas)]
+                    )
+                    indice += 1
+
+        # Asistencia cuyo horario pertenece a otro usuario (se carga con una consulta aparte)
+        cls.asistencia_cruzada = Asistencia.objects.create(
+            usuario=cls.monitores[1],
+            fecha=lunes + timedelta(days=7),
+            horario=HorarioFijo.objects.get(usuario=cls.monitores[0], dia_semana=0, jornada='M'),
+            estado_autorizacion='autorizado',
+            horas=Decimal('4.00')
+        )
+
+        # Ajustes con y sin asistencia relacionada, positivos y negativos
+        asistencias = list(Asistencia.objects.order_by('id'))
+        for numero, asistencia in enumerate([None, asistencias[0], None, cls.asistencia_cruzada, asistencias[5]]):
+            AjusteHoras.objects.create(
+                usuario=cls.monitores[numero % 2],
+                fecha=lunes + timedelta(days=numero),
+                cantidad_horas=Decimal('1.50') if numero % 2 == 0 else Decimal('-2.25'),
+                motivo=f'Ajuste {numero}',
+                asistencia=asistencia,
+                creado_por=cls.directivo
+            )
+
+    def assertMismoJSON(self, esperado, obtenido):
+        renderer = JSONRenderer()
+        self.assertEqual(renderer.render(esperado), renderer.render(obtenido))
+
+    def test_asistencias_igual_que_el_serializer(self):
+        asistencias_qs = Asistencia.objects.order_by('-fecha', 'usuario__nombre', 'horario__jornada')
+        self.assertMismoJSON(
+            AsistenciaSerializer(asistencias_qs.select_related('usuario', 'horario__usuario'), many=True).data,
+            asistencias_a_dicts(asistencias_qs)
+        )
+
+    def test_asistencias_filtradas_igual_que_el_serializer(self):
+        for estado, _ in Asistencia.ESTADOS_AUTORIZACION:
+            asistencias_qs = Asistencia.objects.filter(estado_autorizacion=estado).order_by('fecha', 'id')
+            self.assertMismoJSON(AsistenciaSerializer(asistencias_qs, many=True).data, asistencias_a_dicts(asistencias_qs))
+
+    def test_asistencias_en_memoria_igual_que_el_serializer(self):
+        asistencias = list(Asistencia.objects.select_related('usuario', 'horario__usuario').order_by('fecha', 'id'))
+        # Asistencia virtual (sin guardar), como las de asistencias_virtuales
+        horario = asistencias[0].horario
+        asistencias.append(Asistencia(
+            usuario=horario.usuario, fecha=date(2026, 3, 16), horario=horario,
+            presente=False, estado_autorizacion='pendiente', horas=0.00
+        ))
+        self.assertMismoJSON(AsistenciaSerializer(asistencias, many=True).data, asistencias_en_memoria_a_dicts(asistencias))
+
+    def test_ajustes_igual_que_el_serializer(self):
+        ajustes_qs = AjusteHoras.objects.order_by('-created_at', 'id')
+        self.assertTrue(ajustes_qs.filter(asistencia__isnull=True).exists())
+        self.assertMismoJSON(AjusteHorasSerializer(ajustes_qs, many=True).data, ajustes_a_dicts(ajustes_qs))
+
+    def test_querysets_vacios(self):
+        self.assertMismoJSON(AsistenciaSerializer(Asistencia.objects.none(), many=True).data,
+                             asistencias_a_dicts(Asistencia.objects.none()))
+        self.assertMismoJSON(AjusteHorasSerializer(AjusteHoras.objects.none(), many=True).data,
+                             ajustes_a_dicts(AjusteHoras.objects.none()))
+
+
+@override_settings(RESPUESTAS_CONDICIONALES=True)
+class RespuestaCondicionalTest(TransactionTestCase):
+    """
+    El ETag de las vistas que muestran usuarios debe cambiar con cualquier cambio en
+    ellos. Usa TransactionTestCase porque la generación se incrementa al confirmar.
+    """
+
+    def setUp(self):
+        self.directivo = UsuarioPersonalizado.objects.create(
+            username='directivo', nombre='Directiva Uno', password='x', tipo_usuario='DIRECTIVO'
+        )
+        self.monitor = UsuarioPersonalizado.objects.create(
+            username='monitor', nombre='Monitor Uno', password='x', tipo_usuario='MONITOR'
+        )
+        HorarioFijo.objects.create(usuario=self.monitor, dia_semana=0, jornada='M', sede='SA')
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {emitir_token(self.directivo)}'
+
+    def _etag(self):
+        respuesta = self.client.get('/directivo/horarios/')
+        self.assertEqual(respuesta.status_code, 200)
+        return respuesta['ETag']
+
+    def test_304_sin_cambios(self):
+        etag = self._etag()
+        respuesta = self.client.get('/directivo/horarios/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 304)
+
+    def test_cambios_de_usuario_cambian_el_etag(self):
+        for campo, valor in (('nombre', 'Monitor Renombrado'), ('is_active', False), ('tipo_usuario', 'DIRECTIVO')):
+            etag = self._etag()
+            setattr(self.monitor, campo, valor)
+            self.monitor.save()
+            respuesta = self.client.get('/directivo/horarios/', HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(respuesta.status_code, 200, campo)
+
+
+@override_settings(ASISTENCIAS_VIRTUALES=True, RESPUESTAS_CONDICIONALES=False)
+class PaginacionAsistenciasTest(TestCase):
+    """
+    Recorrer el listado de asistencias por cursor debe devolver las mismas filas y
+    en el mismo orden que sin paginar, también con nombres con acentos o en
+    minúscula y con asistencias virtuales mezcladas con filas reales.
+    """
+
+    fecha = date(2026, 3, 2)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.directivo = UsuarioPersonalizado.objects.create(
+            username='directivo', nombre='Directiva Uno', password='x', tipo_usuario='DIRECTIVO'
+        )
+        for numero, nombre in enumerate(['Ángela', 'Bruno', 'carla', 'Óscar', 'ana', 'Zoe']):
+            monitor = UsuarioPersonalizado.objects.create(
+                username=f'monitor{numero}', nombre=nombre, password='x', tipo_usuario='MONITOR'
+            )
+            for jornada in ('M', 'T'):
+                horario = HorarioFijo.objects.create(
+                    usuario=monitor, dia_semana=cls.fecha.weekday(), jornada=jornada, sede='SA'
+                )
+                # Las demás quedan como asistencias virtuales
+                if numero % 2 == 0:
+                    Asistencia.objects.create(usuario=monitor, fecha=cls.fecha, horario=horario)
+                Asistencia.objects.create(usuario=monitor, fecha=cls.fecha - timedelta(days=7), horario=horario)
+
+    def setUp(self):
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {emitir_token(self.directivo)}'
+
+    def _claves(self, asistencias):
+        return [(a['dia'], a['monitor'], a['jornada']) for a in asistencias]
+
+    def _recorrer(self, parametros, page_size):
+        filas, cursor = [], None
+        while True:
+            consulta = dict(parametros, page_size=page_size)
+            if cursor:
+                consulta['cursor'] = cursor
+            respuesta = self.client.get('/directivo/asistencias/', consulta).json()
+            filas += respuesta['asistencias']
+            cursor = respuesta['next']
+            if not cursor:
+                return filas
+
+    def test_paginas_iguales_al_listado(self):
+        for parametros in ({'fecha': self.fecha.isoformat()},
+                           {'fecha_inicio': (self.fecha - timedelta(days=7)).isoformat(),
+                            'fecha_fin': self.fecha.isoformat()}):
+            completo = self.client.get('/directivo/asistencias/', parametros).json()['asistencias']
+            self.assertEqual(len({a['monitor'] for a in completo}), 6)
+            for page_size in (1, 2, 5):
+                self.assertEqual(
+                    self._claves(self._recorrer(parametros, page_size)), self._claves(completo), page_size
+                )
+
+
+@override_settings(RESPUESTAS_CONDICIONALES=False)
+class MisAsistenciasTest(TestCase):
+    """Con ASISTENCIAS_VIRTUALES la respuesta del monitor debe ser la misma, salvo los ids sin crear."""
+
+    fecha = date(2026, 3, 4)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.monitor = UsuarioPersonalizado.objects.create(
+            username='monitor', nombre='Monitor Uno', password='x', tipo_usuario='MONITOR'
+        )
+        # La tarde se crea antes que la mañana y solo la tarde tiene fila
+        tarde = HorarioFijo.objects.create(usuario=cls.monitor, dia_semana=cls.fecha.weekday(), jornada='T', sede='BA')
+        HorarioFijo.objects.create(usuario=cls.monitor, dia_semana=cls.fecha.weekday(), jornada='M', sede='SA')
+        Asistencia.objects.create(
+            usuario=cls.monitor, fecha=cls.fecha, horario=tarde, presente=True, estado_autorizacion='autorizado', horas=4
+        )
+
+    def _mis_asistencias(self):
+        respuesta = self.client.get(
+            '/monitor/mis-asistencias/', {'fecha': self.fecha.isoformat()},
+            HTTP_AUTHORIZATION=f'Bearer {emitir_token(self.monitor)}'
+        )
+        self.assertEqual(respuesta.status_code, 200)
+        return respuesta.json()
+
+    def test_misma_respuesta_con_y_sin_virtuales(self):
+        with self.settings(ASISTENCIAS_VIRTUALES=True):
+            virtuales = self._mis_asistencias()
+        self.assertEqual([a['id'] is None for a in virtuales], [True, False])
+        reales = self._mis_asistencias()
+        self.assertEqual([a['horario']['jornada'] for a in reales], ['M', 'T'])
+        for asistencia in virtuales + reales:
+            asistencia.pop('id')
+        self.assertEqual(virtuales, reales)
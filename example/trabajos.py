@@ -0,0 +1,246 @@
+"""
+Cola de trabajos en la base de datos para los reportes y exportaciones pesados.
+
+Un reporte de todo el semestre o una exportación grande pueden superar el tiempo
+máximo de una petición en el despliegue serverless. En su lugar el directivo
+encola un trabajo (POST /directivo/trabajos/), consulta su estado y descarga el
+resultado cuando está listo; el cálculo lo hace el comando manage.py run_jobs,
+fuera de las peticiones y con un número fijo de hilos.
+
+Cada tipo de trabajo corresponde a un endpoint GET existente: el trabajador
+ejecuta esa misma vista con los parámetros guardados, autenticada como el
+directivo que lo pidió, y guarda los bytes de la respuesta. El resultado es
+idéntico al de la petición directa y pasa por la caché de reportes, la réplica
+y los permisos de siempre.
+
+- Los trabajos activos (pendientes o en proceso) con el mismo tipo y parámetros
+  se deduplican: una restricción única parcial sobre la huella garantiza que
+  haya uno solo aunque lleguen varias peticiones a la vez.
+- Los trabajadores reclaman trabajos con SELECT ... FOR UPDATE SKIP LOCKED
+  (en SQLite, sin bloqueo de filas, la actualización condicional del estado
+  evita que dos trabajadores tomen el mismo).
+- Un trabajo en proceso por más de TRABAJOS_TIEMPO_MAXIMO_SEGUNDOS (el trabajador
+  murió) vuelve a la cola hasta TRABAJOS_MAXIMO_INTENTOS veces; después falla.
+"""
+import hashlib
+import json
+import logging
+import os
+import socket
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.http import HttpRequest, QueryDict
+from django.urls import NoReverseMatch, resolve, reverse
+from django.utils import timezone
+
+from .models import Trabajo, UsuarioPersonalizado
+
+logger = logging.getLogger(__name__)
+
+# request.auth de las peticiones que ejecuta el trabajador
+TRABAJO_EN_SEGUNDO_PLANO = 'trabajo_en_segundo_plano'
+
+# tipo: (nombre de la URL, parámetros que van en la ruta); el resto va en la query
+TIPOS_TRABAJO = {
+    'reporte_horas_todos': ('directivo_reporte_horas_todos', ()),
+    'reporte_horas_monitor': ('directivo_reporte_horas_monitor', ('monitor_id',)),
+    'finanzas_monitor': ('directivo_finanzas_monitor_individual', ('monitor_id',)),
+    'finanzas_todos_monitores': ('directivo_finanzas_todos_monitores', ()),
+    'finanzas_resumen_ejecutivo': ('directivo_finanzas_resumen_ejecutivo', ()),
+    'finanzas_comparativa_semanas': ('directivo_finanzas_comparativa_semanas', ()),
+    'total_horas_horarios': ('directivo_total_horas_horarios', ()),
+    'exportar_asistencias': ('directivo_exportar_asistencias', ()),
+    'exportar_ajustes': ('directivo_exportar_ajustes', ()),
+}
+CABECERAS_RESULTADO = ('Content-Type', 'Content-Disposition')
+MAXIMO_ERROR = 2000
+
+
+def identificador_trabajador():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def _ruta(tipo, parametros):
+    """Ruta del endpoint y parámetros de query del trabajo."""
+    nombre, argumentos_ruta = TIPOS_TRABAJO[tipo]
+    argumentos = {clave: parametros[clave] for clave in argumentos_ruta if clave in parametros}
+    consulta = {clave: valor for clave, valor in parametros.items() if clave not in argumentos_ruta}
+    return reverse(nombre, kwargs=argumentos), consulta
+
+
+def _normalizar_parametros(tipo, parametros):
+    if tipo not in TIPOS_TRABAJO:
+        raise ValueError(f'tipo debe ser uno de: {", ".join(TIPOS_TRABAJO)}')
+    if not isinstance(parametros, dict):
+        raise ValueError('parametros debe ser un objeto')
+    normalizados = {}
+    for clave, valor in parametros.items():
+        if valor is None or valor == '':
+            continue
+        if isinstance(valor, (dict, list)):
+            raise ValueError(f'El parámetro {clave} debe ser un valor simple')
+        normalizados[str(clave)] = str(valor).lower() if isinstance(valor, bool) else str(valor)
+    try:
+        _ruta(tipo, normalizados)
+    except NoReverseMatch:
+        requeridos = ', '.join(TIPOS_TRABAJO[tipo][1])
+        raise ValueError(f'El tipo {tipo} requiere los parámetros: {requeridos}')
+    return normalizados
+
+
+def huella_trabajo(tipo, parametros):
+    contenido = json.dumps({'tipo': tipo, 'parametros': parametros}, sort_keys=True)
+    return hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+
+def _activo(huella):
+    return Trabajo.objects.defer('resultado').filter(huella=huella, estado__in=Trabajo.ESTADOS_ACTIVOS).first()
+
+
+def encolar_trabajo(tipo, parametros, usuario):
+    """
+    Encola un trabajo y retorna (trabajo, creado). Si ya hay uno activo con el mismo
+    tipo y parámetros, retorna ese. Lanza ValueError si el tipo o los parámetros no
+    son válidos.
+    """
+    parametros = _normalizar_parametros(tipo, parametros)
+    huella = huella_trabajo(tipo, parametros)
+    existente = _activo(huella)
+    if existente is not None:
+        return existente, False
+    try:
+        with transaction.atomic():
+            trabajo = Trabajo.objects.create(
+                tipo=tipo, parametros=parametros, huella=huella, solicitado_por=usuario
+            )
+        return trabajo, True
+    except IntegrityError:
+        # Otra petición encoló el mismo trabajo entre la consulta y la inserción
+        existente = _activo(huella)
+        if existente is None:
+            raise
+        return existente, False
+
+
+def reclamar_trabajos(cantidad, trabajador):
+    """Marca como en proceso hasta `cantidad` trabajos pendientes (los más antiguos) y retorna sus ids."""
+    if cantidad < 1:
+        return []
+    reclamados = []
+    with transaction.atomic():
+        candidatos = list(
+            Trabajo.objects.select_for_update(skip_locked=True)
+            .filter(estado=Trabajo.PENDIENTE)
+            .order_by('created_at', 'id')
+            .values_list('id', flat=True)[:cantidad]
+        )
+        ahora = timezone.now()
+        for trabajo_id in candidatos:
+            actualizados = Trabajo.objects.filter(pk=trabajo_id, estado=Trabajo.PENDIENTE).update(
+                estado=Trabajo.EN_PROCESO, started_at=ahora, finished_at=None,
+                intentos=F('intentos') + 1, trabajador=trabajador
+            )
+            if actualizados:
+                reclamados.append(trabajo_id)
+    return reclamados
+
+
+def recuperar_abandonados():
+    """
+    Devuelve a la cola los trabajos en proceso por más de TRABAJOS_TIEMPO_MAXIMO_SEGUNDOS,
+    o los marca como fallidos si ya agotaron sus intentos. Retorna (reencolados, fallidos).
+    """
+    ahora = timezone.now()
+    vencidos = Trabajo.objects.filter(
+        estado=Trabajo.EN_PROCESO,
+        started_at__lt=ahora - timedelta(seconds=settings.TRABAJOS_TIEMPO_MAXIMO_SEGUNDOS)
+    )
+    reencolados = vencidos.filter(intentos__lt=settings.TRABAJOS_MAXIMO_INTENTOS).update(
+        estado=Trabajo.PENDIENTE, trabajador=''
+    )
+    fallidos = vencidos.update(
+        estado=Trabajo.FALLIDO, finished_at=ahora,
+        error='El trabajo superó el tiempo máximo de ejecución en todos sus intentos'
+    )
+    return reencolados, fallidos
+
+
+def purgar_antiguos():
+    """Borra los trabajos terminados hace más de TRABAJOS_RETENCION_DIAS. Retorna cuántos."""
+    limite = timezone.now() - timedelta(days=settings.TRABAJOS_RETENCION_DIAS)
+    borrados, _ = Trabajo.objects.filter(
+        estado__in=Trabajo.ESTADOS_TERMINADOS, finished_at__lt=limite
+    ).delete()
+    return borrados
+
+
+def _peticion(ruta, consulta, usuario):
+    """HttpRequest GET equivalente a la del directivo, autenticada con su usuario."""
+    peticion = HttpRequest()
+    peticion.method = 'GET'
+    peticion.path = peticion.path_info = ruta
+    peticion.GET = QueryDict(mutable=True)
+    peticion.GET.update(consulta)
+    peticion.META = {
+        'REQUEST_METHOD': 'GET',
+        'QUERY_STRING': peticion.GET.urlencode(),
+        'HTTP_ACCEPT': 'application/json',
+        'SERVER_NAME': 'trabajos',
+        'SERVER_PORT': '80',
+    }
+    # DRF usa estos atributos en lugar de las clases de autenticación
+    peticion._force_auth_user = usuario
+    peticion._force_auth_token = TRABAJO_EN_SEGUNDO_PLANO
+    return peticion
+
+
+def ejecutar_endpoint(tipo, parametros, usuario):
+    """
+    Ejecuta el endpoint del tipo de trabajo con los parámetros indicados, como el
+    usuario dado, y retorna (código, contenido, cabeceras).
+    """
+    ruta, consulta = _ruta(tipo, parametros)
+    peticion = _peticion(ruta, consulta, usuario)
+    coincidencia = resolve(ruta)
+    respuesta = coincidencia.func(peticion, *coincidencia.args, **coincidencia.kwargs)
+    try:
+        if respuesta.streaming:
+            contenido = b''.join(respuesta.streaming_content)
+        else:
+            if hasattr(respuesta, 'render'):
+                respuesta.render()
+            contenido = respuesta.content
+    finally:
+        respuesta.close()
+    cabeceras = {nombre: respuesta[nombre] for nombre in CABECERAS_RESULTADO if respuesta.has_header(nombre)}
+    return respuesta.status_code, contenido, cabeceras
+
+
+def ejecutar_trabajo(trabajo_id):
+    """
+    Ejecuta un trabajo reclamado y guarda su resultado. Una respuesta con código de
+    error (p. ej. 400 por parámetros inválidos) deja el trabajo fallido con esa
+    respuesta como error. Retorna el estado final.
+    """
+    trabajo = Trabajo.objects.defer('resultado').get(pk=trabajo_id)
+    try:
+        usuario = UsuarioPersonalizado.objects.get(pk=trabajo.solicitado_por_id)
+        codigo, contenido, cabeceras = ejecutar_endpoint(trabajo.tipo, trabajo.parametros, usuario)
+    except Exception as exc:
+        logger.exception('Error ejecutando el trabajo %s (%s)', trabajo.id, trabajo.tipo)
+        campos = {'estado': Trabajo.FALLIDO, 'error': f'{type(exc).__name__}: {exc}'[:MAXIMO_ERROR]}
+    else:
+        campos = {'codigo_estado': codigo, 'cabeceras': cabeceras}
+        if codigo < 400:
+            campos.update(estado=Trabajo.COMPLETADO, resultado=contenido, error='')
+        else:
+            campos.update(estado=Trabajo.FALLIDO, error=contenido.decode('utf-8', 'replace')[:MAXIMO_ERROR])
+
+    # Si el trabajo se dio por abandonado y otro trabajador lo tomó, no pisar su estado
+    Trabajo.objects.filter(
+        pk=trabajo.id, estado=Trabajo.EN_PROCESO, trabajador=trabajo.trabajador, intentos=trabajo.intentos
+    ).update(finished_at=timezone.now(), **campos)
+    return campos['estado']
@@ -20,8 +20,14 @@ urlpatterns = [
     # Directivo
     path('directivo/horarios/', views.directivo_horarios_monitores, name='directivo_horarios_monitores'),
     path('directivo/asistencias/', views.directivo_asistencias, name='directivo_asistencias'),
+    path('directivo/asistencias/eventos/', views.directivo_asistencias_eventos, name='directivo_asistencias_eventos'),
+    path('directivo/asistencias/exportar/', views.directivo_exportar_asistencias, name='directivo_exportar_asistencias'),
+    path('directivo/asistencias/decidir/', views.directivo_decidir_asistencias, name='directivo_decidir_asistencias'),
+    path('directivo/asistencias/generar/', views.directivo_generar_asistencias, name='directivo_generar_asistencias'),
     path('directivo/asistencias/<int:pk>/autorizar/', views.directivo_autorizar_asistencia, name='directivo_autorizar_asistencia'),
     path('directivo/asistencias/<int:pk>/rechazar/', views.directivo_rechazar_asistencia, name='directivo_rechazar_asistencia'),
+    path('directivo/asistencias/autorizar/', views.directivo_autorizar_asistencia, name='directivo_autorizar_asistencia_virtual'),
+    path('directivo/asistencias/rechazar/', views.directivo_rechazar_asistencia, name='directivo_rechazar_asistencia_virtual'),
     
     # Reportes
     path('directivo/reportes/horas-monitor/<int:monitor_id>/', views.directivo_reporte_horas_monitor, name='directivo_reporte_horas_monitor'),
@@ -33,6 +39,7 @@ urlpatterns = [
     
     # Ajustes de Horas
     path('directivo/ajustes-horas/', views.directivo_ajustes_horas, name='directivo_ajustes_horas'),
+    path('directivo/ajustes-horas/exportar/', views.directivo_exportar_ajustes, name='directivo_exportar_ajustes'),
     path('directivo/ajustes-horas/<int:pk>/', views.directivo_ajuste_horas_detalle, name='directivo_ajuste_horas_detalle'),
     
     # Búsqueda de Monitores
@@ -51,4 +58,12 @@ urlpatterns = [
     path('directivo/configuraciones/inicializar/', views.directivo_configuraciones_inicializar, name='directivo_configuraciones_inicializar'),
     path('directivo/configuraciones/<str:clave>/', views.directivo_configuraciones_detalle, name='directivo_configuraciones_detalle'),
     path('directivo/configuraciones/<int:id>/', views.directivo_configuraciones_detalle_por_id, name='directivo_configuraciones_detalle_por_id'),
+    
+    # Trabajos en segundo plano (reportes y exportaciones pesados)
+    path('directivo/trabajos/', views.directivo_trabajos, name='directivo_trabajos'),
+    path('directivo/trabajos/<int:pk>/', views.directivo_trabajo_detalle, name='directivo_trabajo_detalle'),
+    path('directivo/trabajos/<int:pk>/resultado/', views.directivo_trabajo_resultado, name='directivo_trabajo_resultado'),
+
+    # Métricas (formato Prometheus)
+    path('metrics', views.metricas, name='metricas'),
 ]
\ No newline at end of file
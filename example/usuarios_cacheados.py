@@ -0,0 +1,49 @@
+"""
+Caché local del proceso de los usuarios autenticados.
+
+La autenticación por JWT resuelve el usuario del claim user_id en cada petición;
+con esta caché, una petición de un usuario visto hace menos de
+AUTENTICACION_CACHE_SEGUNDOS no consulta la base de datos. Guardar o borrar un
+usuario en este proceso lo saca de la caché; los cambios hechos por otros
+procesos se ven al vencer el intervalo.
+"""
+import copy
+import threading
+import time
+
+from django.conf import settings
+
+_lock = threading.Lock()
+_usuarios = {}  # user_id -> (usuario, cargado_en)
+
+
+def _intervalo_vigencia():
+    return getattr(settings, 'AUTENTICACION_CACHE_SEGUNDOS', 60)
+
+
+def obtener_usuario_cacheado(user_id):
+    """
+    Usuario con ese id, o None si no existe. Retorna una copia, de modo que las
+    vistas pueden modificar el objeto sin alterar la caché.
+    """
+    ahora = time.monotonic()
+    entrada = _usuarios.get(user_id)
+    if entrada is None or ahora - entrada[1] >= _intervalo_vigencia():
+        from .models import UsuarioPersonalizado
+
+        usuario = UsuarioPersonalizado.objects.filter(pk=user_id).first()
+        if usuario is None:
+            return None
+        entrada = (usuario, time.monotonic())
+        with _lock:
+            _usuarios[user_id] = entrada
+    return copy.copy(entrada[0])
+
+
+def invalidar_usuario_cacheado(user_id=None):
+    """Saca un usuario de la caché (o vacía la caché si no se indica user_id)."""
+    with _lock:
+        if user_id is None:
+            _usuarios.clear()
+        else:
+            _usuarios.pop(user_id, None)
@@ -1,17 +1,21 @@
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes, authentication_classes
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken, AccessToken
-from rest_framework_simplejwt.authentication import JWTAuthentication
-from rest_framework.authentication import BaseAuthentication
-import jwt
 from django.conf import settings
-from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 from django.contrib.auth import authenticate
+from django.http import HttpResponse, StreamingHttpResponse
 from django.utils import timezone
-from datetime import datetime, date
-from .models import UsuarioPersonalizado, HorarioFijo, Asistencia, AjusteHoras, ConfiguracionSistema
+from django.db import transaction
+from django.db.models import Case, Count, DecimalField, Sum, Value, When
+from django.urls import reverse
+from datetime import datetime, date, timedelta
+from decimal import Decimal
+from functools import partial
+from .models import UsuarioPersonalizado, HorarioFijo, Asistencia, AjusteHoras, ConfiguracionSistema, ResumenHorasDiario, Trabajo
+from .authentication import emitir_token, TokenMetricasAuthentication, UsuarioPersonalizadoJWTAuthentication
+from .permissions import IsAutenticado, IsDirectivo, IsMonitor, IsRecolectorMetricas
+from .metricas import CONTENT_TYPE_PROMETHEUS, exportar_metricas
 
 def calcular_horas_asistencia(asistencia):
     """
@@ -26,6 +30,21 @@ def calcular_horas_asistencia(asistencia):
     return asistencia
 
 
+def expresion_horas_asistencia(estado_autorizacion):
+    """
+    La regla de calcular_horas_asistencia como expresión SQL, para fijar las horas de
+    muchas filas en un solo UPDATE al pasarlas a `estado_autorizacion`.
+    """
+    campo = DecimalField(max_digits=4, decimal_places=2)
+    if estado_autorizacion != 'autorizado':
+        return Value(Decimal('0.00'), output_field=campo)
+    return Case(
+        When(presente=True, then=Value(Decimal('4.00'))),
+        default=Value(Decimal('0.00')),
+        output_field=campo
+    )
+
+
 def calcular_horas_totales_monitor(monitor_id, fecha_inicio, fecha_fin, sede=None, jornada=None):
     """
     Calcula las horas totales de un monitor incluyendo asistencias y ajustes de horas.
@@ -68,49 +87,30 @@ from .serializers import (
     AsistenciaSerializer, AsistenciaCreateSerializer, AjusteHorasSerializer, AjusteHorasCreateSerializer,
     ConfiguracionSistemaSerializer, ConfiguracionSistemaCreateSerializer
 )
-
-# Autenticación personalizada para JWT con nuestro modelo
-class UsuarioPersonalizadoJWTAuthentication(BaseAuthentication):
-    def authenticate(self, request):
-        auth_header = request.META.get('HTTP_AUTHORIZATION')
-        print(f"🔍 AUTH DEBUG - Header: {auth_header}")
-        
-        if not auth_header or not auth_header.startswith('Bearer '):
-            print("❌ AUTH DEBUG - No Bearer token found")
-            return None
-        
-        token = auth_header.split(' ')[1]
-        print(f"🔍 AUTH DEBUG - Token: {token[:50]}...")
-        
-        try:
-            # Decodificar token JWT
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-            print(f"🔍 AUTH DEBUG - Payload: {payload}")
-            
-            user_id = payload.get('user_id')
-            print(f"🔍 AUTH DEBUG - User ID: {user_id}")
-            
-            if not user_id:
-                print("❌ AUTH DEBUG - No user_id in payload")
-                return None
-            
-            # Buscar usuario personalizado
-            usuario = UsuarioPersonalizado.objects.get(pk=user_id)
-            print(f"✅ AUTH DEBUG - Usuario encontrado: {usuario.username} (ID: {usuario.id})")
-            
-            return (usuario, token)
-            
-        except jwt.InvalidTokenError as e:
-            print(f"❌ AUTH DEBUG - JWT Error: {e}")
-            return None
-        except UsuarioPersonalizado.DoesNotExist as e:
-            print(f"❌ AUTH DEBUG - Usuario no existe: {e}")
-            return None
-        except Exception as e:
-            print(f"❌ AUTH DEBUG - Error general: {e}")
-            return None
+from .reportes import reporte_horas_todos
+from .resumenes import actualizar_resumen_diario, pares_de_horarios
+from .configuracion import obtener_configuracion_cacheada, invalidar_configuraciones
+from .generacion import generar_asistencias_faltantes, asistencias_virtuales
+from .exportaciones import FORMATOS_EXPORTACION, COLUMNAS_ASISTENCIAS, COLUMNAS_AJUSTES, respuesta_exportacion
+from .serializacion import asistencias_a_dicts, asistencias_en_memoria_a_dicts, ajustes_a_dicts
+from .busqueda import buscar_monitores
+from .condicionales import respuesta_condicional
+from .cache_reportes import invalidar_reportes, reporte_cacheado
+from .replicas import lectura_en_replica
+from .concurrencia import en_paralelo
+from .eventos import CABECERA_FLUJO, en_envoltura_asgi, flujo_eventos, publicar_asistencias
+from .trabajos import encolar_trabajo
+from .paginacion import (
+    ORDEN_ASISTENCIAS, TAMANO_PAGINA_POR_DEFECTO, TAMANO_PAGINA_MAXIMO, CursorInvalido,
+    clave_asistencia, codificar_cursor, decodificar_cursor, filtrar_despues_de, esta_despues_de
+)
+from .finanzas import (
+    COSTO_POR_HORA_POR_DEFECTO, SEMANAS_SEMESTRE_POR_DEFECTO,
+    obtener_parametros_finanzas, calcular_finanzas_monitores, comparativa_semanas
+)
 
 @api_view(['POST'])
+@authentication_classes([])
 @permission_classes([AllowAny])
 def login_usuario(request):
     """
@@ -138,17 +138,13 @@ def login_usuario(request):
                 status=status.HTTP_401_UNAUTHORIZED
             )
         
-        # Generar token JWT que no expira
-        refresh = RefreshToken.for_user(usuario)
-        access_token = refresh.access_token
-        
-        # Configurar el token para que no expire
-        access_token.set_exp(lifetime=None)
+        # Generar token JWT que no expira (con el rol como claim)
+        token = emitir_token(usuario)
         
         # Crear respuesta con token y datos del usuario usando el serializer
         usuario_serializer = UsuarioSerializer(usuario)
         response_data = {
-            'token': str(access_token),
+            'token': token,
             'usuario': usuario_serializer.data
         }
         
@@ -157,6 +153,7 @@ def login_usuario(request):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 @api_view(['POST'])
+@authentication_classes([])
 @permission_classes([AllowAny])
 def registro_usuario(request):
     """
@@ -170,16 +167,14 @@ def registro_usuario(request):
         usuario = serializer.save()
         
         # Generar token JWT automáticamente para el usuario recién creado
-        refresh = RefreshToken.for_user(usuario)
-        access_token = refresh.access_token
-        access_token.set_exp(lifetime=None)
+        token = emitir_token(usuario)
         
         # Serializar datos del usuario para la respuesta
         usuario_serializer = UsuarioSerializer(usuario)
         
         response_data = {
             'mensaje': 'Usuario registrado exitosamente',
-            'token': str(access_token),
+            'token': token,
             'usuario': usuario_serializer.data
         }
         
@@ -188,7 +183,7 @@ def registro_usuario(request):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 @api_view(['GET'])
-@permission_classes([IsAuthenticated])
+@permission_classes([IsAutenticado])
 def obtener_usuario_actual(request):
     """
     Endpoint para obtener información del usuario autenticado
@@ -198,31 +193,14 @@ def obtener_usuario_actual(request):
 
 # Vistas para HorarioFijo
 @api_view(['GET', 'POST'])
-@authentication_classes([])  # Deshabilitar autenticación automática
-@permission_classes([AllowAny])  # Permitir acceso para manejar autenticación manual
+@permission_classes([IsAutenticado])
+@respuesta_condicional(HorarioFijo)
 def horarios_fijos(request):
     """
     GET: Obtener horarios fijos del usuario
     POST: Crear nuevo horario fijo
     """
-    # Obtener usuario desde el token JWT
-    auth_header = request.headers.get('Authorization')
-    if not auth_header or not auth_header.startswith('Bearer '):
-        return Response({'detail': 'Token de autenticación requerido', 'code': 'token_required'}, status=status.HTTP_401_UNAUTHORIZED)
-    token = auth_header.split(' ')[1]
-    try:
-        payload = AccessToken(token)
-        user_id = payload.get('user_id')
-    except Exception:
-        try:
-            payload = jwt.decode(token, options={"verify_signature": False})
-            user_id = payload.get('user_id')
-        except Exception as e:
-            return Response({'detail': f'Token inválido: {str(e)}', 'code': 'invalid_token'}, status=status.HTTP_401_UNAUTHORIZED)
-    try:
-        usuario = UsuarioPersonalizado.objects.get(pk=user_id)
-    except UsuarioPersonalizado.DoesNotExist:
-        return Response({'detail': 'User not found', 'code': 'user_not_found'}, status=status.HTTP_404_NOT_FOUND)
+    usuario = request.user
     
     if request.method == 'GET':
         horarios = HorarioFijo.objects.filter(usuario=usuario)
@@ -237,32 +215,14 @@ def horarios_fijos(request):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 @api_view(['GET', 'PUT', 'DELETE'])
-@authentication_classes([])  # Deshabilitar autenticación automática
-@permission_classes([AllowAny])  # Permitir acceso para manejar autenticación manual
+@permission_classes([IsAutenticado])
 def horario_fijo_detalle(request, pk):
     """
     GET: Obtener horario fijo específico
     PUT: Actualizar horario fijo
     DELETE: Eliminar horario fijo
     """
-    # Obtener usuario desde el token JWT
-    auth_header = request.headers.get('Authorization')
-    if not auth_header or not auth_header.startswith('Bearer '):
-        return Response({'detail': 'Token de autenticación requerido', 'code': 'token_required'}, status=status.HTTP_401_UNAUTHORIZED)
-    token = auth_header.split(' ')[1]
-    try:
-        payload = AccessToken(token)
-        user_id = payload.get('user_id')
-    except Exception:
-        try:
-            payload = jwt.decode(token, options={"verify_signature": False})
-            user_id = payload.get('user_id')
-        except Exception as e:
-            return Response({'detail': f'Token inválido: {str(e)}', 'code': 'invalid_token'}, status=status.HTTP_401_UNAUTHORIZED)
-    try:
-        usuario = UsuarioPersonalizado.objects.get(pk=user_id)
-    except UsuarioPersonalizado.DoesNotExist:
-        return Response({'detail': 'User not found', 'code': 'user_not_found'}, status=status.HTTP_404_NOT_FOUND)
+    usuario = request.user
     
     try:
         horario = HorarioFijo.objects.get(pk=pk, usuario=usuario)
@@ -276,48 +236,28 @@ def horario_fijo_detalle(request, pk):
     elif request.method == 'PUT':
         serializer = HorarioFijoCreateSerializer(horario, data=request.data)
         if serializer.is_valid():
-            serializer.save()
+            # Cambiar sede/jornada mueve las asistencias del horario en el resumen diario
+            with transaction.atomic():
+                pares = pares_de_horarios([horario.pk])
+                serializer.save()
+                actualizar_resumen_diario(pares)
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     elif request.method == 'DELETE':
-        horario.delete()
+        with transaction.atomic():
+            pares = pares_de_horarios([horario.pk])
+            horario.delete()
+            actualizar_resumen_diario(pares)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 @api_view(['POST'])
-@authentication_classes([])  # Deshabilitar autenticación automática
-@permission_classes([AllowAny])  # Cambiamos a AllowAny para manejar la autenticación manualmente
+@permission_classes([IsAutenticado])
 def horarios_fijos_multiple(request):
     """
     Crear múltiples horarios fijos en una sola petición
     """
-    print("=== INICIO DE VISTA horarios_fijos_multiple ===")
-    print(f"Método HTTP: {request.method}")
-    print(f"URL: {request.path}")
-    print(f"Headers completos: {dict(request.headers)}")
-    print(f"Headers de autorización: {request.headers.get('Authorization', 'No presente')}")
-    print(f"Content-Type: {request.headers.get('Content-Type', 'No especificado')}")
-    print(f"Body de la petición: {request.body}")
-    print(f"Data de la petición: {request.data}")
-    
-    # Verificar autenticación manualmente y obtener usuario desde el token
-    auth_header = request.headers.get('Authorization')
-    if not auth_header or not auth_header.startswith('Bearer '):
-        return Response({'detail': 'Token de autenticación requerido', 'code': 'token_required'}, status=status.HTTP_401_UNAUTHORIZED)
-    token = auth_header.split(' ')[1]
-    try:
-        payload = AccessToken(token)
-        user_id = payload.get('user_id')
-    except Exception:
-        try:
-            payload = jwt.decode(token, options={"verify_signature": False})
-            user_id = payload.get('user_id')
-        except Exception as e:
-            return Response({'detail': f'Token inválido: {str(e)}', 'code': 'invalid_token'}, status=status.HTTP_401_UNAUTHORIZED)
-    try:
-        usuario = UsuarioPersonalizado.objects.get(pk=user_id)
-    except UsuarioPersonalizado.DoesNotExist:
-        return Response({'detail': 'User not found', 'code': 'user_not_found'}, status=status.HTTP_404_NOT_FOUND)
+    usuario = request.user
     
     serializer = HorarioFijoMultipleSerializer(data=request.data)
     
@@ -379,49 +319,26 @@ def horarios_fijos_multiple(request):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 @api_view(['PUT', 'POST'])  # Permitir tanto PUT como POST
-@authentication_classes([])  # Deshabilitar autenticación automática
-@permission_classes([AllowAny])  # Cambiamos a AllowAny para manejar la autenticación manualmente
+@permission_classes([IsAutenticado])
 def horarios_fijos_edit_multiple(request):
     """
     Editar múltiples horarios fijos en una sola petición
     Esta funcionalidad reemplaza TODOS los horarios existentes del usuario con los nuevos
     """
-    print("=== INICIO DE VISTA horarios_fijos_edit_multiple ===")
-    print(f"Método HTTP: {request.method}")
-    print(f"URL: {request.path}")
-    print(f"Headers completos: {dict(request.headers)}")
-    print(f"Headers de autorización: {request.headers.get('Authorization', 'No presente')}")
-    print(f"Content-Type: {request.headers.get('Content-Type', 'No especificado')}")
-    print(f"Body de la petición: {request.body}")
-    print(f"Data de la petición: {request.data}")
-    
-    # Verificar autenticación manualmente y obtener usuario desde el token
-    auth_header = request.headers.get('Authorization')
-    if not auth_header or not auth_header.startswith('Bearer '):
-        return Response({'detail': 'Token de autenticación requerido', 'code': 'token_required'}, status=status.HTTP_401_UNAUTHORIZED)
-    token = auth_header.split(' ')[1]
-    try:
-        payload = AccessToken(token)
-        user_id = payload.get('user_id')
-    except Exception:
-        try:
-            payload = jwt.decode(token, options={"verify_signature": False})
-            user_id = payload.get('user_id')
-        except Exception as e:
-            return Response({'detail': f'Token inválido: {str(e)}', 'code': 'invalid_token'}, status=status.HTTP_401_UNAUTHORIZED)
-    try:
-        usuario = UsuarioPersonalizado.objects.get(pk=user_id)
-    except UsuarioPersonalizado.DoesNotExist:
-        return Response({'detail': 'User not found', 'code': 'user_not_found'}, status=status.HTTP_404_NOT_FOUND)
+    usuario = request.user
     
     serializer = HorarioFijoEditMultipleSerializer(data=request.data)
     
     if serializer.is_valid():
         horarios_data = serializer.validated_data['horarios']
         
-        # Eliminar todos los horarios existentes del usuario
+        # Eliminar todos los horarios existentes del usuario (y sus asistencias del resumen diario)
         horarios_eliminados = HorarioFijo.objects.filter(usuario=usuario).count()
-        HorarioFijo.objects.filter(usuario=usuario).delete()
+        with transaction.atomic():
+            horarios_usuario = HorarioFijo.objects.filter(usuario=usuario)
+            pares = pares_de_horarios(horarios_usuario)
+            horarios_usuario.delete()
+            actualizar_resumen_diario(pares)
         print(f"Eliminados {horarios_eliminados} horarios existentes")
         
         # Crear los nuevos horarios
@@ -473,7 +390,7 @@ def horarios_fijos_edit_multiple(request):
 
 # Vistas para Asistencia
 @api_view(['GET', 'POST'])
-@permission_classes([IsAuthenticated])
+@permission_classes([IsAutenticado])
 def asistencias(request):
     """
     GET: Obtener asistencias del usuario
@@ -481,18 +398,19 @@ def asistencias(request):
     """
     if request.method == 'GET':
         asistencias = Asistencia.objects.filter(usuario=request.user)
-        serializer = AsistenciaSerializer(asistencias, many=True)
-        return Response(serializer.data)
+        return Response(asistencias_a_dicts(asistencias))
     
     elif request.method == 'POST':
         serializer = AsistenciaCreateSerializer(data=request.data)
         if serializer.is_valid():
-            serializer.save(usuario=request.user)
+            with transaction.atomic():
+                asistencia = serializer.save(usuario=request.user)
+                actualizar_resumen_diario([(asistencia.usuario_id, asistencia.fecha)])
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 @api_view(['GET', 'PUT', 'DELETE'])
-@permission_classes([IsAuthenticated])
+@permission_classes([IsAutenticado])
 def asistencia_detalle(request, pk):
     """
     GET: Obtener asistencia específica
@@ -511,12 +429,20 @@ def asistencia_detalle(request, pk):
     elif request.method == 'PUT':
         serializer = AsistenciaCreateSerializer(asistencia, data=request.data)
         if serializer.is_valid():
-            serializer.save()
+            fecha_anterior = asistencia.fecha
+            with transaction.atomic():
+                serializer.save()
+                actualizar_resumen_diario([
+                    (asistencia.usuario_id, fecha_anterior),
+                    (asistencia.usuario_id, asistencia.fecha)
+                ])
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     elif request.method == 'DELETE':
-        asistencia.delete()
+        with transaction.atomic():
+            asistencia.delete()
+            actualizar_resumen_diario([(asistencia.usuario_id, asistencia.fecha)])
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 # ===== Endpoints para DIRECTIVOS =====
@@ -529,29 +455,29 @@ def _parse_fecha(fecha_str: str | None) -> date:
     except Exception:
         return date.today()
 
+# Máximo de días que se pueden abrir en una sola llamada a directivo_generar_asistencias
+MAX_DIAS_GENERACION = 31
+
+# Tablas de las que dependen los reportes y las finanzas (ETag, ver condicionales.py)
+MODELOS_REPORTES = (Asistencia, AjusteHoras, HorarioFijo, UsuarioPersonalizado)
+MODELOS_FINANZAS = MODELOS_REPORTES + (ConfiguracionSistema,)
+# Caché de respuestas (ver cache_reportes.py): además, el resumen diario que leen los reportes
+MODELOS_CACHE_REPORTES = MODELOS_REPORTES + (ResumenHorasDiario,)
+MODELOS_CACHE_FINANZAS = MODELOS_FINANZAS + (ResumenHorasDiario,)
+
 def _dia_semana_de_fecha(fecha_obj: date) -> int:
     # Python: Monday=0 ... Sunday=6; coincide con nuestro enum
     return fecha_obj.weekday()
 
 @api_view(['GET'])
-@authentication_classes([])
-@permission_classes([AllowAny])
+@permission_classes([IsDirectivo])
+@respuesta_condicional(HorarioFijo, UsuarioPersonalizado)
 def directivo_horarios_monitores(request):
     """
     Listar todos los horarios fijos de todos los monitores.
     Filtros opcionales: usuario_id, dia_semana, jornada, sede
     Acceso: solo DIRECTIVO
     """
-    # Autenticación manual
-    auth_header = request.headers.get('Authorization')
-    if not auth_header or not auth_header.startswith('Bearer '):
-        return Response({'detail': 'Token de autenticación requerido'}, status=status.HTTP_401_UNAUTHORIZED)
-
-    # Usuario DIRECTIVO temporal
-    usuario_directivo = UsuarioPersonalizado.objects.filter(tipo_usuario='DIRECTIVO').first()
-    if not usuario_directivo:
-        return Response({'detail': 'No hay usuarios DIRECTIVO'}, status=status.HTTP_403_FORBIDDEN)
-
     # Parámetros de filtrado
     usuario_id = request.query_params.get('usuario_id')  # ID específico de monitor
     dia_semana = request.query_params.get('dia_semana')  # 0-6
@@ -603,49 +529,48 @@ def directivo_horarios_monitores(request):
     
     return Response(response_data)
 
-@api_view(['GET'])
-@authentication_classes([])
-@permission_classes([AllowAny])
-def directivo_asistencias(request):
+def _horarios_del_dia(fecha_obj, params):
     """
-    Listar todas las asistencias de todos los monitores con filtros.
-    Filtros opcionales: fecha, estado, jornada, sede, usuario_id
-    Acceso: solo DIRECTIVO
+    Horarios fijos de monitores del día de la semana de fecha_obj, con los filtros
+    jornada, sede y usuario_id de _asistencias_directivo_qs (ya validados).
     """
-    # Autenticación manual
-    auth_header = request.headers.get('Authorization')
-    if not auth_header or not auth_header.startswith('Bearer '):
-        return Response({'detail': 'Token de autenticación requerido'}, status=status.HTTP_401_UNAUTHORIZED)
+    jornada = params.get('jornada')
+    sede = params.get('sede')
+    usuario_id = params.get('usuario_id')
 
-    # Verificar que el usuario sea DIRECTIVO
-    token = auth_header.split(' ')[1]
-    try:
-        payload = AccessToken(token)
-        user_id = payload.get('user_id')
-    except Exception:
-        try:
-            payload = jwt.decode(token, options={"verify_signature": False})
-            user_id = payload.get('user_id')
-        except Exception as e:
-            return Response({'detail': f'Token inválido: {str(e)}', 'code': 'invalid_token'}, status=status.HTTP_401_UNAUTHORIZED)
-    
-    try:
-        usuario = UsuarioPersonalizado.objects.get(pk=user_id)
-        if usuario.tipo_usuario != 'DIRECTIVO':
-            return Response({'detail': 'Acceso denegado. Solo directivos pueden acceder a este endpoint.'}, status=status.HTTP_403_FORBIDDEN)
-    except UsuarioPersonalizado.DoesNotExist:
-        return Response({'detail': 'Usuario no encontrado', 'code': 'user_not_found'}, status=status.HTTP_404_NOT_FOUND)
+    # Todos los horarios fijos de monitores para ese día de la semana (0=Lunes, 6=Domingo)
+    horarios_qs = HorarioFijo.objects.filter(
+        usuario__tipo_usuario='MONITOR',
+        dia_semana=fecha_obj.weekday()
+    )
 
-    # Parámetros de filtrado
-    fecha_str = request.query_params.get('fecha')  # Fecha específica (YYYY-MM-DD)
-    fecha_inicio = request.query_params.get('fecha_inicio')  # Rango inicio
-    fecha_fin = request.query_params.get('fecha_fin')  # Rango fin
-    estado = request.query_params.get('estado')  # pendiente|autorizado|rechazado
-    jornada = request.query_params.get('jornada')  # M|T
-    sede = request.query_params.get('sede')  # SA|BA
-    usuario_id = request.query_params.get('usuario_id')  # ID específico de monitor
+    # Aplicar filtros de jornada, sede y monitor si se proporcionan
+    if jornada and jornada.lower() != 'todas':
+        horarios_qs = horarios_qs.filter(jornada=jornada)
+    if sede and sede.lower() != 'todas':
+        horarios_qs = horarios_qs.filter(sede=sede)
+    if usuario_id:
+        horarios_qs = horarios_qs.filter(usuario__id=int(usuario_id))
+    return horarios_qs
+
+def _asistencias_directivo_qs(params):
+    """
+    Asistencias de monitores filtradas con los parámetros de directivo_asistencias:
+    fecha (YYYY-MM-DD o MM/DD/YYYY), fecha_inicio, fecha_fin, estado, jornada, sede y usuario_id.
+    Retorna (queryset, fecha_obj, respuesta_de_error).
+    """
+    fecha_str = params.get('fecha')  # Fecha específica
+    fecha_inicio = params.get('fecha_inicio')  # Rango inicio
+    fecha_fin = params.get('fecha_fin')  # Rango fin
+    estado = params.get('estado')  # pendiente|autorizado|rechazado
+    jornada = params.get('jornada')  # M|T
+    sede = params.get('sede')  # SA|BA
+    usuario_id = params.get('usuario_id')  # ID específico de monitor
+
+    # Query base: solo asistencias de monitores
+    asistencias_qs = Asistencia.objects.filter(usuario__tipo_usuario='MONITOR').select_related('usuario', 'horario')
+    fecha_obj = None
 
-    # Si se proporciona una fecha específica, crear asistencias faltantes basadas en horarios fijos
     if fecha_str:
         try:
             # Intentar formato YYYY-MM-DD primero
@@ -655,53 +580,7 @@ def directivo_asistencias(request):
                 # Intentar formato MM/DD/YYYY (formato del frontend)
                 fecha_obj = datetime.strptime(fecha_str, "%m/%d/%Y").date()
             except ValueError:
-                return Response({'detail': 'Formato de fecha inválido. Use YYYY-MM-DD o MM/DD/YYYY'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Obtener el día de la semana (0=Lunes, 6=Domingo)
-        dia_semana = fecha_obj.weekday()
-        
-        # Buscar todos los horarios fijos de monitores para ese día de la semana
-        horarios_qs = HorarioFijo.objects.filter(
-            usuario__tipo_usuario='MONITOR',
-            dia_semana=dia_semana
-        )
-        
-        # Aplicar filtros de jornada y sede si se proporcionan
-        if jornada and jornada.lower() != 'todas':
-            if jornada not in ['M', 'T']:
-                return Response({'detail': 'jornada debe ser M o T'}, status=status.HTTP_400_BAD_REQUEST)
-            horarios_qs = horarios_qs.filter(jornada=jornada)
-        
-        if sede and sede.lower() != 'todas':
-            if sede not in ['SA', 'BA']:
-                return Response({'detail': 'sede debe ser SA o BA'}, status=status.HTTP_400_BAD_REQUEST)
-            horarios_qs = horarios_qs.filter(sede=sede)
-        
-        if usuario_id:
-            try:
-                usuario_id = int(usuario_id)
-                horarios_qs = horarios_qs.filter(usuario__id=usuario_id)
-            except ValueError:
-                return Response({'detail': 'usuario_id debe ser un número entero'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Crear asistencias faltantes para todos los horarios encontrados
-        for horario in horarios_qs:
-            Asistencia.objects.get_or_create(
-                usuario=horario.usuario,
-                fecha=fecha_obj,
-                horario=horario,
-                defaults={
-                    'presente': False,
-                    'estado_autorizacion': 'pendiente',
-                    'horas': 0.00
-                }
-            )
-
-    # Query base: solo asistencias de monitores
-    asistencias_qs = Asistencia.objects.filter(usuario__tipo_usuario='MONITOR').select_related('usuario', 'horario')
-    
-    # Aplicar filtros a la consulta de asistencias
-    if fecha_obj:
+                return None, None, Response({'detail': 'Formato de fecha inválido. Use YYYY-MM-DD o MM/DD/YYYY'}, status=status.HTTP_400_BAD_REQUEST)
         asistencias_qs = asistencias_qs.filter(fecha=fecha_obj)
     elif fecha_inicio or fecha_fin:
         if fecha_inicio:
@@ -709,141 +588,409 @@ def directivo_asistencias(request):
                 fecha_inicio_obj = datetime.strptime(fecha_inicio, "%Y-%m-%d").date()
                 asistencias_qs = asistencias_qs.filter(fecha__gte=fecha_inicio_obj)
             except ValueError:
-                return Response({'detail': 'Formato de fecha_inicio inválido. Use YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+                return None, None, Response({'detail': 'Formato de fecha_inicio inválido. Use YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
         if fecha_fin:
             try:
                 fecha_fin_obj = datetime.strptime(fecha_fin, "%Y-%m-%d").date()
                 asistencias_qs = asistencias_qs.filter(fecha__lte=fecha_fin_obj)
             except ValueError:
-                return Response({'detail': 'Formato de fecha_fin inválido. Use YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+                return None, None, Response({'detail': 'Formato de fecha_fin inválido. Use YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
     
     if estado and estado.lower() != 'todos':
         if estado not in ['pendiente', 'autorizado', 'rechazado']:
-            return Response({'detail': 'estado debe ser: pendiente, autorizado o rechazado'}, status=status.HTTP_400_BAD_REQUEST)
+            return None, None, Response({'detail': 'estado debe ser: pendiente, autorizado o rechazado'}, status=status.HTTP_400_BAD_REQUEST)
         asistencias_qs = asistencias_qs.filter(estado_autorizacion=estado)
     
     if jornada and jornada.lower() != 'todas':
         if jornada not in ['M', 'T']:
-            return Response({'detail': 'jornada debe ser M o T'}, status=status.HTTP_400_BAD_REQUEST)
+            return None, None, Response({'detail': 'jornada debe ser M o T'}, status=status.HTTP_400_BAD_REQUEST)
         asistencias_qs = asistencias_qs.filter(horario__jornada=jornada)
     
     if sede and sede.lower() != 'todas':
         if sede not in ['SA', 'BA']:
-            return Response({'detail': 'sede debe ser SA o BA'}, status=status.HTTP_400_BAD_REQUEST)
+            return None, None, Response({'detail': 'sede debe ser SA o BA'}, status=status.HTTP_400_BAD_REQUEST)
         asistencias_qs = asistencias_qs.filter(horario__sede=sede)
     
     if usuario_id:
         try:
-            usuario_id = int(usuario_id)
-            asistencias_qs = asistencias_qs.filter(usuario__id=usuario_id)
+            asistencias_qs = asistencias_qs.filter(usuario__id=int(usuario_id))
         except ValueError:
-            return Response({'detail': 'usuario_id debe ser un número entero'}, status=status.HTTP_400_BAD_REQUEST)
+            return None, None, Response({'detail': 'usuario_id debe ser un número entero'}, status=status.HTTP_400_BAD_REQUEST)
+
+    return asistencias_qs, fecha_obj, None
+
+@api_view(['GET'])
+@permission_classes([IsDirectivo])
+@respuesta_condicional(Asistencia, HorarioFijo, UsuarioPersonalizado)
+def directivo_asistencias(request):
+    """
+    Listar todas las asistencias de todos los monitores con filtros.
+    Filtros opcionales: fecha, estado, jornada, sede, usuario_id
+    Paginación opcional por cursor: page_size, cursor (valor 'next' de la página anterior)
+    e incluir_totales (true por defecto).
+    Acceso: solo DIRECTIVO
+    """
+    # Parámetros de filtrado (ver _asistencias_directivo_qs)
+    estado = request.query_params.get('estado')  # pendiente|autorizado|rechazado
+
+    # Paginación por cursor: se activa al enviar page_size o cursor
+    paginar = 'page_size' in request.query_params or 'cursor' in request.query_params
+    incluir_totales = request.query_params.get('incluir_totales', 'true').lower() not in ['false', '0', 'no']
+    cursor = None
+    if paginar:
+        try:
+            page_size = int(request.query_params.get('page_size', TAMANO_PAGINA_POR_DEFECTO))
+        except ValueError:
+            return Response({'detail': 'page_size debe ser un número entero'}, status=status.HTTP_400_BAD_REQUEST)
+        if page_size < 1:
+            return Response({'detail': 'page_size debe ser mayor que cero'}, status=status.HTTP_400_BAD_REQUEST)
+        page_size = min(page_size, TAMANO_PAGINA_MAXIMO)
+        if request.query_params.get('cursor'):
+            try:
+                cursor = decodificar_cursor(request.query_params.get('cursor'))
+            except CursorInvalido:
+                return Response({'detail': 'cursor inválido'}, status=status.HTTP_400_BAD_REQUEST)
+
+    # Filtros: se validan todos los parámetros antes de escribir nada
+    asistencias_qs, fecha_obj, error = _asistencias_directivo_qs(request.query_params)
+    if error:
+        return error
+
+    # Si se proporciona una fecha específica, crear asistencias faltantes basadas en horarios fijos
+    if fecha_obj:
+        horarios_qs = _horarios_del_dia(fecha_obj, request.query_params)
+
+        # Crear asistencias faltantes para todos los horarios encontrados (un solo INSERT).
+        # En modo virtual no se escribe nada: las pendientes se agregan al responder.
+        if not settings.ASISTENCIAS_VIRTUALES:
+            generar_asistencias_faltantes(fecha_obj, fecha_obj, horarios_qs)
 
     # Ordenar por fecha (más reciente primero) y luego por usuario
-    asistencias_qs = asistencias_qs.order_by('-fecha', 'usuario__nombre', 'horario__jornada')
-    
-    # Serializar y responder
-    serializer = AsistenciaSerializer(asistencias_qs, many=True)
-    
-    # Calcular estadísticas
-    total_asistencias = asistencias_qs.count()
-    total_horas = sum(float(asistencia.horas) for asistencia in asistencias_qs)
-    monitores_distintos = asistencias_qs.values('usuario').distinct().count()
-    
-    # Preparar respuesta con formato para el frontend
-    asistencias_data = []
-    for asistencia in asistencias_qs:
-        asistencias_data.append({
-            'id': asistencia.id,
-            'monitor': asistencia.usuario.nombre,
-            'monitor_id': asistencia.usuario.id,
-            'monitor_username': asistencia.usuario.username,
-            'dia': asistencia.fecha.strftime('%Y-%m-%d'),
-            'dia_display': asistencia.fecha.strftime('%d/%m/%Y'),
-            'jornada': asistencia.horario.jornada,
-            'jornada_display': asistencia.horario.get_jornada_display(),
-            'sede': asistencia.horario.sede,
-            'sede_display': asistencia.horario.get_sede_display(),
-            'marcado': asistencia.presente,
-            'estado': asistencia.estado_autorizacion,
-            'estado_display': asistencia.get_estado_autorizacion_display(),
-            'horas': float(asistencia.horas)
+    asistencias_qs = asistencias_qs.order_by(*ORDEN_ASISTENCIAS)
+
+    # Modo virtual: jornadas pendientes que no tienen fila (id=None)
+    virtuales = []
+    if settings.ASISTENCIAS_VIRTUALES and fecha_obj and (not estado or estado.lower() == 'todos' or estado == 'pendiente'):
+        virtuales = asistencias_virtuales(fecha_obj, fecha_obj, horarios_qs)
+
+    if not paginar:
+        asistencias_lista = list(asistencias_qs)
+        if virtuales:
+            asistencias_lista.extend(virtuales)
+            asistencias_lista.sort(key=clave_asistencia)
+
+        return Response({
+            'total_asistencias': len(asistencias_lista),
+            'total_horas': sum(float(asistencia.horas) for asistencia in asistencias_lista),
+            'monitores_distintos': len({asistencia.usuario_id for asistencia in asistencias_lista}),
+            'asistencias': [_asistencia_directivo_a_dict(asistencia) for asistencia in asistencias_lista]
         })
-    
-    response_data = {
-        'total_asistencias': total_asistencias,
-        'total_horas': total_horas,
-        'monitores_distintos': monitores_distintos,
-        'asistencias': asistencias_data
-    }
-    
+
+    # Página: filas posteriores al cursor, una más para saber si hay siguiente página
+    pagina_qs = filtrar_despues_de(asistencias_qs, cursor) if cursor else asistencias_qs
+    asistencias_lista = list(pagina_qs[:page_size + 1])
+    if virtuales:
+        asistencias_lista.extend(a for a in virtuales if cursor is None or esta_despues_de(a, cursor))
+        asistencias_lista.sort(key=clave_asistencia)
+    hay_mas = len(asistencias_lista) > page_size
+    asistencias_lista = asistencias_lista[:page_size]
+
+    response_data = {}
+    if incluir_totales:
+        # Totales de todo el filtro en una sola consulta de agregación
+        totales = asistencias_qs.order_by().aggregate(
+            total=Count('id'),
+            horas=Sum('horas'),
+            monitores=Count('usuario', distinct=True)
+        )
+        monitores_distintos = totales['monitores']
+        if virtuales:
+            monitores_distintos = len(
+                set(asistencias_qs.order_by().values_list('usuario_id', flat=True).distinct())
+                | {asistencia.usuario_id for asistencia in virtuales}
+            )
+        response_data.update({
+            'total_asistencias': totales['total'] + len(virtuales),
+            'total_horas': float(totales['horas'] or 0),
+            'monitores_distintos': monitores_distintos
+        })
+    response_data.update({
+        'asistencias': [_asistencia_directivo_a_dict(asistencia) for asistencia in asistencias_lista],
+        'page_size': page_size,
+        'next': codificar_cursor(asistencias_lista[-1]) if hay_mas else None
+    })
     return Response(response_data)
 
+def _asistencia_directivo_a_dict(asistencia):
+    """Fila del listado de asistencias de directivos (formato del frontend)."""
+    return {
+        'id': asistencia.id,
+        'monitor': asistencia.usuario.nombre,
+        'monitor_id': asistencia.usuario.id,
+        'monitor_username': asistencia.usuario.username,
+        'dia': asistencia.fecha.strftime('%Y-%m-%d'),
+        'dia_display': asistencia.fecha.strftime('%d/%m/%Y'),
+        'jornada': asistencia.horario.jornada,
+        'jornada_display': asistencia.horario.get_jornada_display(),
+        'sede': asistencia.horario.sede,
+        'sede_display': asistencia.horario.get_sede_display(),
+        'marcado': asistencia.presente,
+        'estado': asistencia.estado_autorizacion,
+        'estado_display': asistencia.get_estado_autorizacion_display(),
+        'horas': float(asistencia.horas)
+    }
+
+@api_view(['GET'])
+@permission_classes([IsDirectivo])
+def directivo_asistencias_eventos(request):
+    """
+    Flujo de cambios de asistencias y ajustes (Server-Sent Events) para la bandeja
+    de pendientes. Acepta Last-Event-ID para reanudar. Acceso: solo DIRECTIVO
+    """
+    if en_envoltura_asgi(request):
+        # Con ASGI los eventos los envía con_flujo_de_eventos desde el event loop
+        respuesta = StreamingHttpResponse(iter(()), content_type='text/event-stream')
+        respuesta[CABECERA_FLUJO] = '1'
+    else:
+        respuesta = StreamingHttpResponse(
+            flujo_eventos(request.META.get('HTTP_LAST_EVENT_ID', '')), content_type='text/event-stream'
+        )
+    respuesta['Cache-Control'] = 'no-cache'
+    respuesta['X-Accel-Buffering'] = 'no'
+    return respuesta
+
+@api_view(['GET'])
+@permission_classes([IsDirectivo])
+def directivo_exportar_asistencias(request):
+    """
+    Exporta en streaming las asistencias con los mismos filtros de directivo_asistencias.
+    Parámetro formato: csv (por defecto) o ndjson. No crea asistencias faltantes.
+    Acceso: solo DIRECTIVO
+    """
+    formato = request.query_params.get('formato', 'csv')
+    if formato not in FORMATOS_EXPORTACION:
+        return Response({'detail': 'formato debe ser csv o ndjson'}, status=status.HTTP_400_BAD_REQUEST)
+
+    asistencias_qs, _, error = _asistencias_directivo_qs(request.query_params)
+    if error:
+        return error
+
+    return respuesta_exportacion(asistencias_qs.order_by(*ORDEN_ASISTENCIAS), COLUMNAS_ASISTENCIAS, formato, 'asistencias')
+
 @api_view(['POST'])
-@authentication_classes([])
-@permission_classes([AllowAny])
-def directivo_autorizar_asistencia(request, pk):
-    # Auth manual y rol DIRECTIVO
-    auth_header = request.headers.get('Authorization')
-    if not auth_header or not auth_header.startswith('Bearer '):
-        return Response({'detail': 'Token de autenticación requerido'}, status=status.HTTP_401_UNAUTHORIZED)
-    usuario_directivo = UsuarioPersonalizado.objects.filter(tipo_usuario='DIRECTIVO').first()
-    if not usuario_directivo:
-        return Response({'detail': 'No hay usuarios DIRECTIVO'}, status=status.HTTP_403_FORBIDDEN)
+@permission_classes([IsDirectivo])
+def directivo_generar_asistencias(request):
+    """
+    Body: { "fecha_inicio": "YYYY-MM-DD", "fecha_fin": "YYYY-MM-DD", "jornada": "M|T", "sede": "SA|BA", "usuario_id": 1 }
+    Crea de una vez las asistencias pendientes que faltan en el rango según los horarios fijos
+    (por ejemplo, para abrir una semana completa). jornada, sede y usuario_id son opcionales.
+    Acceso: solo DIRECTIVO
+    """
+    fecha_inicio_str = request.data.get('fecha_inicio')
+    fecha_fin_str = request.data.get('fecha_fin')
+    jornada = request.data.get('jornada')
+    sede = request.data.get('sede')
+    usuario_id = request.data.get('usuario_id')
 
+    if not fecha_inicio_str or not fecha_fin_str:
+        return Response({'detail': 'fecha_inicio y fecha_fin son requeridas'}, status=status.HTTP_400_BAD_REQUEST)
     try:
-        asistencia = Asistencia.objects.get(pk=pk)
-    except Asistencia.DoesNotExist:
-        return Response(status=status.HTTP_404_NOT_FOUND)
+        fecha_inicio = datetime.strptime(fecha_inicio_str, "%Y-%m-%d").date()
+        fecha_fin = datetime.strptime(fecha_fin_str, "%Y-%m-%d").date()
+    except ValueError:
+        return Response({'detail': 'Formato de fecha inválido. Use YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+    if fecha_fin < fecha_inicio:
+        return Response({'detail': 'fecha_fin debe ser mayor o igual a fecha_inicio'}, status=status.HTTP_400_BAD_REQUEST)
+    if (fecha_fin - fecha_inicio).days + 1 > MAX_DIAS_GENERACION:
+        return Response({'detail': f'El rango no puede superar {MAX_DIAS_GENERACION} días'}, status=status.HTTP_400_BAD_REQUEST)
+
+    horarios_qs = HorarioFijo.objects.filter(usuario__tipo_usuario='MONITOR')
+    if jornada:
+        if jornada not in ['M', 'T']:
+            return Response({'detail': 'jornada debe ser M o T'}, status=status.HTTP_400_BAD_REQUEST)
+        horarios_qs = horarios_qs.filter(jornada=jornada)
+    if sede:
+        if sede not in ['SA', 'BA']:
+            return Response({'detail': 'sede debe ser SA o BA'}, status=status.HTTP_400_BAD_REQUEST)
+        horarios_qs = horarios_qs.filter(sede=sede)
+    if usuario_id:
+        try:
+            horarios_qs = horarios_qs.filter(usuario__id=int(usuario_id))
+        except (ValueError, TypeError):
+            return Response({'detail': 'usuario_id debe ser un número entero'}, status=status.HTTP_400_BAD_REQUEST)
+
+    total_creadas = generar_asistencias_faltantes(fecha_inicio, fecha_fin, horarios_qs)
+
+    return Response({
+        'mensaje': f'Se generaron {total_creadas} asistencias pendientes',
+        'periodo': {
+            'fecha_inicio': fecha_inicio.strftime('%Y-%m-%d'),
+            'fecha_fin': fecha_fin.strftime('%Y-%m-%d')
+        },
+        'total_creadas': total_creadas
+    }, status=status.HTTP_201_CREATED)
+
+def _asistencia_a_decidir(request, pk):
+    """
+    Asistencia que un directivo va a autorizar o rechazar.
+    Con pk se busca la fila existente. Sin pk (asistencias virtuales, id=None) se identifica
+    por monitor_id, fecha y jornada del body y se crea la fila si aún no existe.
+    Retorna (asistencia, respuesta_de_error).
+    """
+    if pk is not None:
+        try:
+            return Asistencia.objects.get(pk=pk), None
+        except Asistencia.DoesNotExist:
+            return None, Response(status=status.HTTP_404_NOT_FOUND)
+
+    monitor_id = request.data.get('monitor_id')
+    fecha_str = request.data.get('fecha')
+    jornada = request.data.get('jornada')
+    if not monitor_id or not fecha_str or jornada not in ['M', 'T']:
+        return None, Response({'detail': 'monitor_id, fecha y jornada (M o T) son requeridos'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        fecha_obj = datetime.strptime(fecha_str, "%Y-%m-%d").date()
+    except (ValueError, TypeError):
+        return None, Response({'detail': 'Formato de fecha inválido. Use YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        horario = HorarioFijo.objects.get(
+            usuario__id=monitor_id,
+            usuario__tipo_usuario='MONITOR',
+            dia_semana=_dia_semana_de_fecha(fecha_obj),
+            jornada=jornada
+        )
+    except (HorarioFijo.DoesNotExist, ValueError):
+        return None, Response({'detail': 'El monitor no tiene horario para esa jornada en este día'}, status=status.HTTP_404_NOT_FOUND)
+
+    asistencia, _ = Asistencia.objects.get_or_create(
+        usuario_id=horario.usuario_id,
+        fecha=fecha_obj,
+        horario=horario,
+        defaults={'presente': False, 'estado_autorizacion': 'pendiente', 'horas': 0.00}
+    )
+    return asistencia, None
+
+@api_view(['POST'])
+@permission_classes([IsDirectivo])
+def directivo_autorizar_asistencia(request, pk=None):
+    asistencia, error = _asistencia_a_decidir(request, pk)
+    if error:
+        return error
 
     asistencia.estado_autorizacion = 'autorizado'
     calcular_horas_asistencia(asistencia)
-    asistencia.save()
+    with transaction.atomic():
+        asistencia.save()
+        actualizar_resumen_diario([(asistencia.usuario_id, asistencia.fecha)])
     return Response(AsistenciaSerializer(asistencia).data)
 
 @api_view(['POST'])
-@authentication_classes([])
-@permission_classes([AllowAny])
-def directivo_rechazar_asistencia(request, pk):
-    # Auth manual y rol DIRECTIVO
-    auth_header = request.headers.get('Authorization')
-    if not auth_header or not auth_header.startswith('Bearer '):
-        return Response({'detail': 'Token de autenticación requerido'}, status=status.HTTP_401_UNAUTHORIZED)
-    usuario_directivo = UsuarioPersonalizado.objects.filter(tipo_usuario='DIRECTIVO').first()
-    if not usuario_directivo:
-        return Response({'detail': 'No hay usuarios DIRECTIVO'}, status=status.HTTP_403_FORBIDDEN)
-
-    try:
-        asistencia = Asistencia.objects.get(pk=pk)
-    except Asistencia.DoesNotExist:
-        return Response(status=status.HTTP_404_NOT_FOUND)
+@permission_classes([IsDirectivo])
+def directivo_rechazar_asistencia(request, pk=None):
+    asistencia, error = _asistencia_a_decidir(request, pk)
+    if error:
+        return error
 
     asistencia.estado_autorizacion = 'rechazado'
     calcular_horas_asistencia(asistencia)
-    asistencia.save()
+    with transaction.atomic():
+        asistencia.save()
+        actualizar_resumen_diario([(asistencia.usuario_id, asistencia.fecha)])
     return Response(AsistenciaSerializer(asistencia).data)
 
+MAXIMO_ASISTENCIAS_LOTE = 5000
+ACCIONES_LOTE = {'autorizar': 'autorizado', 'rechazar': 'rechazado'}
+FILTROS_LOTE = ('fecha', 'fecha_inicio', 'fecha_fin', 'estado', 'jornada', 'sede', 'usuario_id')
+
+@api_view(['POST'])
+@permission_classes([IsDirectivo])
+def directivo_decidir_asistencias(request):
+    """
+    Autoriza o rechaza muchas asistencias en una sola petición.
+    Body: accion (autorizar|rechazar) y, o bien ids (lista de ids), o bien los filtros de
+    directivo_asistencias: fecha o fecha_inicio/fecha_fin (obligatorio), estado (por
+    defecto pendiente), jornada, sede y usuario_id.
+    El estado y las horas (4 si presente y autorizado, 0 en otro caso) se fijan con un
+    solo UPDATE ... SET horas = CASE ... dentro de una transacción.
+    Acceso: solo DIRECTIVO
+    """
+    accion = request.data.get('accion')
+    estado_nuevo = ACCIONES_LOTE.get(accion)
+    if estado_nuevo is None:
+        return Response({'detail': 'accion debe ser autorizar o rechazar'}, status=status.HTTP_400_BAD_REQUEST)
+
+    ids = request.data.get('ids')
+    if ids is not None:
+        if (not isinstance(ids, list) or not ids
+                or not all(isinstance(pk, int) and not isinstance(pk, bool) for pk in ids)):
+            return Response({'detail': 'ids debe ser una lista de números enteros'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(ids) > MAXIMO_ASISTENCIAS_LOTE:
+            return Response({'detail': f'Máximo {MAXIMO_ASISTENCIAS_LOTE} ids por petición'}, status=status.HTTP_400_BAD_REQUEST)
+        asistencias_qs = Asistencia.objects.filter(usuario__tipo_usuario='MONITOR', id__in=ids)
+    else:
+        filtros = {
+            clave: str(request.data[clave]) for clave in FILTROS_LOTE
+            if request.data.get(clave) not in (None, '')
+        }
+        if not any(clave in filtros for clave in ('fecha', 'fecha_inicio', 'fecha_fin')):
+            return Response({'detail': 'Indique ids o un filtro de fecha (fecha, fecha_inicio o fecha_fin)'}, status=status.HTTP_400_BAD_REQUEST)
+        filtros.setdefault('estado', 'pendiente')
+        asistencias_qs, fecha_obj, error = _asistencias_directivo_qs(filtros)
+        if error:
+            return error
+        if fecha_obj and settings.ASISTENCIAS_VIRTUALES and filtros['estado'].lower() in ('pendiente', 'todos'):
+            # Las jornadas pendientes sin fila (id=None) que muestra el listado también se deciden
+            generar_asistencias_faltantes(fecha_obj, fecha_obj, _horarios_del_dia(fecha_obj, filtros))
+
+    with transaction.atomic():
+        filas = list(
+            asistencias_qs.select_related(None).select_for_update(of=('self',)).order_by('id').values_list(
+                'id', 'usuario_id', 'fecha', 'horario_id', 'presente', 'estado_autorizacion'
+            )[:MAXIMO_ASISTENCIAS_LOTE + 1]
+        )
+        if len(filas) > MAXIMO_ASISTENCIAS_LOTE:
+            return Response({'detail': f'El filtro incluye más de {MAXIMO_ASISTENCIAS_LOTE} asistencias; acótelo'}, status=status.HTTP_400_BAD_REQUEST)
+
+        ids_afectados = [fila[0] for fila in filas]
+        if filas:
+            # queryset.update() no actualiza updated_at (auto_now) ni emite señales
+            Asistencia.objects.filter(pk__in=ids_afectados).update(
+                estado_autorizacion=estado_nuevo,
+                horas=expresion_horas_asistencia(estado_nuevo),
+                updated_at=timezone.now()
+            )
+            actualizar_resumen_diario({(usuario_id, fecha) for _, usuario_id, fecha, _, _, _ in filas})
+            invalidar_reportes(Asistencia)
+            publicar_asistencias([
+                (pk, usuario_id, fecha, horario_id, presente, estado_nuevo,
+                 4 if presente and estado_nuevo == 'autorizado' else 0)
+                for pk, usuario_id, fecha, horario_id, presente, _ in filas
+            ])
+
+    return Response({
+        'accion': accion,
+        'estado_autorizacion': estado_nuevo,
+        'total': len(filas),
+        'cambiadas': sum(1 for fila in filas if fila[5] != estado_nuevo),
+        'con_horas': sum(1 for fila in filas if fila[4]) if estado_nuevo == 'autorizado' else 0,
+        'ids': ids_afectados,
+        'no_encontradas': sorted(set(ids) - set(ids_afectados)) if ids is not None else []
+    })
+
 # ===== Endpoints para REPORTES =====
 
 @api_view(['GET'])
-@authentication_classes([])
-@permission_classes([AllowAny])
+@permission_classes([IsDirectivo])
+@lectura_en_replica
+@respuesta_condicional(*MODELOS_REPORTES)
+@reporte_cacheado(*MODELOS_CACHE_REPORTES)
 def directivo_reporte_horas_monitor(request, monitor_id):
     """
     Reporte de horas trabajadas por un monitor específico.
     Filtros: fecha_inicio, fecha_fin, sede, jornada
     Acceso: solo DIRECTIVO
     """
-    # Autenticación manual
-    auth_header = request.headers.get('Authorization')
-    if not auth_header or not auth_header.startswith('Bearer '):
-        return Response({'detail': 'Token de autenticación requerido'}, status=status.HTTP_401_UNAUTHORIZED)
-
-    # Usuario DIRECTIVO temporal
-    usuario_directivo = UsuarioPersonalizado.objects.filter(tipo_usuario='DIRECTIVO').first()
-    if not usuario_directivo:
-        return Response({'detail': 'No hay usuarios DIRECTIVO'}, status=status.HTTP_403_FORBIDDEN)
-
     # Verificar que el monitor existe
     try:
         monitor = UsuarioPersonalizado.objects.get(id=monitor_id, tipo_usuario='MONITOR')
@@ -858,7 +1005,6 @@ def directivo_reporte_horas_monitor(request, monitor_id):
 
     # Fechas por defecto: último mes
     if not fecha_inicio_str:
-        from datetime import date, timedelta
         fecha_inicio = date.today() - timedelta(days=30)
     else:
         fecha_inicio = _parse_fecha(fecha_inicio_str)
@@ -874,9 +1020,6 @@ def directivo_reporte_horas_monitor(request, monitor_id):
     if jornada and jornada not in ['M', 'T']:
         return Response({'detail': 'jornada debe ser M o T'}, status=status.HTTP_400_BAD_REQUEST)
 
-    # Calcular horas totales incluyendo ajustes
-    calculo_horas = calcular_horas_totales_monitor(monitor_id, fecha_inicio, fecha_fin, sede, jornada)
-
     # Query asistencias para el detalle
     asistencias_qs = Asistencia.objects.filter(
         usuario=monitor,
@@ -890,18 +1033,6 @@ def directivo_reporte_horas_monitor(request, monitor_id):
     if jornada:
         asistencias_qs = asistencias_qs.filter(horario__jornada=jornada)
 
-    # Estadísticas de asistencias
-    asistencias_presentes = asistencias_qs.filter(presente=True).count()
-    asistencias_autorizadas = asistencias_qs.filter(estado_autorizacion='autorizado').count()
-    
-    # Agrupar asistencias por fecha para el detalle
-    asistencias_por_fecha = {}
-    for asistencia in asistencias_qs.order_by('fecha', 'horario__jornada'):
-        fecha_str = asistencia.fecha.strftime('%Y-%m-%d')
-        if fecha_str not in asistencias_por_fecha:
-            asistencias_por_fecha[fecha_str] = []
-        asistencias_por_fecha[fecha_str].append(AsistenciaSerializer(asistencia).data)
-
     # Query ajustes para el detalle
     ajustes_qs = AjusteHoras.objects.filter(
         usuario=monitor,
@@ -909,13 +1040,25 @@ def directivo_reporte_horas_monitor(request, monitor_id):
         fecha__lte=fecha_fin
     ).select_related('creado_por', 'asistencia')
 
+    # Horas totales (incluyendo ajustes), estadísticas de asistencias y detalle
+    # (serialización plana): consultas independientes, en paralelo
+    calculo_horas, asistencias_presentes, asistencias_autorizadas, asistencias, ajustes = en_paralelo(
+        partial(calcular_horas_totales_monitor, monitor_id, fecha_inicio, fecha_fin, sede, jornada),
+        asistencias_qs.filter(presente=True).count,
+        asistencias_qs.filter(estado_autorizacion='autorizado').count,
+        partial(asistencias_a_dicts, asistencias_qs.order_by('fecha', 'horario__jornada')),
+        partial(ajustes_a_dicts, ajustes_qs.order_by('fecha', 'created_at'))
+    )
+
+    # Agrupar asistencias por fecha para el detalle
+    asistencias_por_fecha = {}
+    for asistencia in asistencias:
+        asistencias_por_fecha.setdefault(asistencia['fecha'], []).append(asistencia)
+
     # Agrupar ajustes por fecha
     ajustes_por_fecha = {}
-    for ajuste in ajustes_qs.order_by('fecha', 'created_at'):
-        fecha_str = ajuste.fecha.strftime('%Y-%m-%d')
-        if fecha_str not in ajustes_por_fecha:
-            ajustes_por_fecha[fecha_str] = []
-        ajustes_por_fecha[fecha_str].append(AjusteHorasSerializer(ajuste).data)
+    for ajuste in ajustes:
+        ajustes_por_fecha.setdefault(ajuste['fecha'], []).append(ajuste)
 
     # Respuesta
     response_data = {
@@ -949,24 +1092,16 @@ def directivo_reporte_horas_monitor(request, monitor_id):
     return Response(response_data)
 
 @api_view(['GET'])
-@authentication_classes([])
-@permission_classes([AllowAny])
+@permission_classes([IsDirectivo])
+@lectura_en_replica
+@respuesta_condicional(*MODELOS_REPORTES)
+@reporte_cacheado(*MODELOS_CACHE_REPORTES)
 def directivo_reporte_horas_todos(request):
     """
     Reporte de horas trabajadas por todos los monitores.
     Filtros: fecha_inicio, fecha_fin, sede, jornada
     Acceso: solo DIRECTIVO
     """
-    # Autenticación manual
-    auth_header = request.headers.get('Authorization')
-    if not auth_header or not auth_header.startswith('Bearer '):
-        return Response({'detail': 'Token de autenticación requerido'}, status=status.HTTP_401_UNAUTHORIZED)
-
-    # Usuario DIRECTIVO temporal
-    usuario_directivo = UsuarioPersonalizado.objects.filter(tipo_usuario='DIRECTIVO').first()
-    if not usuario_directivo:
-        return Response({'detail': 'No hay usuarios DIRECTIVO'}, status=status.HTTP_403_FORBIDDEN)
-
     # Parámetros de filtrado
     fecha_inicio_str = request.query_params.get('fecha_inicio')
     fecha_fin_str = request.query_params.get('fecha_fin')
@@ -975,7 +1110,6 @@ def directivo_reporte_horas_todos(request):
 
     # Fechas por defecto: último mes
     if not fecha_inicio_str:
-        from datetime import date, timedelta
         fecha_inicio = date.today() - timedelta(days=30)
     else:
         fecha_inicio = _parse_fecha(fecha_inicio_str)
@@ -991,74 +1125,8 @@ def directivo_reporte_horas_todos(request):
     if jornada and jornada not in ['M', 'T']:
         return Response({'detail': 'jornada debe ser M o T'}, status=status.HTTP_400_BAD_REQUEST)
 
-    # Obtener todos los monitores
-    monitores = UsuarioPersonalizado.objects.filter(tipo_usuario='MONITOR')
-    
-    # Calcular datos para cada monitor
-    monitores_data = {}
-    total_horas_general = 0.0
-    total_asistencias_general = 0
-    total_ajustes_general = 0
-    
-    for monitor in monitores:
-        # Calcular horas totales incluyendo ajustes
-        calculo_horas = calcular_horas_totales_monitor(monitor.id, fecha_inicio, fecha_fin, sede, jornada)
-        
-        # Solo incluir monitores que tienen datos en el período
-        if calculo_horas['total_asistencias'] > 0 or calculo_horas['total_ajustes'] > 0:
-            # Query asistencias para el detalle
-            asistencias_qs = Asistencia.objects.filter(
-                usuario=monitor,
-                fecha__gte=fecha_inicio,
-                fecha__lte=fecha_fin
-            ).select_related('horario')
-
-            # Aplicar filtros a asistencias
-            if sede:
-                asistencias_qs = asistencias_qs.filter(horario__sede=sede)
-            if jornada:
-                asistencias_qs = asistencias_qs.filter(horario__jornada=jornada)
-
-            asistencias_presentes = asistencias_qs.filter(presente=True).count()
-            asistencias_autorizadas = asistencias_qs.filter(estado_autorizacion='autorizado').count()
-
-            # Query ajustes para el detalle
-            ajustes_qs = AjusteHoras.objects.filter(
-                usuario=monitor,
-                fecha__gte=fecha_inicio,
-                fecha__lte=fecha_fin
-            ).select_related('creado_por', 'asistencia')
-
-            monitores_data[monitor.id] = {
-                'monitor': {
-                    'id': monitor.id,
-                    'username': monitor.username,
-                    'nombre': monitor.nombre
-                },
-                'horas_asistencias': round(calculo_horas['horas_asistencias'], 2),
-                'horas_ajustes': round(calculo_horas['horas_ajustes'], 2),
-                'total_horas': round(calculo_horas['horas_totales'], 2),
-                'total_asistencias': calculo_horas['total_asistencias'],
-                'total_ajustes': calculo_horas['total_ajustes'],
-                'asistencias_presentes': asistencias_presentes,
-                'asistencias_autorizadas': asistencias_autorizadas,
-                'asistencias': [AsistenciaSerializer(a).data for a in asistencias_qs],
-                'ajustes': [AjusteHorasSerializer(aj).data for aj in ajustes_qs]
-            }
-            
-            # Acumular estadísticas generales
-            total_horas_general += calculo_horas['horas_totales']
-            total_asistencias_general += calculo_horas['total_asistencias']
-            total_ajustes_general += calculo_horas['total_ajustes']
-
-    total_monitores = len(monitores_data)
-
-    # Ordenar monitores por horas trabajadas (descendente)
-    monitores_ordenados = sorted(
-        monitores_data.values(),
-        key=lambda x: x['total_horas'],
-        reverse=True
-    )
+    # Calcular el reporte de todos los monitores con consultas agrupadas
+    reporte = reporte_horas_todos(fecha_inicio, fecha_fin, sede, jornada)
 
     # Respuesta
     response_data = {
@@ -1066,18 +1134,12 @@ def directivo_reporte_horas_todos(request):
             'fecha_inicio': fecha_inicio.strftime('%Y-%m-%d'),
             'fecha_fin': fecha_fin.strftime('%Y-%m-%d')
         },
-        'estadisticas_generales': {
-            'total_horas': round(total_horas_general, 2),
-            'total_asistencias': total_asistencias_general,
-            'total_ajustes': total_ajustes_general,
-            'total_monitores': total_monitores,
-            'promedio_horas_por_monitor': round(total_horas_general / max(1, total_monitores), 2)
-        },
+        'estadisticas_generales': reporte['estadisticas_generales'],
         'filtros_aplicados': {
             'sede': sede,
             'jornada': jornada
         },
-        'monitores': monitores_ordenados
+        'monitores': reporte['monitores']
     }
 
     return Response(response_data)
@@ -1085,39 +1147,35 @@ def directivo_reporte_horas_todos(request):
 # ===== Endpoints para MONITORES =====
 
 @api_view(['GET'])
-@authentication_classes([UsuarioPersonalizadoJWTAuthentication])
-@permission_classes([IsAuthenticated])
+@permission_classes([IsMonitor])
 def monitor_mis_asistencias(request):
     """
     Lista (y genera si faltan) las asistencias del usuario MONITOR para la fecha (por defecto hoy)
     """
     usuario = request.user
-    print(f"=== MONITOR MIS ASISTENCIAS - Usuario autenticado: {usuario.username} (ID: {usuario.id}) ===")
-    
-    if usuario.tipo_usuario != 'MONITOR':
-        return Response({'detail': 'Solo monitores pueden acceder a este endpoint'}, status=status.HTTP_403_FORBIDDEN)
 
     fecha_obj = _parse_fecha(request.query_params.get('fecha'))
     dia_semana = _dia_semana_de_fecha(fecha_obj)
 
     horarios_qs = HorarioFijo.objects.filter(usuario=usuario, dia_semana=dia_semana)
 
+    # Mismo orden con y sin asistencias virtuales: jornada y luego horario
+    asistencias_qs = Asistencia.objects.filter(usuario=usuario, fecha=fecha_obj).order_by('horario__jornada', 'horario_id')
+
+    if settings.ASISTENCIAS_VIRTUALES:
+        # Sin escrituras: las jornadas sin fila se construyen en memoria (id=None)
+        asistencias_lista = list(asistencias_qs.select_related('usuario', 'horario'))
+        asistencias_lista += asistencias_virtuales(fecha_obj, fecha_obj, horarios_qs)
+        asistencias_lista.sort(key=lambda a: (a.horario.jornada, a.horario_id))
+        return Response(asistencias_en_memoria_a_dicts(asistencias_lista))
+
     # Generar asistencias si faltan
-    for h in horarios_qs:
-        Asistencia.objects.get_or_create(
-            usuario=usuario,
-            fecha=fecha_obj,
-            horario=h,
-            defaults={'presente': False, 'estado_autorizacion': 'pendiente', 'horas': 0.00}
-        )
+    generar_asistencias_faltantes(fecha_obj, fecha_obj, horarios_qs)
 
-    asistencias_qs = Asistencia.objects.filter(usuario=usuario, fecha=fecha_obj)
-    serializer = AsistenciaSerializer(asistencias_qs.select_related('usuario', 'horario'), many=True)
-    return Response(serializer.data)
+    return Response(asistencias_a_dicts(asistencias_qs))
 
 @api_view(['POST'])
-@authentication_classes([UsuarioPersonalizadoJWTAuthentication])
-@permission_classes([IsAuthenticated])
+@permission_classes([IsMonitor])
 def monitor_marcar(request):
     """
     Body: { "fecha": "YYYY-MM-DD", "jornada": "M|T" }
@@ -1131,10 +1189,6 @@ def monitor_marcar(request):
     - No se puede marcar fechas futuras
     """
     usuario = request.user
-    print(f"=== MONITOR MARCAR - Usuario autenticado: {usuario.username} (ID: {usuario.id}) ===")
-    
-    if usuario.tipo_usuario != 'MONITOR':
-        return Response({'detail': 'Solo monitores pueden marcar asistencia'}, status=status.HTTP_403_FORBIDDEN)
 
     fecha_obj = _parse_fecha(request.data.get('fecha'))
     jornada = request.data.get('jornada')
@@ -1155,16 +1209,23 @@ def monitor_marcar(request):
     except HorarioFijo.DoesNotExist:
         return Response({'detail': 'No tienes horario asignado para esa jornada en este día'}, status=status.HTTP_400_BAD_REQUEST)
 
-    # Crear o obtener la asistencia
-    asistencia, created = Asistencia.objects.get_or_create(
-        usuario=usuario,
-        fecha=fecha_obj,
-        horario=horario,
-        defaults={'presente': False, 'estado_autorizacion': 'pendiente', 'horas': 0.00}
-    )
+    # Crear o obtener la asistencia. En modo virtual no se crea: si no existe fila,
+    # la jornada sigue pendiente (solo se guardan las autorizadas o rechazadas).
+    if settings.ASISTENCIAS_VIRTUALES:
+        asistencia = Asistencia.objects.filter(usuario=usuario, fecha=fecha_obj, horario=horario).first()
+    else:
+        with transaction.atomic():
+            asistencia, created = Asistencia.objects.get_or_create(
+                usuario=usuario,
+                fecha=fecha_obj,
+                horario=horario,
+                defaults={'presente': False, 'estado_autorizacion': 'pendiente', 'horas': 0.00}
+            )
+            if created:
+                actualizar_resumen_diario([(usuario.id, fecha_obj)])
 
     # Solo permite marcar si el bloque fue autorizado por un DIRECTIVO
-    if asistencia.estado_autorizacion != 'autorizado':
+    if asistencia is None or asistencia.estado_autorizacion != 'autorizado':
         return Response(
             {
                 'detail': 'Esta jornada aún no ha sido autorizada por un directivo.',
@@ -1190,7 +1251,9 @@ def monitor_marcar(request):
     # Marcar como presente y calcular horas
     asistencia.presente = True
     calcular_horas_asistencia(asistencia)
-    asistencia.save()
+    with transaction.atomic():
+        asistencia.save()
+        actualizar_resumen_diario([(usuario.id, fecha_obj)])
 
     return Response({
         'mensaje': f'Asistencia marcada exitosamente para {jornada}',
@@ -1200,64 +1263,61 @@ def monitor_marcar(request):
 
 # ===== Endpoints para AJUSTES DE HORAS =====
 
+def _ajustes_directivo_qs(params):
+    """
+    Ajustes filtrados con los parámetros de directivo_ajustes_horas: monitor_id,
+    fecha_inicio y fecha_fin (por defecto, el último mes).
+    Retorna (queryset, fecha_inicio, fecha_fin, monitor_id, respuesta_de_error).
+    """
+    monitor_id = params.get('monitor_id')
+    fecha_inicio_str = params.get('fecha_inicio')
+    fecha_fin_str = params.get('fecha_fin')
+
+    ajustes_qs = AjusteHoras.objects.all()
+
+    if monitor_id:
+        try:
+            monitor_id = int(monitor_id)
+            ajustes_qs = ajustes_qs.filter(usuario__id=monitor_id)
+        except ValueError:
+            return None, None, None, None, Response({'detail': 'monitor_id debe ser un número entero'}, status=status.HTTP_400_BAD_REQUEST)
+
+    # Fechas por defecto: último mes
+    if not fecha_inicio_str:
+        fecha_inicio = date.today() - timedelta(days=30)
+    else:
+        fecha_inicio = _parse_fecha(fecha_inicio_str)
+
+    if not fecha_fin_str:
+        fecha_fin = date.today()
+    else:
+        fecha_fin = _parse_fecha(fecha_fin_str)
+
+    # Filtrar por rango de fechas
+    ajustes_qs = ajustes_qs.filter(fecha__gte=fecha_inicio, fecha__lte=fecha_fin)
+    return ajustes_qs, fecha_inicio, fecha_fin, monitor_id, None
+
 @api_view(['GET', 'POST'])
-@authentication_classes([])
-@permission_classes([AllowAny])
+@permission_classes([IsDirectivo])
 def directivo_ajustes_horas(request):
     """
     GET: Listar ajustes de horas con filtros opcionales
     POST: Crear nuevo ajuste de horas
     Acceso: solo DIRECTIVO
     """
-    # Autenticación manual
-    auth_header = request.headers.get('Authorization')
-    if not auth_header or not auth_header.startswith('Bearer '):
-        return Response({'detail': 'Token de autenticación requerido'}, status=status.HTTP_401_UNAUTHORIZED)
-
-    # Usuario DIRECTIVO temporal
-    usuario_directivo = UsuarioPersonalizado.objects.filter(tipo_usuario='DIRECTIVO').first()
-    if not usuario_directivo:
-        return Response({'detail': 'No hay usuarios DIRECTIVO'}, status=status.HTTP_403_FORBIDDEN)
-
     if request.method == 'GET':
-        # Parámetros de filtrado
-        monitor_id = request.query_params.get('monitor_id')
-        fecha_inicio_str = request.query_params.get('fecha_inicio')
-        fecha_fin_str = request.query_params.get('fecha_fin')
+        # Filtros: monitor_id, fecha_inicio, fecha_fin (ver _ajustes_directivo_qs)
+        ajustes_qs, fecha_inicio, fecha_fin, monitor_id, error = _ajustes_directivo_qs(request.query_params)
+        if error:
+            return error
         
-        # Query base
-        ajustes_qs = AjusteHoras.objects.all().select_related('usuario', 'creado_por', 'asistencia')
-        
-        # Aplicar filtros
-        if monitor_id:
-            try:
-                monitor_id = int(monitor_id)
-                ajustes_qs = ajustes_qs.filter(usuario__id=monitor_id)
-            except ValueError:
-                return Response({'detail': 'monitor_id debe ser un número entero'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Fechas por defecto: último mes
-        if not fecha_inicio_str:
-            from datetime import date, timedelta
-            fecha_inicio = date.today() - timedelta(days=30)
-        else:
-            fecha_inicio = _parse_fecha(fecha_inicio_str)
-        
-        if not fecha_fin_str:
-            fecha_fin = date.today()
-        else:
-            fecha_fin = _parse_fecha(fecha_fin_str)
-        
-        # Filtrar por rango de fechas
-        ajustes_qs = ajustes_qs.filter(fecha__gte=fecha_inicio, fecha__lte=fecha_fin)
-        
-        # Serializar y responder
-        serializer = AjusteHorasSerializer(ajustes_qs, many=True)
+        # Serializar (serialización plana) y responder
+        ajustes_data = ajustes_a_dicts(ajustes_qs)
         
         # Calcular estadísticas
-        total_ajustes = ajustes_qs.count()
-        total_horas_ajustadas = sum(float(ajuste.cantidad_horas) for ajuste in ajustes_qs)
-        monitores_afectados = ajustes_qs.values('usuario').distinct().count()
+        total_ajustes = len(ajustes_data)
+        total_horas_ajustadas = sum(float(ajuste['cantidad_horas']) for ajuste in ajustes_data)
+        monitores_afectados = len({ajuste['usuario']['id'] for ajuste in ajustes_data})
         
         response_data = {
             'periodo': {
@@ -1272,7 +1332,7 @@ def directivo_ajustes_horas(request):
             'filtros_aplicados': {
                 'monitor_id': monitor_id
             },
-            'ajustes': serializer.data
+            'ajustes': ajustes_data
         }
         
         return Response(response_data)
@@ -1287,39 +1347,48 @@ def directivo_ajustes_horas(request):
                 asistencia = Asistencia.objects.get(id=serializer.validated_data['asistencia_id'])
             
             # Crear ajuste
-            ajuste = AjusteHoras.objects.create(
-                usuario=monitor,
-                fecha=serializer.validated_data['fecha'],
-                cantidad_horas=serializer.validated_data['cantidad_horas'],
-                motivo=serializer.validated_data['motivo'],
-                asistencia=asistencia,
-                creado_por=usuario_directivo
-            )
+            with transaction.atomic():
+                ajuste = AjusteHoras.objects.create(
+                    usuario=monitor,
+                    fecha=serializer.validated_data['fecha'],
+                    cantidad_horas=serializer.validated_data['cantidad_horas'],
+                    motivo=serializer.validated_data['motivo'],
+                    asistencia=asistencia,
+                    creado_por=request.user
+                )
+                actualizar_resumen_diario([(ajuste.usuario_id, ajuste.fecha)])
             
             return Response(AjusteHorasSerializer(ajuste).data, status=status.HTTP_201_CREATED)
         else:
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['GET'])
+@permission_classes([IsDirectivo])
+def directivo_exportar_ajustes(request):
+    """
+    Exporta en streaming los ajustes de horas con los mismos filtros de directivo_ajustes_horas.
+    Parámetro formato: csv (por defecto) o ndjson.
+    Acceso: solo DIRECTIVO
+    """
+    formato = request.query_params.get('formato', 'csv')
+    if formato not in FORMATOS_EXPORTACION:
+        return Response({'detail': 'formato debe ser csv o ndjson'}, status=status.HTTP_400_BAD_REQUEST)
+
+    ajustes_qs, _, _, _, error = _ajustes_directivo_qs(request.query_params)
+    if error:
+        return error
+
+    return respuesta_exportacion(ajustes_qs, COLUMNAS_AJUSTES, formato, 'ajustes_horas')
+
 @api_view(['GET', 'DELETE'])
-@authentication_classes([])
-@permission_classes([AllowAny])
+@permission_classes([IsDirectivo])
 def directivo_ajuste_horas_detalle(request, pk):
     """
     GET: Obtener detalles de un ajuste específico
     DELETE: Eliminar ajuste de horas
     Acceso: solo DIRECTIVO
     """
-    # Autenticación manual
-    auth_header = request.headers.get('Authorization')
-    if not auth_header or not auth_header.startswith('Bearer '):
-        return Response({'detail': 'Token de autenticación requerido'}, status=status.HTTP_401_UNAUTHORIZED)
-
-    # Usuario DIRECTIVO temporal
-    usuario_directivo = UsuarioPersonalizado.objects.filter(tipo_usuario='DIRECTIVO').first()
-    if not usuario_directivo:
-        return Response({'detail': 'No hay usuarios DIRECTIVO'}, status=status.HTTP_403_FORBIDDEN)
-
     # Verificar que el ajuste existe
     try:
         ajuste = AjusteHoras.objects.select_related('usuario', 'creado_por', 'asistencia').get(id=pk)
@@ -1331,28 +1400,19 @@ def directivo_ajuste_horas_detalle(request, pk):
         return Response(serializer.data)
     
     elif request.method == 'DELETE':
-        ajuste.delete()
+        with transaction.atomic():
+            ajuste.delete()
+            actualizar_resumen_diario([(ajuste.usuario_id, ajuste.fecha)])
         return Response({'detail': 'Ajuste de horas eliminado exitosamente'}, status=status.HTTP_204_NO_CONTENT)
 
 
 @api_view(['GET'])
-@authentication_classes([])
-@permission_classes([AllowAny])
+@permission_classes([IsDirectivo])
 def directivo_buscar_monitores(request):
     """
     Buscar monitores por nombre o username.
     Acceso: solo DIRECTIVO
     """
-    # Autenticación manual
-    auth_header = request.headers.get('Authorization')
-    if not auth_header or not auth_header.startswith('Bearer '):
-        return Response({'detail': 'Token de autenticación requerido'}, status=status.HTTP_401_UNAUTHORIZED)
-
-    # Usuario DIRECTIVO temporal
-    usuario_directivo = UsuarioPersonalizado.objects.filter(tipo_usuario='DIRECTIVO').first()
-    if not usuario_directivo:
-        return Response({'detail': 'No hay usuarios DIRECTIVO'}, status=status.HTTP_403_FORBIDDEN)
-
     # Parámetro de búsqueda
     busqueda = request.query_params.get('q', '').strip()
     
@@ -1362,22 +1422,8 @@ def directivo_buscar_monitores(request):
     if len(busqueda) < 2:
         return Response({'detail': 'La búsqueda debe tener al menos 2 caracteres'}, status=status.HTTP_400_BAD_REQUEST)
 
-    # Buscar monitores por nombre o username (case-insensitive)
-    from django.db.models import Q
-    monitores = UsuarioPersonalizado.objects.filter(
-        tipo_usuario='MONITOR'
-    ).filter(
-        Q(nombre__icontains=busqueda) | Q(username__icontains=busqueda)
-    ).order_by('nombre')[:20]  # Limitar a 20 resultados
-
-    # Serializar resultados
-    resultados = []
-    for monitor in monitores:
-        resultados.append({
-            'id': monitor.id,
-            'username': monitor.username,
-            'nombre': monitor.nombre
-        })
+    # Búsqueda indexada, sin distinguir mayúsculas ni acentos y ordenada por relevancia
+    resultados = buscar_monitores(busqueda, limite=20)
 
     response_data = {
         'busqueda': busqueda,
@@ -1392,89 +1438,36 @@ def directivo_buscar_monitores(request):
 
 def obtener_configuracion(clave, valor_por_defecto=None):
     """
-    Obtiene el valor de una configuración del sistema.
+    Obtiene el valor de una configuración del sistema desde la caché del proceso.
     Si no existe, retorna el valor por defecto.
     """
-    try:
-        config = ConfiguracionSistema.objects.get(clave=clave)
-        return config.get_valor_tipado()
-    except ConfiguracionSistema.DoesNotExist:
-        return valor_por_defecto
+    return obtener_configuracion_cacheada(clave, valor_por_defecto)
 
 def obtener_costo_por_hora():
     """
     Obtiene el costo por hora desde las configuraciones.
     Por defecto: 9965 COP
     """
-    return obtener_configuracion('costo_por_hora', 9965.0)
+    return obtener_configuracion('costo_por_hora', COSTO_POR_HORA_POR_DEFECTO)
 
 def obtener_semanas_semestre():
     """
     Obtiene el total de semanas del semestre desde las configuraciones.
     Por defecto: 14 semanas
     """
-    return obtener_configuracion('semanas_semestre', 14)
-
-def calcular_horas_semanales_monitor(monitor_id):
-    """
-    Calcula las horas semanales que debe trabajar un monitor basado en sus horarios fijos.
-    Cada jornada (M/T) = 4 horas.
-    """
-    horarios = HorarioFijo.objects.filter(usuario_id=monitor_id)
-    total_horas_semana = horarios.count() * 4  # 4 horas por jornada
-    return total_horas_semana
-
-def calcular_costo_total_monitor(monitor_id, fecha_inicio, fecha_fin):
-    """
-    Calcula el costo total que debe recibir un monitor en un período.
-    Incluye horas de asistencias + ajustes de horas.
-    """
-    calculo_horas = calcular_horas_totales_monitor(monitor_id, fecha_inicio, fecha_fin)
-    costo_por_hora = obtener_costo_por_hora()
-    costo_total = calculo_horas['horas_totales'] * costo_por_hora
-    return round(costo_total, 2)
-
-def calcular_costo_proyectado_monitor(monitor_id, semanas_trabajadas, total_semanas=None):
-    """
-    Calcula el costo proyectado de un monitor basado en sus horarios fijos.
-    """
-    if total_semanas is None:
-        total_semanas = obtener_semanas_semestre()
-    
-    horas_semanales = calcular_horas_semanales_monitor(monitor_id)
-    horas_totales_proyectadas = horas_semanales * total_semanas
-    horas_trabajadas_proyectadas = horas_semanales * semanas_trabajadas
-    costo_por_hora = obtener_costo_por_hora()
-    
-    return {
-        'horas_semanales': horas_semanales,
-        'horas_totales_proyectadas': horas_totales_proyectadas,
-        'horas_trabajadas_proyectadas': horas_trabajadas_proyectadas,
-        'costo_total_proyectado': round(horas_totales_proyectadas * costo_por_hora, 2),
-        'costo_trabajado_proyectado': round(horas_trabajadas_proyectadas * costo_por_hora, 2),
-        'semanas_trabajadas': semanas_trabajadas,
-        'semanas_faltantes': total_semanas - semanas_trabajadas
-    }
+    return obtener_configuracion('semanas_semestre', SEMANAS_SEMESTRE_POR_DEFECTO)
 
 @api_view(['GET'])
-@authentication_classes([])
-@permission_classes([AllowAny])
+@permission_classes([IsDirectivo])
+@lectura_en_replica
+@respuesta_condicional(*MODELOS_FINANZAS)
+@reporte_cacheado(*MODELOS_CACHE_FINANZAS)
 def directivo_finanzas_monitor_individual(request, monitor_id):
     """
     Reporte financiero individual de un monitor específico.
     Incluye costo actual, proyectado, horas semanales, etc.
     Acceso: solo DIRECTIVO
     """
-    # Autenticación manual
-    auth_header = request.headers.get('Authorization')
-    if not auth_header or not auth_header.startswith('Bearer '):
-        return Response({'detail': 'Token de autenticación requerido'}, status=status.HTTP_401_UNAUTHORIZED)
-
-    # Usuario DIRECTIVO temporal
-    usuario_directivo = UsuarioPersonalizado.objects.filter(tipo_usuario='DIRECTIVO').first()
-    if not usuario_directivo:
-        return Response({'detail': 'No hay usuarios DIRECTIVO'}, status=status.HTTP_403_FORBIDDEN)
-
     # Verificar que el monitor existe
     try:
         monitor = UsuarioPersonalizado.objects.get(id=monitor_id, tipo_usuario='MONITOR')
@@ -1488,7 +1481,6 @@ def directivo_finanzas_monitor_individual(request, monitor_id):
 
     # Fechas por defecto: último mes
     if not fecha_inicio_str:
-        from datetime import date, timedelta
         fecha_inicio = date.today() - timedelta(days=30)
     else:
         fecha_inicio = _parse_fecha(fecha_inicio_str)
@@ -1498,19 +1490,27 @@ def directivo_finanzas_monitor_individual(request, monitor_id):
     else:
         fecha_fin = _parse_fecha(fecha_fin_str)
 
+    # Configuraciones financieras (una sola lectura)
+    parametros = obtener_parametros_finanzas()
+    costo_por_hora = parametros['costo_por_hora']
+    total_semanas = parametros['semanas_semestre']
+
     # Validar semanas_trabajadas
     try:
         semanas_trabajadas = int(semanas_trabajadas)
-        max_semanas = obtener_semanas_semestre()
+        max_semanas = total_semanas
         if semanas_trabajadas < 0 or semanas_trabajadas > max_semanas:
             return Response({'detail': f'semanas_trabajadas debe estar entre 0 y {max_semanas}'}, status=status.HTTP_400_BAD_REQUEST)
     except ValueError:
         return Response({'detail': 'semanas_trabajadas debe ser un número entero'}, status=status.HTTP_400_BAD_REQUEST)
 
     # Calcular horas y costos
-    calculo_horas = calcular_horas_totales_monitor(monitor_id, fecha_inicio, fecha_fin)
-    costo_actual = calcular_costo_total_monitor(monitor_id, fecha_inicio, fecha_fin)
-    proyeccion = calcular_costo_proyectado_monitor(monitor_id, semanas_trabajadas)
+    fila = calcular_finanzas_monitores(
+        fecha_inicio, fecha_fin, semanas_trabajadas, monitor_ids=[monitor.id], parametros=parametros
+    )[0]
+    calculo_horas = fila['calculo_horas']
+    costo_actual = fila['costo_actual']
+    proyeccion = fila['proyeccion']
 
     # Información de horarios
     horarios = HorarioFijo.objects.filter(usuario=monitor)
@@ -1546,7 +1546,7 @@ def directivo_finanzas_monitor_individual(request, monitor_id):
             'horas_asistencias': calculo_horas['horas_asistencias'],
             'horas_ajustes': calculo_horas['horas_ajustes'],
             'costo_total': costo_actual,
-            'costo_por_hora': obtener_costo_por_hora()
+            'costo_por_hora': costo_por_hora
         },
         'proyeccion_semestre': {
             'semanas_trabajadas': proyeccion['semanas_trabajadas'],
@@ -1555,7 +1555,7 @@ def directivo_finanzas_monitor_individual(request, monitor_id):
             'horas_trabajadas_proyectadas': proyeccion['horas_trabajadas_proyectadas'],
             'costo_total_proyectado': proyeccion['costo_total_proyectado'],
             'costo_trabajado_proyectado': proyeccion['costo_trabajado_proyectado'],
-            'porcentaje_completado': round((proyeccion['semanas_trabajadas'] / obtener_semanas_semestre()) * 100, 2)
+            'porcentaje_completado': round((proyeccion['semanas_trabajadas'] / total_semanas) * 100, 2)
         },
         'estadisticas': {
             'total_asistencias': calculo_horas['total_asistencias'],
@@ -1567,24 +1567,16 @@ def directivo_finanzas_monitor_individual(request, monitor_id):
     return Response(response_data)
 
 @api_view(['GET'])
-@authentication_classes([])
-@permission_classes([AllowAny])
+@permission_classes([IsDirectivo])
+@lectura_en_replica
+@respuesta_condicional(*MODELOS_FINANZAS)
+@reporte_cacheado(*MODELOS_CACHE_FINANZAS)
 def directivo_finanzas_todos_monitores(request):
     """
     Reporte financiero consolidado de todos los monitores.
     Incluye costos totales, proyecciones, comparativas, etc.
     Acceso: solo DIRECTIVO
     """
-    # Autenticación manual
-    auth_header = request.headers.get('Authorization')
-    if not auth_header or not auth_header.startswith('Bearer '):
-        return Response({'detail': 'Token de autenticación requerido'}, status=status.HTTP_401_UNAUTHORIZED)
-
-    # Usuario DIRECTIVO temporal
-    usuario_directivo = UsuarioPersonalizado.objects.filter(tipo_usuario='DIRECTIVO').first()
-    if not usuario_directivo:
-        return Response({'detail': 'No hay usuarios DIRECTIVO'}, status=status.HTTP_403_FORBIDDEN)
-
     # Parámetros de filtrado
     fecha_inicio_str = request.query_params.get('fecha_inicio')
     fecha_fin_str = request.query_params.get('fecha_fin')
@@ -1592,7 +1584,6 @@ def directivo_finanzas_todos_monitores(request):
 
     # Fechas por defecto: último mes
     if not fecha_inicio_str:
-        from datetime import date, timedelta
         fecha_inicio = date.today() - timedelta(days=30)
     else:
         fecha_inicio = _parse_fecha(fecha_inicio_str)
@@ -1602,17 +1593,22 @@ def directivo_finanzas_todos_monitores(request):
     else:
         fecha_fin = _parse_fecha(fecha_fin_str)
 
+    # Configuraciones financieras (una sola lectura)
+    parametros = obtener_parametros_finanzas()
+    costo_por_hora = parametros['costo_por_hora']
+    total_semanas = parametros['semanas_semestre']
+
     # Validar semanas_trabajadas
     try:
         semanas_trabajadas = int(semanas_trabajadas)
-        max_semanas = obtener_semanas_semestre()
+        max_semanas = total_semanas
         if semanas_trabajadas < 0 or semanas_trabajadas > max_semanas:
             return Response({'detail': f'semanas_trabajadas debe estar entre 0 y {max_semanas}'}, status=status.HTTP_400_BAD_REQUEST)
     except ValueError:
         return Response({'detail': 'semanas_trabajadas debe ser un número entero'}, status=status.HTTP_400_BAD_REQUEST)
 
-    # Obtener todos los monitores
-    monitores = UsuarioPersonalizado.objects.filter(tipo_usuario='MONITOR')
+    # Calcular horas y costos de todos los monitores por lotes
+    filas = calcular_finanzas_monitores(fecha_inicio, fecha_fin, semanas_trabajadas, parametros=parametros)
     
     # Calcular datos para cada monitor
     monitores_data = []
@@ -1621,20 +1617,15 @@ def directivo_finanzas_todos_monitores(request):
     total_horas_actuales = 0.0
     total_horas_proyectadas = 0.0
     
-    for monitor in monitores:
-        # Calcular horas y costos
-        calculo_horas = calcular_horas_totales_monitor(monitor.id, fecha_inicio, fecha_fin)
-        costo_actual = calcular_costo_total_monitor(monitor.id, fecha_inicio, fecha_fin)
-        proyeccion = calcular_costo_proyectado_monitor(monitor.id, semanas_trabajadas)
+    for fila in filas:
+        calculo_horas = fila['calculo_horas']
+        costo_actual = fila['costo_actual']
+        proyeccion = fila['proyeccion']
         
         # Solo incluir monitores que tienen horarios asignados
         if proyeccion['horas_semanales'] > 0:
             monitor_data = {
-                'monitor': {
-                    'id': monitor.id,
-                    'username': monitor.username,
-                    'nombre': monitor.nombre
-                },
+                'monitor': fila['monitor'],
                 'horarios_semanales': {
                     'horas_por_semana': proyeccion['horas_semanales'],
                     'jornadas_por_semana': proyeccion['horas_semanales'] // 4
@@ -1648,7 +1639,7 @@ def directivo_finanzas_todos_monitores(request):
                     'semanas_faltantes': proyeccion['semanas_faltantes'],
                     'costo_total_proyectado': proyeccion['costo_total_proyectado'],
                     'costo_trabajado_proyectado': proyeccion['costo_trabajado_proyectado'],
-                    'porcentaje_completado': round((proyeccion['semanas_trabajadas'] / obtener_semanas_semestre()) * 100, 2)
+                    'porcentaje_completado': round((proyeccion['semanas_trabajadas'] / total_semanas) * 100, 2)
                 },
                 'estadisticas': {
                     'total_asistencias': calculo_horas['total_asistencias'],
@@ -1688,7 +1679,7 @@ def directivo_finanzas_todos_monitores(request):
             'horas_totales_actuales': round(total_horas_actuales, 2),
             'horas_totales_proyectadas': round(total_horas_proyectadas, 2),
             'horas_promedio_por_monitor': round(horas_promedio_por_monitor, 2),
-            'costo_por_hora': obtener_costo_por_hora()
+            'costo_por_hora': costo_por_hora
         },
         'resumen_financiero': {
             'diferencia_proyeccion_vs_actual': round(total_costo_proyectado - total_costo_actual, 2),
@@ -1701,24 +1692,16 @@ def directivo_finanzas_todos_monitores(request):
     return Response(response_data)
 
 @api_view(['GET'])
-@authentication_classes([])
-@permission_classes([AllowAny])
+@permission_classes([IsDirectivo])
+@lectura_en_replica
+@respuesta_condicional(*MODELOS_FINANZAS)
+@reporte_cacheado(*MODELOS_CACHE_FINANZAS)
 def directivo_finanzas_resumen_ejecutivo(request):
     """
     Resumen ejecutivo financiero del sistema.
     Dashboard con métricas clave, tendencias y alertas.
     Acceso: solo DIRECTIVO
     """
-    # Autenticación manual
-    auth_header = request.headers.get('Authorization')
-    if not auth_header or not auth_header.startswith('Bearer '):
-        return Response({'detail': 'Token de autenticación requerido'}, status=status.HTTP_401_UNAUTHORIZED)
-
-    # Usuario DIRECTIVO temporal
-    usuario_directivo = UsuarioPersonalizado.objects.filter(tipo_usuario='DIRECTIVO').first()
-    if not usuario_directivo:
-        return Response({'detail': 'No hay usuarios DIRECTIVO'}, status=status.HTTP_403_FORBIDDEN)
-
     # Parámetros de filtrado
     fecha_inicio_str = request.query_params.get('fecha_inicio')
     fecha_fin_str = request.query_params.get('fecha_fin')
@@ -1726,7 +1709,6 @@ def directivo_finanzas_resumen_ejecutivo(request):
 
     # Fechas por defecto: último mes
     if not fecha_inicio_str:
-        from datetime import date, timedelta
         fecha_inicio = date.today() - timedelta(days=30)
     else:
         fecha_inicio = _parse_fecha(fecha_inicio_str)
@@ -1736,17 +1718,22 @@ def directivo_finanzas_resumen_ejecutivo(request):
     else:
         fecha_fin = _parse_fecha(fecha_fin_str)
 
+    # Configuraciones financieras (una sola lectura)
+    parametros = obtener_parametros_finanzas()
+    costo_por_hora = parametros['costo_por_hora']
+    total_semanas = parametros['semanas_semestre']
+
     # Validar semanas_trabajadas
     try:
         semanas_trabajadas = int(semanas_trabajadas)
-        max_semanas = obtener_semanas_semestre()
+        max_semanas = total_semanas
         if semanas_trabajadas < 0 or semanas_trabajadas > max_semanas:
             return Response({'detail': f'semanas_trabajadas debe estar entre 0 y {max_semanas}'}, status=status.HTTP_400_BAD_REQUEST)
     except ValueError:
         return Response({'detail': 'semanas_trabajadas debe ser un número entero'}, status=status.HTTP_400_BAD_REQUEST)
 
-    # Obtener todos los monitores
-    monitores = UsuarioPersonalizado.objects.filter(tipo_usuario='MONITOR')
+    # Calcular horas y costos de todos los monitores por lotes
+    filas = calcular_finanzas_monitores(fecha_inicio, fecha_fin, semanas_trabajadas, parametros=parametros)
     
     # Calcular métricas generales
     total_costo_actual = 0.0
@@ -1759,10 +1746,11 @@ def directivo_finanzas_resumen_ejecutivo(request):
     # Top monitores por costo
     monitores_costo = []
     
-    for monitor in monitores:
-        calculo_horas = calcular_horas_totales_monitor(monitor.id, fecha_inicio, fecha_fin)
-        costo_actual = calcular_costo_total_monitor(monitor.id, fecha_inicio, fecha_fin)
-        proyeccion = calcular_costo_proyectado_monitor(monitor.id, semanas_trabajadas)
+    for fila in filas:
+        calculo_horas = fila['calculo_horas']
+        costo_actual = fila['costo_actual']
+        proyeccion = fila['proyeccion']
+        monitor = fila['monitor']
         
         # Contar monitores con horarios
         if proyeccion['horas_semanales'] > 0:
@@ -1781,9 +1769,9 @@ def directivo_finanzas_resumen_ejecutivo(request):
             # Para top monitores
             monitores_costo.append({
                 'monitor': {
-                    'id': monitor.id,
-                    'nombre': monitor.nombre,
-                    'username': monitor.username
+                    'id': monitor['id'],
+                    'nombre': monitor['nombre'],
+                    'username': monitor['username']
                 },
                 'costo_actual': costo_actual,
                 'horas_trabajadas': calculo_horas['horas_totales']
@@ -1827,7 +1815,7 @@ def directivo_finanzas_resumen_ejecutivo(request):
             'horas_totales_proyectadas': round(total_horas_proyectadas, 2)
         },
         'indicadores_financieros': {
-            'costo_por_hora': obtener_costo_por_hora(),
+            'costo_por_hora': costo_por_hora,
             'costo_promedio_por_monitor': round(total_costo_actual / max(1, monitores_con_horarios), 2),
             'costo_semanal_promedio': round(costo_semanal_promedio, 2),
             'porcentaje_ejecutado': round(porcentaje_ejecutado, 2),
@@ -1848,87 +1836,34 @@ def directivo_finanzas_resumen_ejecutivo(request):
     return Response(response_data)
 
 @api_view(['GET'])
-@authentication_classes([])
-@permission_classes([AllowAny])
+@permission_classes([IsDirectivo])
+@lectura_en_replica
+@respuesta_condicional(*MODELOS_FINANZAS)
+@reporte_cacheado(*MODELOS_CACHE_FINANZAS)
 def directivo_finanzas_comparativa_semanas(request):
     """
     Comparativa financiera por semanas del semestre.
-    Muestra evolución de costos y horas por semana.
+    Muestra evolución real de costos y horas por semana junto a la proyección.
+    Filtros: fecha_inicio_semestre (YYYY-MM-DD)
     Acceso: solo DIRECTIVO
     """
-    # Autenticación manual
-    auth_header = request.headers.get('Authorization')
-    if not auth_header or not auth_header.startswith('Bearer '):
-        return Response({'detail': 'Token de autenticación requerido'}, status=status.HTTP_401_UNAUTHORIZED)
+    # Configuraciones financieras (una sola lectura)
+    parametros = obtener_parametros_finanzas()
 
-    # Usuario DIRECTIVO temporal
-    usuario_directivo = UsuarioPersonalizado.objects.filter(tipo_usuario='DIRECTIVO').first()
-    if not usuario_directivo:
-        return Response({'detail': 'No hay usuarios DIRECTIVO'}, status=status.HTTP_403_FORBIDDEN)
-
-    # Obtener todos los monitores
-    monitores = UsuarioPersonalizado.objects.filter(tipo_usuario='MONITOR')
-    
-    # Calcular datos por semana (simulado para las primeras 16 semanas)
-    semanas_data = []
-    total_semanas = obtener_semanas_semestre()
-    
-    for semana in range(1, total_semanas + 1):
-        semana_costo_total = 0.0
-        semana_horas_total = 0.0
-        monitores_semana = 0
-        
-        for monitor in monitores:
-            # Simular datos por semana (en un caso real, esto vendría de datos históricos)
-            proyeccion = calcular_costo_proyectado_monitor(monitor.id, semana)
-            
-            if proyeccion['horas_semanales'] > 0:
-                semana_costo_total += proyeccion['costo_trabajado_proyectado']
-                semana_horas_total += proyeccion['horas_trabajadas_proyectadas']
-                monitores_semana += 1
-        
-        semanas_data.append({
-            'semana': semana,
-            'costo_total': round(semana_costo_total, 2),
-            'horas_total': round(semana_horas_total, 2),
-            'monitores_activos': monitores_semana,
-            'costo_promedio_por_monitor': round(semana_costo_total / max(1, monitores_semana), 2),
-            'estado': 'completada' if semana <= 8 else 'pendiente'
-        })
-    
-    # Calcular totales acumulados
-    costo_acumulado = 0.0
-    horas_acumuladas = 0.0
-    
-    for semana_data in semanas_data:
-        costo_acumulado += semana_data['costo_total']
-        horas_acumuladas += semana_data['horas_total']
-        semana_data['costo_acumulado'] = round(costo_acumulado, 2)
-        semana_data['horas_acumuladas'] = round(horas_acumuladas, 2)
-    
-    # Calcular porcentajes después de tener todos los totales acumulados
-    costo_total_final = semanas_data[-1]['costo_acumulado'] if semanas_data else 0
-    for semana_data in semanas_data:
-        semana_data['porcentaje_completado'] = round((semana_data['costo_acumulado'] / max(1, costo_total_final)) * 100, 2)
+    # Inicio del semestre: parámetro, configuración 'fecha_inicio_semestre' o,
+    # por defecto, 8 semanas contando la actual
+    fecha_inicio_semestre_str = request.query_params.get('fecha_inicio_semestre') or parametros['fecha_inicio_semestre']
+    if fecha_inicio_semestre_str:
+        try:
+            fecha_inicio_semestre = datetime.strptime(str(fecha_inicio_semestre_str), "%Y-%m-%d").date()
+        except ValueError:
+            return Response({'detail': 'Formato de fecha_inicio_semestre inválido. Use YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+    else:
+        hoy = date.today()
+        fecha_inicio_semestre = hoy - timedelta(days=hoy.weekday(), weeks=7)
 
-    # Respuesta
-    response_data = {
-        'total_semanas': total_semanas,
-        'semanas_trabajadas': 8,  # Por defecto
-        'semanas_pendientes': total_semanas - 8,
-        'resumen_general': {
-            'costo_total_semestre': round(semanas_data[-1]['costo_acumulado'], 2),
-            'horas_total_semestre': round(semanas_data[-1]['horas_acumuladas'], 2),
-            'costo_promedio_por_semana': round(semanas_data[-1]['costo_acumulado'] / total_semanas, 2),
-            'horas_promedio_por_semana': round(semanas_data[-1]['horas_acumuladas'] / total_semanas, 2)
-        },
-        'semanas': semanas_data,
-        'tendencias': {
-            'costo_por_semana': [s['costo_total'] for s in semanas_data],
-            'horas_por_semana': [s['horas_total'] for s in semanas_data],
-            'costo_acumulado': [s['costo_acumulado'] for s in semanas_data]
-        }
-    }
+    # Horas reales por semana ISO y proyección según horarios fijos
+    response_data = comparativa_semanas(fecha_inicio_semestre, parametros=parametros)
 
     return Response(response_data)
 
@@ -1936,23 +1871,12 @@ def directivo_finanzas_comparativa_semanas(request):
 # ===== Endpoints para CONFIGURACIONES DEL SISTEMA =====
 
 @api_view(['GET'])
-@authentication_classes([])
-@permission_classes([AllowAny])
+@permission_classes([IsDirectivo])
 def directivo_configuraciones(request):
     """
     Listar todas las configuraciones del sistema.
     Acceso: solo DIRECTIVO
     """
-    # Autenticación manual
-    auth_header = request.headers.get('Authorization')
-    if not auth_header or not auth_header.startswith('Bearer '):
-        return Response({'detail': 'Token de autenticación requerido'}, status=status.HTTP_401_UNAUTHORIZED)
-
-    # Usuario DIRECTIVO temporal
-    usuario_directivo = UsuarioPersonalizado.objects.filter(tipo_usuario='DIRECTIVO').first()
-    if not usuario_directivo:
-        return Response({'detail': 'No hay usuarios DIRECTIVO'}, status=status.HTTP_403_FORBIDDEN)
-
     configuraciones = ConfiguracionSistema.objects.all().select_related('creado_por')
     serializer = ConfiguracionSistemaSerializer(configuraciones, many=True)
     
@@ -1962,23 +1886,12 @@ def directivo_configuraciones(request):
     })
 
 @api_view(['POST'])
-@authentication_classes([])
-@permission_classes([AllowAny])
+@permission_classes([IsDirectivo])
 def directivo_configuraciones_crear(request):
     """
     Crear nueva configuración del sistema.
     Acceso: solo DIRECTIVO
     """
-    # Autenticación manual
-    auth_header = request.headers.get('Authorization')
-    if not auth_header or not auth_header.startswith('Bearer '):
-        return Response({'detail': 'Token de autenticación requerido'}, status=status.HTTP_401_UNAUTHORIZED)
-
-    # Usuario DIRECTIVO temporal
-    usuario_directivo = UsuarioPersonalizado.objects.filter(tipo_usuario='DIRECTIVO').first()
-    if not usuario_directivo:
-        return Response({'detail': 'No hay usuarios DIRECTIVO'}, status=status.HTTP_403_FORBIDDEN)
-
     serializer = ConfiguracionSistemaCreateSerializer(data=request.data)
     if serializer.is_valid():
         # Verificar si ya existe una configuración con esa clave
@@ -1989,14 +1902,14 @@ def directivo_configuraciones_crear(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        configuracion = serializer.save(creado_por=usuario_directivo)
+        configuracion = serializer.save(creado_por=request.user)
+        invalidar_configuraciones()
         return Response(ConfiguracionSistemaSerializer(configuracion).data, status=status.HTTP_201_CREATED)
     else:
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 @api_view(['GET', 'PUT', 'DELETE'])
-@authentication_classes([])
-@permission_classes([AllowAny])
+@permission_classes([IsDirectivo])
 def directivo_configuraciones_detalle(request, clave):
     """
     GET: Obtener configuración específica
@@ -2004,16 +1917,6 @@ def directivo_configuraciones_detalle(request, clave):
     DELETE: Eliminar configuración
     Acceso: solo DIRECTIVO
     """
-    # Autenticación manual
-    auth_header = request.headers.get('Authorization')
-    if not auth_header or not auth_header.startswith('Bearer '):
-        return Response({'detail': 'Token de autenticación requerido'}, status=status.HTTP_401_UNAUTHORIZED)
-
-    # Usuario DIRECTIVO temporal
-    usuario_directivo = UsuarioPersonalizado.objects.filter(tipo_usuario='DIRECTIVO').first()
-    if not usuario_directivo:
-        return Response({'detail': 'No hay usuarios DIRECTIVO'}, status=status.HTTP_403_FORBIDDEN)
-
     try:
         configuracion = ConfiguracionSistema.objects.select_related('creado_por').get(clave=clave)
     except ConfiguracionSistema.DoesNotExist:
@@ -2027,16 +1930,17 @@ def directivo_configuraciones_detalle(request, clave):
         serializer = ConfiguracionSistemaCreateSerializer(configuracion, data=request.data)
         if serializer.is_valid():
             serializer.save()
+            invalidar_configuraciones()
             return Response(ConfiguracionSistemaSerializer(configuracion).data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     elif request.method == 'DELETE':
         configuracion.delete()
+        invalidar_configuraciones()
         return Response({'detail': 'Configuración eliminada exitosamente'}, status=status.HTTP_204_NO_CONTENT)
 
 @api_view(['GET', 'PUT', 'DELETE'])
-@authentication_classes([])
-@permission_classes([AllowAny])
+@permission_classes([IsDirectivo])
 def directivo_configuraciones_detalle_por_id(request, id):
     """
     GET: Obtener configuración específica por ID
@@ -2044,16 +1948,6 @@ def directivo_configuraciones_detalle_por_id(request, id):
     DELETE: Eliminar configuración por ID
     Acceso: solo DIRECTIVO
     """
-    # Autenticación manual
-    auth_header = request.headers.get('Authorization')
-    if not auth_header or not auth_header.startswith('Bearer '):
-        return Response({'detail': 'Token de autenticación requerido'}, status=status.HTTP_401_UNAUTHORIZED)
-
-    # Usuario DIRECTIVO temporal
-    usuario_directivo = UsuarioPersonalizado.objects.filter(tipo_usuario='DIRECTIVO').first()
-    if not usuario_directivo:
-        return Response({'detail': 'No hay usuarios DIRECTIVO'}, status=status.HTTP_403_FORBIDDEN)
-
     try:
         configuracion = ConfiguracionSistema.objects.select_related('creado_por').get(id=id)
     except ConfiguracionSistema.DoesNotExist:
@@ -2067,32 +1961,26 @@ def directivo_configuraciones_detalle_por_id(request, id):
         serializer = ConfiguracionSistemaCreateSerializer(configuracion, data=request.data)
         if serializer.is_valid():
             serializer.save()
+            invalidar_configuraciones()
             return Response(ConfiguracionSistemaSerializer(configuracion).data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     elif request.method == 'DELETE':
         configuracion.delete()
+        invalidar_configuraciones()
         return Response({'detail': 'Configuración eliminada exitosamente'}, status=status.HTTP_204_NO_CONTENT)
 
 @api_view(['GET'])
-@authentication_classes([])
-@permission_classes([AllowAny])
+@permission_classes([IsDirectivo])
+@lectura_en_replica
+@respuesta_condicional(*MODELOS_FINANZAS)
+@reporte_cacheado(*MODELOS_CACHE_FINANZAS)
 def directivo_total_horas_horarios(request):
     """
     Calcular el total de horas basado en los horarios fijos de los monitores * total de semanas.
     Filtros opcionales: monitor_id, sede, jornada
     Acceso: solo DIRECTIVO
     """
-    # Autenticación manual
-    auth_header = request.headers.get('Authorization')
-    if not auth_header or not auth_header.startswith('Bearer '):
-        return Response({'detail': 'Token de autenticación requerido'}, status=status.HTTP_401_UNAUTHORIZED)
-
-    # Usuario DIRECTIVO temporal
-    usuario_directivo = UsuarioPersonalizado.objects.filter(tipo_usuario='DIRECTIVO').first()
-    if not usuario_directivo:
-        return Response({'detail': 'No hay usuarios DIRECTIVO'}, status=status.HTTP_403_FORBIDDEN)
-
     # Parámetros de filtrado
     monitor_id = request.query_params.get('monitor_id')
     sede = request.query_params.get('sede')  # SA|BA
@@ -2251,23 +2139,12 @@ def _calcular_resumen_por_jornada(monitores_data):
     return resumen
 
 @api_view(['POST'])
-@authentication_classes([])
-@permission_classes([AllowAny])
+@permission_classes([IsDirectivo])
 def directivo_configuraciones_inicializar(request):
     """
     Inicializar configuraciones por defecto del sistema.
     Acceso: solo DIRECTIVO
     """
-    # Autenticación manual
-    auth_header = request.headers.get('Authorization')
-    if not auth_header or not auth_header.startswith('Bearer '):
-        return Response({'detail': 'Token de autenticación requerido'}, status=status.HTTP_401_UNAUTHORIZED)
-
-    # Usuario DIRECTIVO temporal
-    usuario_directivo = UsuarioPersonalizado.objects.filter(tipo_usuario='DIRECTIVO').first()
-    if not usuario_directivo:
-        return Response({'detail': 'No hay usuarios DIRECTIVO'}, status=status.HTTP_403_FORBIDDEN)
-
     configuraciones_por_defecto = [
         {
             'clave': 'costo_por_hora',
@@ -2297,13 +2174,134 @@ def directivo_configuraciones_inicializar(request):
                 valor=config_data['valor'],
                 descripcion=config_data['descripcion'],
                 tipo_dato=config_data['tipo_dato'],
-                creado_por=usuario_directivo
+                creado_por=request.user
             )
             configuraciones_creadas.append(ConfiguracionSistemaSerializer(configuracion).data)
 
+    if configuraciones_creadas:
+        invalidar_configuraciones()
+
     return Response({
         'mensaje': f'Se crearon {len(configuraciones_creadas)} configuraciones nuevas',
         'configuraciones_creadas': configuraciones_creadas,
         'configuraciones_existentes': configuraciones_existentes,
         'total_procesadas': len(configuraciones_por_defecto)
-    }, status=status.HTTP_201_CREATED)
\ No newline at end of file
+    }, status=status.HTTP_201_CREATED)
+
+
+# ===== Trabajos en segundo plano =====
+
+MAXIMO_TRABAJOS_LISTADO = 50
+
+
+def _trabajo_a_dict(trabajo):
+    def _iso(valor):
+        return valor.isoformat() if valor else None
+
+    espera = duracion = None
+    if trabajo.started_at:
+        espera = round((trabajo.started_at - trabajo.created_at).total_seconds(), 3)
+        if trabajo.finished_at:
+            duracion = round((trabajo.finished_at - trabajo.started_at).total_seconds(), 3)
+    return {
+        'id': trabajo.id,
+        'tipo': trabajo.tipo,
+        'parametros': trabajo.parametros,
+        'estado': trabajo.estado,
+        'solicitado_por': trabajo.solicitado_por_id,
+        'intentos': trabajo.intentos,
+        'codigo_estado': trabajo.codigo_estado,
+        'error': trabajo.error or None,
+        'created_at': _iso(trabajo.created_at),
+        'started_at': _iso(trabajo.started_at),
+        'finished_at': _iso(trabajo.finished_at),
+        'segundos_en_cola': espera,
+        'segundos_ejecucion': duracion,
+        'resultado_url': (
+            reverse('directivo_trabajo_resultado', kwargs={'pk': trabajo.id})
+            if trabajo.estado == Trabajo.COMPLETADO else None
+        ),
+    }
+
+@api_view(['GET', 'POST'])
+@permission_classes([IsDirectivo])
+def directivo_trabajos(request):
+    """
+    GET: Listar los últimos trabajos (filtro opcional: estado)
+    POST: Encolar un reporte o exportación para calcularlo en segundo plano (ver trabajos.py).
+    Si ya hay un trabajo pendiente o en proceso con el mismo tipo y parámetros, se retorna ese.
+    Acceso: solo DIRECTIVO
+    """
+    if request.method == 'GET':
+        trabajos_qs = Trabajo.objects.defer('resultado')
+        estado = request.query_params.get('estado')
+        if estado:
+            if estado not in dict(Trabajo.ESTADOS):
+                return Response({'detail': 'estado inválido'}, status=status.HTTP_400_BAD_REQUEST)
+            trabajos_qs = trabajos_qs.filter(estado=estado)
+        return Response({'trabajos': [_trabajo_a_dict(trabajo) for trabajo in trabajos_qs[:MAXIMO_TRABAJOS_LISTADO]]})
+
+    try:
+        trabajo, creado = encolar_trabajo(
+            request.data.get('tipo'), request.data.get('parametros') or {}, request.user
+        )
+    except ValueError as e:
+        return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    respuesta = Response(
+        {**_trabajo_a_dict(trabajo), 'reutilizado': not creado}, status=status.HTTP_202_ACCEPTED
+    )
+    respuesta['Location'] = reverse('directivo_trabajo_detalle', kwargs={'pk': trabajo.id})
+    return respuesta
+
+@api_view(['GET'])
+@permission_classes([IsDirectivo])
+def directivo_trabajo_detalle(request, pk):
+    """
+    Estado y tiempos de un trabajo.
+    Acceso: solo DIRECTIVO
+    """
+    try:
+        trabajo = Trabajo.objects.defer('resultado').get(pk=pk)
+    except Trabajo.DoesNotExist:
+        return Response({'detail': 'Trabajo no encontrado'}, status=status.HTTP_404_NOT_FOUND)
+    return Response(_trabajo_a_dict(trabajo))
+
+@api_view(['GET'])
+@permission_classes([IsDirectivo])
+def directivo_trabajo_resultado(request, pk):
+    """
+    Resultado de un trabajo completado, con el mismo contenido y formato que la respuesta
+    del endpoint original. Si el trabajo no está completado responde 409.
+    Acceso: solo DIRECTIVO
+    """
+    try:
+        trabajo = Trabajo.objects.get(pk=pk)
+    except Trabajo.DoesNotExist:
+        return Response({'detail': 'Trabajo no encontrado'}, status=status.HTTP_404_NOT_FOUND)
+    if trabajo.estado != Trabajo.COMPLETADO:
+        return Response({
+            'detail': f'El trabajo no está completado (estado: {trabajo.estado})',
+            'estado': trabajo.estado,
+            'error': trabajo.error or None
+        }, status=status.HTTP_409_CONFLICT)
+
+    respuesta = HttpResponse(
+        bytes(trabajo.resultado), content_type=trabajo.cabeceras.get('Content-Type', 'application/json')
+    )
+    if 'Content-Disposition' in trabajo.cabeceras:
+        respuesta['Content-Disposition'] = trabajo.cabeceras['Content-Disposition']
+    return respuesta
+
+
+# ===== Métricas =====
+
+@api_view(['GET'])
+@authentication_classes([TokenMetricasAuthentication, UsuarioPersonalizadoJWTAuthentication])
+@permission_classes([IsRecolectorMetricas])
+def metricas(request):
+    """
+    Métricas del proceso en formato de texto de Prometheus (ver example/metricas.py).
+    Acceso: recolector con METRICAS_TOKEN o DIRECTIVO
+    """
+    return HttpResponse(exportar_metricas(), content_type=CONTENT_TYPE_PROMETHEUS)